@@ -1,48 +1,148 @@
-import tkinter as tk
-from tkinter import scrolledtext, ttk, messagebox
-from tkinter import font as tkFont
-from ttkthemes import ThemedTk
-from threading import Thread, Event
+import argparse
+import signal
+from threading import Thread, Event, Lock, RLock, Condition, local
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import queue
 import time
-from selenium import webdriver
-from selenium.webdriver.edge.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.common.exceptions import TimeoutException, WebDriverException
-from selenium.webdriver.support import expected_conditions as EC
+from collections import deque
 from datetime import datetime, time as dt_time, timedelta
 import os
 import sys
+import json
+import shutil
+import hashlib
+import csv
+import gzip
+import io
 import logging
+import logging.handlers
+import atexit
+from contextlib import contextmanager
 from pathlib import Path
-import requests
+from html.parser import HTMLParser
+from urllib.parse import urljoin, urlsplit
+import re
+import random
+import math
+
+# Módulos pesados carregados apenas quando usados pela primeira vez:
+# interface (carregar_interface), navegador (carregar_selenium), HTTP (carregar_requests)
+# e conversão colunar (carregar_pyarrow)
+tk = scrolledtext = ttk = messagebox = tkFont = ThemedTk = None
+webdriver = Options = Service = DriverFinder = By = WebDriverWait = EC = psutil = None
+requests = HTTPAdapter = None
+pyarrow = None
+
+
+class _ExcecaoNaoCarregada(Exception):
+    """Ocupa o lugar das exceções do Selenium até ele ser carregado; nunca é lançada"""
+
+
+TimeoutException = WebDriverException = _ExcecaoNaoCarregada
+
+
+def carregar_interface():
+    """
+    Importa o Tkinter e o ttkthemes na abertura da interface gráfica
+    
+    Returns:
+        bool: False se não estiverem disponíveis (servidores sem interface)
+    """
+    global tk, scrolledtext, ttk, messagebox, tkFont, ThemedTk
+    if ThemedTk is None:
+        try:
+            import tkinter
+            from tkinter import scrolledtext as _scrolledtext, ttk as _ttk, messagebox as _messagebox
+            from tkinter import font as _tkFont
+            from ttkthemes import ThemedTk as _ThemedTk
+        except ImportError:
+            return False
+        tk, scrolledtext, ttk, messagebox, tkFont, ThemedTk = (
+            tkinter, _scrolledtext, _ttk, _messagebox, _tkFont, _ThemedTk
+        )
+    return True
+
+
+def carregar_selenium():
+    """Importa o Selenium (e o psutil, se instalado) na criação do primeiro navegador"""
+    global webdriver, Options, Service, DriverFinder, By, WebDriverWait, EC, TimeoutException, WebDriverException
+    if webdriver is None:
+        from selenium import webdriver as _webdriver
+        from selenium.webdriver.edge.options import Options as _Options
+        from selenium.webdriver.edge.service import Service as _Service
+        try:
+            from selenium.webdriver.common.driver_finder import DriverFinder as _DriverFinder
+        except ImportError:  # Selenium anterior à 4.20: a resolução fica a cargo do próprio Selenium
+            _DriverFinder = None
+        from selenium.webdriver.common.by import By as _By
+        from selenium.webdriver.support.ui import WebDriverWait as _WebDriverWait
+        from selenium.common.exceptions import TimeoutException as _TimeoutException
+        from selenium.common.exceptions import WebDriverException as _WebDriverException
+        from selenium.webdriver.support import expected_conditions as _EC
+        carregar_psutil()
+        Options, Service, DriverFinder = _Options, _Service, _DriverFinder
+        By, WebDriverWait, EC = _By, _WebDriverWait, _EC
+        TimeoutException, WebDriverException = _TimeoutException, _WebDriverException
+        webdriver = _webdriver  # Por último: indica que o carregamento terminou
+
+
+def carregar_psutil():
+    """Importa o psutil, se instalado (opcional: memória e processos do navegador)"""
+    global psutil
+    if psutil is None:
+        try:
+            import psutil as _psutil
+        except ImportError:
+            return None
+        psutil = _psutil
+    return psutil
+
+
+def carregar_requests():
+    """Importa o requests na criação da primeira sessão HTTP"""
+    global requests, HTTPAdapter
+    if requests is None:
+        import requests as _requests
+        from requests.adapters import HTTPAdapter as _HTTPAdapter
+        HTTPAdapter = _HTTPAdapter
+        requests = _requests
+
+
+def carregar_pyarrow():
+    """Importa o pyarrow, se instalado (opcional: cópia colunar dos relatórios)"""
+    global pyarrow
+    if pyarrow is None:
+        try:
+            import pyarrow as _pyarrow
+            import pyarrow.ipc
+            import pyarrow.parquet
+        except ImportError:
+            return None
+        pyarrow = _pyarrow
+    return pyarrow
 
 # Configuração de diretórios
 BASE_DIR = Path(__file__).resolve().parent
 LOGS_DIR = BASE_DIR / "logs"
+ESTADO_DIR = BASE_DIR / "estado"
+STAGING_DIR = BASE_DIR / "staging"  # Área local (SSD) onde os downloads são gravados antes da publicação
 
 # Criar diretórios se não existirem
 LOGS_DIR.mkdir(exist_ok=True)
+ESTADO_DIR.mkdir(exist_ok=True)
 
-# Configuração de logging
+# Configuração de logging (aplicada por configurar_logging)
 LOG_FILE = LOGS_DIR / "extracao.log"
-logging.basicConfig(
-    filename=LOG_FILE,
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    encoding='utf-8'
-)
-
-# Handler para mostrar logs também no console
-console_handler = logging.StreamHandler(sys.stdout)
-console_handler.setLevel(logging.INFO)
-formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
-console_handler.setFormatter(formatter)
-logging.getLogger().addHandler(console_handler)
+LOG_JSON_FILE = LOGS_DIR / "extracao.jsonl"  # Registro estruturado opcional (uma linha JSON por evento)
+LOG_FORMATO = '%(asctime)s - %(levelname)s - %(message)s'
+LOG_TAMANHO_MAXIMO = 10 * 1024 * 1024        # bytes; o arquivo também é rotacionado a cada dia
+LOG_ARQUIVOS_MANTIDOS = 30                   # Arquivos antigos (compactados) mantidos
+LOG_ESTRUTURADO = False                      # Grava também LOG_JSON_FILE (ou use --log-json)
 
 # Variáveis globais para controle de pausa e parada
 pause_event = Event()
 stop_event = Event()
+controle_condicao = Condition()  # Notificada sempre que a extração é pausada, retomada ou parada
 
 # Constantes da aplicação
 APP_NAME = "Extrator SSW Automático"
@@ -74,6 +174,24 @@ COLORS = {
     'border': '#dcdfe6'
 }
 
+# Cores das mensagens no registro de atividades
+LOG_COLORS = {
+    'time': '#7f8c8d',     # Cinza para a hora
+    'info': '#333333',     # Preto padrão
+    'success': '#2ecc71',  # Verde
+    'warning': '#f39c12',  # Laranja
+    'error': '#e74c3c'     # Vermelho
+}
+
+# Atualização da interface a partir da fila preenchida pelas threads de extração
+INTERVALO_ATUALIZACAO_INTERFACE = 100  # ms
+MAX_ITENS_POR_ATUALIZACAO = 1000       # Itens aplicados por atualização; o restante fica para a próxima
+
+# Registro de atividades: a interface mantém apenas as últimas linhas; as anteriores são lidas do arquivo de log
+MAX_LINHAS_LOG_INTERFACE = 2000
+FOLGA_LINHAS_LOG_INTERFACE = 200       # Linhas excedentes acumuladas antes de remover em bloco
+LINHAS_POR_PAGINA_LOG = 500
+
 # Cores de status
 STATUS_COLORS = {
     'idle': '#7f8c8d',       # Cinza para ocioso
@@ -94,7 +212,8 @@ STATUS_MESSAGES = {
     'error': "Erro na extração",
     'success': "Extração concluída com sucesso",
     'outside_hours': "Fora do horário comercial",
-    'no_connection': "Sem conexão com o site"
+    'no_connection': "Sem conexão com o site",
+    'ssw_unavailable': "SSW indisponível, aguardando nova tentativa"
 }
 
 # Mapeamento de estilos de status
@@ -108,7 +227,8 @@ STATUS_STYLES = {
     'error': 'StatusError.TLabel',
     'success': 'StatusSuccess.TLabel',
     'outside_hours': 'StatusWarning.TLabel',
-    'no_connection': 'StatusError.TLabel'
+    'no_connection': 'StatusError.TLabel',
+    'ssw_unavailable': 'StatusError.TLabel'
 }
 
 # Configurações dos botões
@@ -128,156 +248,4212 @@ BUTTONS = {
     'stop': {
         'text': "Parar Extração",
         'style': 'Danger.TButton'
+    },
+    'older': {
+        'text': "Registros anteriores",
+        'style': 'TButton'
+    }
+}
+
+# Configurações de download
+EXTENSAO_RELATORIO = '.sswweb'
+EXTENSOES_PARCIAIS = ('.crdownload', '.partial', '.tmp')
+TEMPO_MAXIMO_DOWNLOAD = 180         # segundos
+INTERVALO_VERIFICACAO_DOWNLOAD = 0.5  # segundos
+
+# Configurações de acesso ao SSW
+SSW_URL_BASE = "https://sistema.ssw.inf.br"
+SSW_CAMINHO_LOGIN = "/bin/ssw0422"
+SSW_CAMINHO_RELATORIO = "/bin/ssw0036"  # Formulário aberto pela opção 19 do menu
+SSW_URL_LOGIN = SSW_URL_BASE + SSW_CAMINHO_LOGIN
+SSW_CREDENCIAIS = {
+    'f1': "LDI",
+    'f2': "41968069020",
+    'f3': "botlogdi",
+    'f4': "logbotdi"
+}
+
+# Limite de memória do navegador antes de reiniciá-lo (requer psutil)
+LIMITE_MEMORIA_NAVEGADOR_MB = 1500
+
+# Perfis do Edge: 'enxuto' não carrega imagens, fontes nem CSS, não espera o evento load
+# (estratégia "eager") e desliga extensões e serviços em segundo plano
+PERFIL_NAVEGADOR = 'padrao'
+PERFIS_NAVEGADOR = {
+    'padrao': {
+        'estrategia_carregamento': 'normal',
+        'argumentos': [],
+        'bloquear': []
+    },
+    'enxuto': {
+        'estrategia_carregamento': 'eager',
+        'argumentos': [
+            "--disable-extensions",
+            "--disable-background-networking",
+            "--disable-component-update",
+            "--disable-default-apps",
+            "--disable-sync",
+            "--disable-features=msEdgeShopping,EdgeCollections,Translate,MediaRouter",
+            "--no-first-run",
+            "--mute-audio",
+            "--blink-settings=imagesEnabled=false",
+            "--disk-cache-size=16777216",     # 16 MB
+            "--media-cache-size=1"
+        ],
+        # Padrões de URL bloqueados via DevTools (Network.setBlockedURLs)
+        'bloquear': [
+            "*.png", "*.jpg", "*.jpeg", "*.gif", "*.bmp", "*.ico", "*.svg", "*.webp",
+            "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+            "*.css"
+        ]
+    }
+}
+
+# Vigia dos processos do navegador (requer psutil para medir a memória e limpar processos órfãos)
+VIGIA_NAVEGADOR = {
+    'tempo_maximo': 600,            # segundos por extração até o navegador ser encerrado
+    'memoria_maxima_mb': 2500,      # memória do Edge e seus processos durante a extração
+    'intervalo': 5                  # segundos entre as verificações
+}
+ARQUIVO_PROCESSOS_NAVEGADOR = ESTADO_DIR / "processos_navegador.json"
+NOMES_PROCESSOS_DRIVER = ('msedgedriver', 'msedgedriver.exe')
+NOMES_PROCESSOS_NAVEGADOR = ('msedge', 'msedge.exe', 'microsoft-edge')
+# Argumento (ignorado pelo Edge) que identifica os navegadores abertos por esta aplicação
+MARCADOR_NAVEGADOR = '--auto19-extracao'
+
+# Caminho do msedgedriver resolvido pelo Selenium Manager (ver ProvisionadorDriver)
+ARQUIVO_DRIVER_EDGE = ESTADO_DIR / "driver_edge.json"
+
+# Esperas do fluxo no navegador (ver EsperaNavegador): cada etapa segue assim que a página fica pronta
+TEMPO_ESPERA_NAVEGADOR = 20         # segundos até a etapa ser considerada falha
+INTERVALO_ESPERA_NAVEGADOR = 0.1    # segundos entre as verificações
+
+# Motores de extração disponíveis ('navegador' usa o Edge, 'http' usa requests)
+MOTOR_PADRAO = 'navegador'
+TIMEOUT_HTTP = 60                    # segundos
+TAMANHO_BLOCO_DOWNLOAD = 64 * 1024   # bytes
+
+# Pasta do relatório CTA / 19 no drive compartilhado
+PASTA_CTA_19 = 'I:\\.shortcut-targets-by-id\\1BbEijfOOPBwgJuz8LJhqn9OtOIAaEdeO\\Logdi\\Relatório e Dashboards\\CTRCs Disponíveis para Transferência - 19\\DB_CTRCs Disponíveis para Transferência\\CTA'
+
+# Valores padrão de cada extração (job)
+JOB_PADRAO = {
+    'caminho_relatorio': SSW_CAMINHO_RELATORIO,  # Formulário aberto pela opção no menu
+    'campos': {                                  # Campos do formulário ({data} = ddmmaa, {hora} = hhmm)
+        'data_prev_man': "{data}",
+        'hora_prev_man': "0001",
+        'relatorio_excel': "S"
+    },
+    'intervalo_horas': 1,
+    'hora_inicio': 7,
+    'hora_fim': 18,                              # Até 24 (meia-noite), para extrações o dia todo
+    'minuto': 0,                                 # Minuto de cada hora em que a extração é executada
+    'agenda': None,                              # Expressão cron ("5 7-17 * * 1-5"); substitui o intervalo
+    'retencao': {                                # Ver GerenciadorRetencao
+        'manter_ultimos': 1
+    },
+    'staging': True,                             # Baixa localmente e publica em segundo plano
+    'linhas_ignoradas_hash': 0,                  # Linhas iniciais fora da comparação de conteúdo
+    'retentativa': None,                         # Sobrescreve RETENTATIVA_EXTRACAO (ver PoliticaRetentativa)
+    'historico': None,                           # Snapshots base + deltas (ver HistoricoDeltas)
+    'publicar_completo': True,                   # Publica o arquivo .sswweb completo na pasta de destino
+    'colunar': None                              # Cópia tipada em Parquet/Arrow (ver ConversorColunar)
+}
+
+# Formato dos relatórios CSV do SSW
+CODIFICACAO_RELATORIO = 'latin-1'
+DELIMITADOR_RELATORIO = ';'
+
+# Histórico de snapshots por deltas
+HISTORICO_DIR = ESTADO_DIR / "historico"
+HISTORICO_PADRAO = {
+    'chave': "CTRC",    # Coluna que identifica cada linha do relatório
+    'base_a_cada': 24,  # Quantidade de deltas entre dois snapshots completos
+    'dias': 7,          # Dias de histórico mantidos
+    'pasta': None       # Pasta do histórico (padrão: estado/historico/<extração>)
+}
+
+# Cópia colunar (Parquet ou Arrow IPC) gravada ao lado do relatório; requer o pyarrow
+COLUNAR_PADRAO = {
+    'formato': 'parquet',       # 'parquet' ou 'arrow'
+    'compressao': 'zstd',       # Ver COMPRESSOES_COLUNARES; None grava sem compressão
+    'substituir': False,        # Publica apenas o arquivo colunar, no lugar do .sswweb
+    'linhas_por_bloco': 50000   # Linhas convertidas por vez (limita a memória usada)
+}
+EXTENSOES_COLUNARES = {'parquet': '.parquet', 'arrow': '.arrow'}
+COMPRESSOES_COLUNARES = {
+    'parquet': ('zstd', 'snappy', 'gzip', 'brotli', 'lz4', None),
+    'arrow': ('zstd', 'lz4', None)
+}
+
+# Quantidade de registros de "conteúdo inalterado" mantidos no manifesto
+MAX_REGISTROS_INALTERADOS = 500
+
+# Publicação dos arquivos da área local para a pasta de destino
+TENTATIVAS_PUBLICACAO = 5
+ESPERA_PUBLICACAO = 5  # segundos (dobra a cada nova tentativa)
+
+# Extrações executadas quando não há arquivo de configuração
+JOBS_EXTRACAO = [
+    {
+        'nome': "CTA 19",
+        'unidade': "CTA",   # Campo f2 do menu
+        'opcao': "19",      # Campo f3 do menu
+        'pasta_destino': PASTA_CTA_19
     }
+]
+
+# Arquivo opcional com a lista de extrações e limite de extrações simultâneas
+ARQUIVO_JOBS = BASE_DIR / "jobs_extracao.json"
+MAX_JOBS_SIMULTANEOS = 2
+
+# Resultado da última execução de cada extração (consultado por --report)
+ARQUIVO_ESTADO_EXECUCAO = ESTADO_DIR / "execucao.json"
+
+# Tempos de cada fase da extração (ver MedidorFases)
+ARQUIVO_TEMPOS_FASES = ESTADO_DIR / "tempos_fases.json"
+JANELA_TEMPOS_FASES = 500   # Medições mais recentes mantidas por fase
+FASES_EXTRACAO = [
+    'resolucao_driver', 'inicio_navegador', 'pagina_login', 'login', 'menu', 'formulario',
+    'geracao_relatorio', 'download', 'historico', 'conversao', 'publicacao', 'retencao', 'extracao'
+]
+
+# Endpoint de métricas no formato texto do Prometheus (desativado com porta None)
+METRICAS_HOST = "127.0.0.1"
+METRICAS_PORTA = None
+METRICAS_CAMINHO = "/metrics"
+LIMITES_HISTOGRAMA_FASES = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)   # segundos
+
+# Agendamento
+ESPERA_MAXIMA_AGENDADOR = 900   # segundos; confere o relógio ao menos a cada 15 min
+ESPERA_LIBERAR_MOTORES = 2 * 3600   # segundos; com a próxima extração mais distante ou em outro dia,
+                                    # os navegadores/conexões são fechados até lá
+
+# Pré-aquecimento: abre os navegadores (e faz o login) pouco antes da próxima extração,
+# tirando a inicialização do caminho crítico. 'antecedencia' = 0 desativa.
+PREAQUECIMENTO = {
+    'antecedencia': 90,     # segundos antes do horário agendado
+    'login': True           # Faz o login; com False apenas abre a página do ssw0422
+}
+
+# Retentativas com espera exponencial e variação aleatória (ver PoliticaRetentativa)
+RETENTATIVA_EXTRACAO = {
+    'tentativas': 5,        # Tentativas por extração
+    'espera_inicial': 5,    # segundos
+    'multiplicador': 3,
+    'espera_maxima': 600,   # segundos
+    'variacao': 0.5         # Fração da espera sorteada para evitar tentativas sincronizadas
+}
+RETENTATIVA_CONEXAO = {
+    'tentativas': None,     # Sem limite: a verificação se repete até a conexão voltar
+    'espera_inicial': 5,
+    'multiplicador': 2,
+    'espera_maxima': 300,
+    'variacao': 0.5
+}
+
+# Disjuntor das falhas do SSW (ver Disjuntor)
+DISJUNTOR_SSW = {
+    'limite_falhas': 5,     # Falhas seguidas até abrir
+    'tempo_aberto': 120,    # segundos até a primeira tentativa de teste
+    'tempo_aberto_maximo': 1800
+}
+
+# Verificação de disponibilidade do SSW (ver SondaSSW)
+TIMEOUT_SONDA = 5               # segundos
+VALIDADE_SONDA = 30             # segundos em que o último resultado é reaproveitado
+HISTORICO_SONDA = 240           # verificações mantidas no histórico
+JANELA_INSTABILIDADE = 10       # verificações recentes consideradas para adiar um ciclo
+DISPONIBILIDADE_MINIMA = 0.5    # fração mínima de verificações com sucesso na janela
+
+
+# ===== REGISTRO DE LOG =====
+
+# Ciclo, fase e extração da thread atual, anexados a cada registro de log
+contexto_log = local()
+
+
+@contextmanager
+def contexto_execucao(**valores):
+    """
+    Define ciclo, fase e/ou extração da thread atual durante o bloco
+    
+    Exemplo:
+        with contexto_execucao(ciclo="20250414-100000", extracao="CTA 19", fase="download"):
+            ...
+    """
+    anteriores = {chave: getattr(contexto_log, chave, None) for chave in valores}
+    for chave, valor in valores.items():
+        setattr(contexto_log, chave, valor)
+    try:
+        yield
+    finally:
+        for chave, valor in anteriores.items():
+            setattr(contexto_log, chave, valor)
+
+
+class FiltroContexto(logging.Filter):
+    """Copia o contexto da thread que gerou o log para o registro (antes de ele ir para a fila)"""
+    
+    def filter(self, record):
+        record.ciclo = getattr(contexto_log, 'ciclo', None)
+        record.fase = getattr(contexto_log, 'fase', None)
+        record.extracao = getattr(contexto_log, 'extracao', None)
+        return True
+
+
+class FormatadorJSON(logging.Formatter):
+    """Formata cada registro como uma linha JSON com ciclo, fase e extração"""
+    
+    def format(self, record):
+        evento = {
+            'momento': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'nivel': record.levelname,
+            'mensagem': record.getMessage(),
+            'thread': record.threadName,
+            'ciclo': getattr(record, 'ciclo', None),
+            'fase': getattr(record, 'fase', None),
+            'extracao': getattr(record, 'extracao', None)
+        }
+        if record.exc_info:
+            evento['excecao'] = self.formatException(record.exc_info)
+        return json.dumps(evento, ensure_ascii=False)
+
+
+class ManipuladorLogRotativo(logging.handlers.BaseRotatingHandler):
+    """
+    Arquivo de log rotacionado por tamanho e a cada dia
+    
+    O arquivo rotacionado é compactado em gzip com a data e hora da rotação
+    no nome (extracao.log.20250414_235959.gz) e apenas os
+    'arquivos_mantidos' mais recentes são preservados. Como roda na thread
+    do QueueListener, a compactação não atrasa quem gerou o log.
+    """
+    
+    def __init__(self, caminho, tamanho_maximo=LOG_TAMANHO_MAXIMO, arquivos_mantidos=LOG_ARQUIVOS_MANTIDOS):
+        """Inicializa o manipulador; o arquivo só é aberto no primeiro registro"""
+        super().__init__(caminho, 'a', encoding='utf-8', delay=True)
+        self.tamanho_maximo = tamanho_maximo
+        self.arquivos_mantidos = arquivos_mantidos
+        try:
+            self.dia = datetime.fromtimestamp(os.path.getmtime(self.baseFilename)).date()
+        except OSError:
+            self.dia = datetime.now().date()
+    
+    def shouldRollover(self, record):
+        """Rotaciona na virada do dia ou quando o próximo registro ultrapassar o tamanho máximo"""
+        if datetime.now().date() != self.dia:
+            return os.path.exists(self.baseFilename)
+        if not self.tamanho_maximo:
+            return False
+        try:
+            tamanho = self.stream.tell() if self.stream is not None else os.path.getsize(self.baseFilename)
+        except OSError:
+            return False
+        return tamanho + len(self.format(record)) + 1 > self.tamanho_maximo
+    
+    def doRollover(self):
+        """Compacta o arquivo atual e remove os arquivos antigos excedentes"""
+        if self.stream is not None:
+            self.stream.close()
+            self.stream = None
+        
+        destino = f"{self.baseFilename}.{datetime.now().strftime('%Y%m%d_%H%M%S')}.gz"
+        sequencia = 1
+        while os.path.exists(destino):  # Mais de uma rotação no mesmo segundo
+            destino = f"{self.baseFilename}.{datetime.now().strftime('%Y%m%d_%H%M%S')}_{sequencia}.gz"
+            sequencia += 1
+        try:
+            with open(self.baseFilename, 'rb') as origem, gzip.open(destino, 'wb') as compactado:
+                shutil.copyfileobj(origem, compactado)
+            os.remove(self.baseFilename)
+        except OSError:
+            pass  # Mantém o arquivo atual; a rotação é tentada novamente no próximo registro
+        self.dia = datetime.now().date()
+        
+        # Do mais antigo para o mais recente
+        pasta, nome = os.path.split(self.baseFilename)
+        with os.scandir(pasta) as entradas:
+            antigos = sorted(
+                (entrada for entrada in entradas if entrada.name.startswith(nome + ".") and entrada.name.endswith(".gz")),
+                key=lambda entrada: entrada.stat().st_mtime_ns
+            )
+        for antigo in antigos[:max(len(antigos) - self.arquivos_mantidos, 0)]:
+            try:
+                os.remove(antigo.path)
+            except OSError:
+                pass
+
+
+def configurar_logging(console=True, estruturado=LOG_ESTRUTURADO):
+    """
+    Configura o logging da aplicação com gravação em segundo plano
+    
+    Quem gera o log apenas coloca o registro em uma fila (QueueHandler); uma
+    thread (QueueListener) grava no arquivo rotativo, no console e,
+    opcionalmente, no registro estruturado JSON, então as extrações nunca
+    esperam pelo disco.
+    
+    Args:
+        console (bool): Também mostra os logs no console
+        estruturado (bool): Também grava LOG_JSON_FILE
+        
+    Returns:
+        QueueListener: Listener iniciado (encerrado automaticamente na saída)
+    """
+    formatador = logging.Formatter(LOG_FORMATO)
+    destinos = []
+    
+    arquivo = ManipuladorLogRotativo(LOG_FILE)
+    arquivo.setFormatter(formatador)
+    destinos.append(arquivo)
+    
+    if console:
+        saida = logging.StreamHandler(sys.stdout)
+        saida.setFormatter(formatador)
+        destinos.append(saida)
+    
+    if estruturado:
+        json_handler = ManipuladorLogRotativo(LOG_JSON_FILE)
+        json_handler.setFormatter(FormatadorJSON())
+        destinos.append(json_handler)
+    
+    fila = queue.SimpleQueue()
+    manipulador_fila = logging.handlers.QueueHandler(fila)
+    manipulador_fila.addFilter(FiltroContexto())
+    
+    raiz = logging.getLogger()
+    for manipulador in list(raiz.handlers):
+        raiz.removeHandler(manipulador)
+    raiz.addHandler(manipulador_fila)
+    raiz.setLevel(logging.INFO)
+    
+    listener = logging.handlers.QueueListener(fila, *destinos, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
+
+
+# ===== MEDIÇÃO DE TEMPOS =====
+
+class MedidorFases:
+    """
+    Duração de cada fase das extrações, com percentis sobre as medições recentes
+    
+    Cada fase guarda as últimas 'janela' medições (momento, ciclo, extração
+    e segundos), das quais são calculados p50, p95 e máximo. As medições
+    são gravadas em ARQUIVO_TEMPOS_FASES ao fim de cada ciclo e recarregadas
+    na inicialização.
+    """
+    
+    def __init__(self, caminho=ARQUIVO_TEMPOS_FASES, janela=JANELA_TEMPOS_FASES):
+        """Inicializa o medidor vazio (ver carregar)"""
+        self.caminho = Path(caminho)
+        self.janela = janela
+        self.medicoes = {}
+        self.trava = Lock()
+    
+    def carregar(self):
+        """Recarrega as medições gravadas"""
+        try:
+            with open(self.caminho, encoding='utf-8') as arquivo:
+                gravadas = json.load(arquivo)
+        except (OSError, ValueError):
+            return
+        with self.trava:
+            self.medicoes = {fase: deque(itens, maxlen=self.janela) for fase, itens in gravadas.items()}
+    
+    def salvar(self):
+        """Grava as medições de forma atômica"""
+        with self.trava:
+            gravadas = {fase: list(itens) for fase, itens in self.medicoes.items()}
+        temporario = self.caminho.with_suffix('.tmp')
+        with open(temporario, 'w', encoding='utf-8') as arquivo:
+            json.dump(gravadas, arquivo, ensure_ascii=False)
+        os.replace(temporario, self.caminho)
+    
+    def registrar(self, fase, segundos):
+        """Registra a duração de uma fase, associada ao ciclo e à extração da thread atual"""
+        medicao = {
+            'momento': datetime.now().isoformat(timespec='seconds'),
+            'ciclo': getattr(contexto_log, 'ciclo', None),
+            'extracao': getattr(contexto_log, 'extracao', None),
+            'segundos': round(segundos, 3)
+        }
+        with self.trava:
+            self.medicoes.setdefault(fase, deque(maxlen=self.janela)).append(medicao)
+        metricas.observar_fase(fase, segundos)
+        
+        # Tempos da extração em andamento, resumidos no log ao final dela
+        tempos = getattr(contexto_log, 'tempos', None)
+        if tempos is not None:
+            tempos[fase] = tempos.get(fase, 0) + segundos
+    
+    def percentis(self, fase, extracao=None):
+        """
+        Calcula p50, p95 e máximo das medições recentes de uma fase
+        
+        Returns:
+            dict | None: 'p50', 'p95', 'max' (segundos) e 'amostras', ou None sem medições
+        """
+        with self.trava:
+            valores = sorted(
+                item['segundos'] for item in self.medicoes.get(fase, ())
+                if extracao is None or item['extracao'] == extracao
+            )
+        if not valores:
+            return None
+        
+        def percentil(p):
+            # Método do posto mais próximo
+            return valores[max(0, math.ceil(p / 100 * len(valores)) - 1)]
+        
+        return {'p50': percentil(50), 'p95': percentil(95), 'max': valores[-1], 'amostras': len(valores)}
+    
+    def fases(self):
+        """Fases com medições, na ordem de FASES_EXTRACAO"""
+        with self.trava:
+            nomes = list(self.medicoes)
+        return sorted(nomes, key=lambda fase: FASES_EXTRACAO.index(fase) if fase in FASES_EXTRACAO else len(FASES_EXTRACAO))
+    
+    def resumo(self):
+        """Linhas de texto com os percentis de cada fase"""
+        linhas = []
+        for fase in self.fases():
+            valores = self.percentis(fase)
+            linhas.append(
+                f"{fase}: p50 {valores['p50']:.1f} s, p95 {valores['p95']:.1f} s, "
+                f"máx. {valores['max']:.1f} s ({valores['amostras']} medições)"
+            )
+        return linhas
+
+
+# Medições de todas as extrações do processo
+medidor_fases = MedidorFases()
+
+
+@contextmanager
+def medir_fase(nome):
+    """
+    Mede a duração do bloco como uma fase da extração (registrada apenas se o bloco terminar sem erro)
+    
+    Exemplo:
+        with medir_fase('login'):
+            self.fazer_login()
+    """
+    inicio = time.perf_counter()
+    with contexto_execucao(fase=nome):
+        yield
+    medidor_fases.registrar(nome, time.perf_counter() - inicio)
+
+
+def formatar_tempos(tempos):
+    """Texto curto com a duração de cada fase, na ordem de FASES_EXTRACAO"""
+    ordem = sorted(tempos, key=lambda fase: FASES_EXTRACAO.index(fase) if fase in FASES_EXTRACAO else len(FASES_EXTRACAO))
+    return ", ".join(f"{fase} {tempos[fase]:.1f} s" for fase in ordem)
+
+
+# ===== MÉTRICAS =====
+
+def _rotulos(**valores):
+    """Formata os rótulos de uma amostra do Prometheus, escapando os valores"""
+    itens = []
+    for nome, valor in valores.items():
+        texto = str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        itens.append(f'{nome}="{texto}"')
+    return "{" + ",".join(itens) + "}"
+
+
+class MetricasExtrator:
+    """
+    Contadores e medidores das extrações, expostos no formato texto do Prometheus
+    
+    Os contadores valem para o processo atual; o horário do último sucesso
+    de cada extração é recuperado do estado gravado, para que o alerta de
+    atraso continue válido após reinícios.
+    """
+    
+    def __init__(self, limites=LIMITES_HISTOGRAMA_FASES):
+        """Inicializa as métricas zeradas"""
+        self.limites = tuple(limites)
+        self.execucoes = {}        # (extração, 'success' | 'failure') -> quantidade
+        self.retentativas = {}     # extração -> quantidade
+        self.ultimo_sucesso = {}   # extração -> timestamp
+        self.proxima_execucao = {}  # extração -> timestamp
+        self.ultimo_arquivo = {}   # extração -> (bytes, linhas)
+        self.fases = {}            # fase -> [contagens por limite, soma, quantidade]
+        self.pool = None
+        self.ativo = False         # Há um ServidorMetricas expondo estas métricas
+        self.trava = Lock()
+    
+    def carregar_estado(self, estado):
+        """Recupera o horário do último sucesso gravado por registrar_execucao"""
+        with self.trava:
+            for nome, execucao in estado.items():
+                if execucao.get('ultimo_sucesso'):
+                    self.ultimo_sucesso[nome] = datetime.fromisoformat(execucao['ultimo_sucesso']).timestamp()
+    
+    def definir_pool(self, pool):
+        """Define o pool cujos navegadores têm a memória medida (None ao encerrar)"""
+        self.pool = pool
+    
+    def registrar_execucao(self, extracao, sucesso, proxima=None):
+        """Conta uma execução de extração e seu resultado"""
+        chave = (extracao, 'success' if sucesso else 'failure')
+        with self.trava:
+            self.execucoes[chave] = self.execucoes.get(chave, 0) + 1
+            if sucesso:
+                self.ultimo_sucesso[extracao] = time.time()
+            if proxima is not None:
+                self.proxima_execucao[extracao] = proxima.timestamp()
+    
+    def registrar_retentativa(self, extracao):
+        """Conta uma nova tentativa após falha"""
+        with self.trava:
+            self.retentativas[extracao] = self.retentativas.get(extracao, 0) + 1
+    
+    def registrar_arquivo(self, extracao, tamanho, linhas=None):
+        """Guarda o tamanho (bytes) e a quantidade de linhas do último arquivo baixado"""
+        with self.trava:
+            self.ultimo_arquivo[extracao] = (tamanho, linhas)
+    
+    def observar_fase(self, fase, segundos):
+        """Acrescenta a duração de uma fase ao histograma"""
+        with self.trava:
+            contagens, soma, quantidade = self.fases.get(fase) or ([0] * len(self.limites), 0.0, 0)
+            for indice, limite in enumerate(self.limites):
+                if segundos <= limite:
+                    contagens[indice] += 1
+            self.fases[fase] = (contagens, soma + segundos, quantidade + 1)
+    
+    def memoria_navegadores(self):
+        """
+        Soma a memória residente dos navegadores abertos pelo pool
+        
+        Returns:
+            float | None: Memória em bytes, ou None sem navegadores medidos
+        """
+        pool = self.pool
+        if pool is None:
+            return None
+        total = None
+        for motor in list(pool.criados):
+            sessao = getattr(motor, 'sessao', None)
+            memoria = sessao.uso_memoria_mb() if sessao is not None else None
+            if memoria is not None:
+                total = (total or 0) + memoria * 1024 * 1024
+        return total
+    
+    def formatar(self, agora=None):
+        """
+        Gera o texto de exposição do Prometheus (versão 0.0.4)
+        
+        Returns:
+            str: Métricas com HELP/TYPE, uma amostra por linha
+        """
+        agora = agora or time.time()
+        linhas = []
+        
+        def metrica(nome, tipo, ajuda, amostras):
+            linhas.append(f"# HELP {nome} {ajuda}")
+            linhas.append(f"# TYPE {nome} {tipo}")
+            for rotulos, valor in amostras:
+                linhas.append(f"{nome}{rotulos} {valor}")
+        
+        with self.trava:
+            execucoes = dict(self.execucoes)
+            retentativas = dict(self.retentativas)
+            ultimo_sucesso = dict(self.ultimo_sucesso)
+            proxima_execucao = dict(self.proxima_execucao)
+            ultimo_arquivo = dict(self.ultimo_arquivo)
+            fases = {fase: (list(valores[0]), valores[1], valores[2]) for fase, valores in self.fases.items()}
+        
+        extracoes = sorted({nome for nome, _ in execucoes} | set(ultimo_sucesso))
+        
+        metrica("auto19_cycles_attempted_total", "counter", "Execuções de extração iniciadas",
+                [(_rotulos(job=nome), sum(execucoes.get((nome, resultado), 0) for resultado in ('success', 'failure')))
+                 for nome in extracoes])
+        metrica("auto19_cycles_total", "counter", "Execuções de extração concluídas, por resultado",
+                [(_rotulos(job=nome, result=resultado), quantidade)
+                 for (nome, resultado), quantidade in sorted(execucoes.items())])
+        metrica("auto19_retries_total", "counter", "Novas tentativas após falha na extração",
+                [(_rotulos(job=nome), quantidade) for nome, quantidade in sorted(retentativas.items())])
+        metrica("auto19_last_success_timestamp_seconds", "gauge", "Horário (Unix) do último download com sucesso",
+                [(_rotulos(job=nome), momento) for nome, momento in sorted(ultimo_sucesso.items())])
+        metrica("auto19_seconds_since_last_success", "gauge", "Segundos desde o último download com sucesso",
+                [(_rotulos(job=nome), round(agora - momento, 3)) for nome, momento in sorted(ultimo_sucesso.items())])
+        metrica("auto19_next_run_timestamp_seconds", "gauge", "Horário (Unix) da próxima execução agendada",
+                [(_rotulos(job=nome), momento) for nome, momento in sorted(proxima_execucao.items())])
+        metrica("auto19_last_file_size_bytes", "gauge", "Tamanho do último arquivo baixado",
+                [(_rotulos(job=nome), valores[0]) for nome, valores in sorted(ultimo_arquivo.items())])
+        metrica("auto19_last_file_rows", "gauge", "Linhas de dados do último arquivo baixado",
+                [(_rotulos(job=nome), valores[1]) for nome, valores in sorted(ultimo_arquivo.items())
+                 if valores[1] is not None])
+        
+        amostras = []
+        for fase in sorted(fases, key=lambda nome: FASES_EXTRACAO.index(nome) if nome in FASES_EXTRACAO else len(FASES_EXTRACAO)):
+            contagens, soma, quantidade = fases[fase]
+            for limite, contagem in zip(self.limites, contagens):
+                amostras.append((f"_bucket{_rotulos(phase=fase, le=f'{limite:g}')}", contagem))
+            amostras.append((f"_bucket{_rotulos(phase=fase, le='+Inf')}", quantidade))
+            amostras.append((f"_sum{_rotulos(phase=fase)}", round(soma, 6)))
+            amostras.append((f"_count{_rotulos(phase=fase)}", quantidade))
+        metrica("auto19_phase_duration_seconds", "histogram", "Duração de cada fase da extração", amostras)
+        
+        memoria = self.memoria_navegadores()
+        metrica("auto19_browser_rss_bytes", "gauge", "Memória residente dos navegadores e processos filhos",
+                [("", round(memoria))] if memoria is not None else [])
+        
+        return "\n".join(linhas) + "\n"
+
+
+# Métricas de todas as extrações do processo
+metricas = MetricasExtrator()
+
+
+class ServidorMetricas:
+    """
+    Servidor HTTP em segundo plano que responde METRICAS_CAMINHO com as métricas
+    
+    Usa apenas http.server (importado ao iniciar, para não pesar na inicialização).
+    """
+    
+    def __init__(self, porta, host=METRICAS_HOST, fonte=metricas):
+        """Configura o servidor sem abrir a porta"""
+        self.host = host
+        self.porta = porta
+        self.fonte = fonte
+        self.servidor = None
+    
+    def iniciar(self):
+        """
+        Abre a porta e atende as requisições em uma thread
+        
+        Raises:
+            OSError: Se a porta não puder ser aberta
+        """
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        fonte = self.fonte
+        
+        class ManipuladorMetricas(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?', 1)[0] != METRICAS_CAMINHO:
+                    self.send_error(404)
+                    return
+                corpo = fonte.formatar().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(corpo)))
+                self.end_headers()
+                self.wfile.write(corpo)
+            
+            def log_message(self, formato, *args):
+                pass  # As coletas periódicas não vão para o log
+        
+        self.servidor = ThreadingHTTPServer((self.host, self.porta), ManipuladorMetricas)
+        self.servidor.daemon_threads = True
+        self.porta = self.servidor.server_address[1]
+        Thread(target=self.servidor.serve_forever, name='metricas', daemon=True).start()
+        self.fonte.ativo = True
+        logging.info(f"Métricas disponíveis em http://{self.host}:{self.porta}{METRICAS_CAMINHO}")
+    
+    def parar(self):
+        """Encerra o servidor"""
+        if self.servidor is not None:
+            self.servidor.shutdown()
+            self.servidor.server_close()
+            self.servidor = None
+            self.fonte.ativo = False
+
+
+# ===== FUNÇÕES AUXILIARES =====
+
+def get_status_style(status_key):
+    """Obtém o estilo ttk para uma label de status com base em sua chave"""
+    return STATUS_STYLES.get(status_key, 'StatusIdle.TLabel')
+
+
+def get_status_message(status_key, **kwargs):
+    """Obtém a mensagem de status com formatação opcional"""
+    message = STATUS_MESSAGES.get(status_key, "Status desconhecido")
+    if kwargs:
+        return message.format(**kwargs)
+    return message
+
+
+def listar_arquivos(diretorio):
+    """Retorna o conjunto de nomes de arquivos presentes no diretório"""
+    try:
+        return set(os.listdir(diretorio))
+    except OSError:
+        return set()
+
+
+def aguardar_download(diretorio, arquivos_antes, extensao=EXTENSAO_RELATORIO,
+                      timeout=TEMPO_MAXIMO_DOWNLOAD, intervalo=INTERVALO_VERIFICACAO_DOWNLOAD,
+                      verificacoes_estaveis=2, ao_detectar=None, cancelado=None):
+    """
+    Aguarda a conclusão do download de um novo arquivo no diretório
+
+    O download é considerado concluído quando surge um arquivo novo com a
+    extensão esperada, não há mais arquivos parciais (.crdownload) e o
+    tamanho do arquivo permanece igual em verificações consecutivas.
+
+    Args:
+        diretorio (str): Diretório de download monitorado
+        arquivos_antes (set): Nomes dos arquivos existentes antes do download
+        extensao (str): Extensão do arquivo esperado
+        timeout (float): Tempo máximo de espera em segundos
+        intervalo (float): Intervalo entre verificações em segundos
+        verificacoes_estaveis (int): Verificações seguidas com o mesmo tamanho
+        ao_detectar (callable | None): Chamado uma vez, quando o primeiro arquivo novo
+            (parcial ou completo) aparece no diretório
+        cancelado (callable | None): Interrompe a espera quando retornar True
+
+    Returns:
+        str | None: Caminho do arquivo baixado, ou None se o tempo esgotar
+                    ou a extração for interrompida
+    """
+    limite = time.monotonic() + timeout
+    candidato = None
+    ultimo_tamanho = None
+    estaveis = 0
+
+    while time.monotonic() < limite:
+        novos = []
+        download_parcial = False
+
+        try:
+            with os.scandir(diretorio) as entradas:
+                for entrada in entradas:
+                    if entrada.name in arquivos_antes or not entrada.is_file():
+                        continue
+                    nome = entrada.name.lower()
+                    if nome.endswith(EXTENSOES_PARCIAIS):
+                        download_parcial = True
+                    elif nome.endswith(extensao):
+                        novos.append(entrada)
+        except OSError as e:
+            logging.warning(f"Falha ao verificar o diretório de download: {e}")
+
+        if ao_detectar is not None and (novos or download_parcial):
+            ao_detectar()
+            ao_detectar = None
+
+        if novos and not download_parcial:
+            entrada = max(novos, key=lambda e: e.stat().st_mtime)
+            tamanho = entrada.stat().st_size
+
+            if entrada.path == candidato and tamanho > 0 and tamanho == ultimo_tamanho:
+                estaveis += 1
+                if estaveis >= verificacoes_estaveis:
+                    return entrada.path
+            else:
+                candidato = entrada.path
+                ultimo_tamanho = tamanho
+                estaveis = 0
+        else:
+            candidato = None
+            estaveis = 0
+
+        # Aguarda a próxima verificação, encerrando imediatamente se a extração for parada
+        if stop_event.wait(intervalo) or (cancelado is not None and cancelado()):
+            return None
+
+    return None
+
+
+def esta_no_horario_comercial(hora_inicio=7, hora_fim=18):
+    """
+    Verifica se o momento atual está dentro do horário comercial definido
+    
+    Args:
+        hora_inicio (int): Hora de início do horário comercial (24h)
+        hora_fim (int): Hora de término do horário comercial (24h; 24 = até a meia-noite)
+        
+    Returns:
+        bool: True se está no horário comercial, False caso contrário
+    """
+    agora = datetime.now().time()
+    horario_inicio = dt_time(hora_inicio, 0)
+    if hora_fim >= 24:
+        return horario_inicio <= agora
+    horario_fim = dt_time(hora_fim, 0)
+    return horario_inicio <= agora <= horario_fim
+
+
+def calcular_proxima_extracao(hora_inicio=7, intervalo_horas=1, hora_fim=18, minuto=0, agora=None):
+    """
+    Calcula o horário da próxima extração, alinhado ao relógio
+    
+    As extrações ocorrem em hora_inicio:minuto e a cada intervalo_horas a
+    partir dele, enquanto o horário for anterior a hora_fim. O horário não
+    depende de quando a extração anterior terminou, então não acumula atrasos.
+    
+    Args:
+        hora_inicio (int): Hora de início do horário comercial (24h)
+        intervalo_horas (int): Intervalo entre extrações em horas
+        hora_fim (int): Hora de término do horário comercial (24h)
+        minuto (int): Minuto da hora em que as extrações ocorrem
+        agora (datetime | None): Momento de referência (padrão: agora)
+        
+    Returns:
+        datetime: Horário da próxima extração
+    """
+    agora = agora or datetime.now()
+    inicio_hoje = agora.replace(hour=hora_inicio, minute=minuto, second=0, microsecond=0)
+    inicio_amanha = inicio_hoje + timedelta(days=1)
+    
+    # Antes do horário comercial: primeira extração do dia
+    if agora < inicio_hoje:
+        return inicio_hoje
+    
+    # Durante o horário comercial: próximo múltiplo do intervalo a partir do início
+    intervalo = timedelta(hours=intervalo_horas)
+    proxima_extracao = inicio_hoje + ((agora - inicio_hoje) // intervalo + 1) * intervalo
+    
+    # Após o horário comercial: primeira extração do dia seguinte
+    if proxima_extracao.date() != agora.date() or proxima_extracao.hour >= hora_fim:
+        return inicio_amanha
+    return proxima_extracao
+
+
+def ler_pagina_log(caminho, fim=None, quantidade=LINHAS_POR_PAGINA_LOG, tamanho_bloco=64 * 1024):
+    """
+    Lê as últimas linhas de um arquivo de log antes de uma posição, sem carregar o arquivo inteiro
+    
+    Arquivos rotacionados (.gz) são descompactados na memória, o que é
+    limitado pelo tamanho máximo do log (LOG_TAMANHO_MAXIMO).
+    
+    Args:
+        caminho (Path): Arquivo de log (ou arquivo rotacionado .gz)
+        fim (int | None): Posição (bytes) onde a página termina (padrão: fim do arquivo)
+        quantidade (int): Número máximo de linhas da página
+        
+    Returns:
+        tuple: (lista de linhas, posição em bytes onde a página começa; 0 = início do arquivo)
+    """
+    try:
+        if str(caminho).endswith('.gz'):
+            with gzip.open(caminho, 'rb') as compactado:
+                arquivo = io.BytesIO(compactado.read())
+        else:
+            arquivo = open(caminho, 'rb')
+        with arquivo:
+            arquivo.seek(0, os.SEEK_END)
+            fim = arquivo.tell() if fim is None else min(fim, arquivo.tell())
+            inicio = fim
+            dados = b""
+            
+            # Lê blocos de trás para frente até ter linhas suficientes
+            while inicio > 0 and dados.count(b"\n") <= quantidade:
+                inicio = max(inicio - tamanho_bloco, 0)
+                arquivo.seek(inicio)
+                dados = arquivo.read(fim - inicio)
+    except (OSError, EOFError):
+        return [], 0
+    
+    linhas = dados.split(b"\n")
+    if linhas and linhas[-1] == b"":
+        linhas.pop()
+    if len(linhas) > quantidade:
+        # Descarta o excedente (e a linha possivelmente cortada no início do bloco)
+        descartadas = linhas[:len(linhas) - quantidade]
+        inicio += sum(len(linha) + 1 for linha in descartadas)
+        linhas = linhas[len(linhas) - quantidade:]
+    return [linha.decode('utf-8', errors='replace').rstrip("\r") for linha in linhas], inicio
+
+
+def arquivos_log(caminho=None):
+    """
+    Lista o arquivo de log atual seguido dos rotacionados (ver ManipuladorLogRotativo)
+    
+    Returns:
+        list: Caminhos do mais recente para o mais antigo
+    """
+    caminho = Path(caminho or LOG_FILE)
+    try:
+        with os.scandir(caminho.parent) as entradas:
+            rotacionados = sorted(
+                (entrada for entrada in entradas
+                 if entrada.name.startswith(caminho.name + ".") and entrada.name.endswith(".gz")),
+                key=lambda entrada: entrada.stat().st_mtime_ns,
+                reverse=True
+            )
+    except OSError:
+        rotacionados = []
+    return [caminho] + [Path(entrada.path) for entrada in rotacionados]
+
+
+def formatar_tempo_restante(segundos):
+    """
+    Formata um tempo em segundos para formato legível
+    
+    Args:
+        segundos (float): Tempo em segundos
+        
+    Returns:
+        str: Tempo formatado como "X horas e Y minutos"
+    """
+    horas = int(segundos // 3600)
+    minutos = int((segundos % 3600) // 60)
+    
+    if horas > 0:
+        return f"{horas} {'hora' if horas == 1 else 'horas'} e {minutos} {'minuto' if minutos == 1 else 'minutos'}"
+    else:
+        return f"{minutos} {'minuto' if minutos == 1 else 'minutos'}"
+
+
+def carregar_jobs(caminho=ARQUIVO_JOBS):
+    """
+    Carrega a lista de extrações (jobs) a executar
+
+    Se o arquivo de configuração existir, ele deve conter uma lista JSON de
+    objetos com pelo menos 'nome', 'unidade', 'opcao' e 'pasta_destino'.
+    As demais chaves ('caminho_relatorio', 'campos', 'intervalo_horas',
+    'hora_inicio', 'hora_fim', 'minuto', 'agenda', 'retencao', 'staging',
+    'linhas_ignoradas_hash', 'retentativa', 'historico', 'publicar_completo')
+    assumem os valores de JOB_PADRAO.
+    Exemplo:
+
+        [{"nome": "CTA 19", "unidade": "CTA", "opcao": "19",
+          "pasta_destino": "D:\\Relatorios\\CTA", "intervalo_horas": 2}]
+
+    Args:
+        caminho (Path): Arquivo JSON com as extrações
+
+    Returns:
+        list: Extrações com todos os campos preenchidos
+
+    Raises:
+        ValueError: Se o arquivo tiver extrações incompletas ou nomes repetidos
+    """
+    if os.path.exists(caminho):
+        with open(caminho, encoding='utf-8') as arquivo:
+            definicoes = json.load(arquivo)
+        logging.info(f"Extrações carregadas de {caminho}")
+    else:
+        definicoes = JOBS_EXTRACAO
+
+    jobs = []
+    for definicao in definicoes:
+        faltando = [chave for chave in ('nome', 'unidade', 'opcao', 'pasta_destino') if not definicao.get(chave)]
+        if faltando:
+            raise ValueError(f"Extração sem os campos obrigatórios: {', '.join(faltando)}")
+
+        job = dict(JOB_PADRAO)
+        job.update(definicao)
+        job['campos'] = {**JOB_PADRAO['campos'], **definicao.get('campos', {})}
+        if job['agenda']:
+            ExpressaoAgenda(job['agenda'])  # Valida a expressão ao carregar
+        job['retentativa'] = {**RETENTATIVA_EXTRACAO, **(job['retentativa'] or {})}
+        if job['historico'] is not None:
+            job['historico'] = {**HISTORICO_PADRAO, **job['historico']}
+        if job['colunar'] is not None:
+            job['colunar'] = {**COLUNAR_PADRAO, **job['colunar']}
+            formato = job['colunar']['formato']
+            if formato not in EXTENSOES_COLUNARES:
+                raise ValueError(f"Formato colunar inválido na extração {job['nome']}: {formato}")
+            if job['colunar']['compressao'] not in COMPRESSOES_COLUNARES[formato]:
+                raise ValueError(
+                    f"Compressão {job['colunar']['compressao']} não suportada pelo formato {formato} "
+                    f"(extração {job['nome']})"
+                )
+        if not job['publicar_completo'] and job['historico'] is None and job['colunar'] is None:
+            raise ValueError(f"A extração {job['nome']} não publica o arquivo e não tem histórico configurado")
+        jobs.append(job)
+
+    nomes = [job['nome'] for job in jobs]
+    if len(set(nomes)) != len(nomes):
+        raise ValueError("Existem extrações com o mesmo nome")
+
+    return jobs
+
+
+class HashConteudo:
+    """
+    SHA-256 calculado em blocos que pode ignorar as primeiras linhas do arquivo
+
+    Útil quando o cabeçalho do relatório traz a data/hora de emissão, que
+    muda a cada download mesmo quando os dados são os mesmos.
+    """
+
+    def __init__(self, linhas_ignoradas=0):
+        self.sha256 = hashlib.sha256()
+        self.linhas_restantes = linhas_ignoradas
+
+    def update(self, bloco):
+        """Acrescenta um bloco de bytes ao hash"""
+        while self.linhas_restantes and bloco:
+            fim_linha = bloco.find(b'\n')
+            if fim_linha < 0:
+                return
+            bloco = bloco[fim_linha + 1:]
+            self.linhas_restantes -= 1
+        if bloco:
+            self.sha256.update(bloco)
+
+    def hexdigest(self):
+        """Retorna o hash em hexadecimal"""
+        return self.sha256.hexdigest()
+
+
+def calcular_hash(caminho, linhas_ignoradas=0):
+    """Calcula o SHA-256 de um arquivo lendo-o em blocos"""
+    hash_conteudo = HashConteudo(linhas_ignoradas)
+    with open(caminho, 'rb') as arquivo:
+        for bloco in iter(lambda: arquivo.read(TAMANHO_BLOCO_DOWNLOAD), b''):
+            hash_conteudo.update(bloco)
+    return hash_conteudo.hexdigest()
+
+
+def identificador_job(nome):
+    """Converte o nome de uma extração em um identificador seguro para nomes de arquivo"""
+    return re.sub(r'[^0-9A-Za-z_-]+', '_', nome).strip('_') or 'extracao'
+
+
+def pasta_download_job(job):
+    """Retorna a pasta onde o motor grava o arquivo: a área local (staging) ou o destino final"""
+    if job['staging']:
+        pasta = STAGING_DIR / identificador_job(job['nome'])
+        pasta.mkdir(parents=True, exist_ok=True)
+        return str(pasta)
+    return job['pasta_destino']
+
+
+def preencher_campos(campos, agora=None):
+    """Substitui {data} (ddmmaa) e {hora} (hhmm) nos valores dos campos do formulário"""
+    agora = agora or datetime.now()
+    return {
+        nome: str(valor).format(data=agora.strftime('%d%m%y'), hora=agora.strftime('%H%M'))
+        for nome, valor in campos.items()
+    }
+
+
+# ===== DISPONIBILIDADE DO SSW =====
+
+class SondaSSW:
+    """
+    Verifica se o SSW está respondendo com um HEAD na página de login
+    
+    Só conta como disponível uma resposta 2xx ou um redirecionamento para a
+    própria página de login (ex.: para https); páginas de manutenção servidas
+    com 3xx para outro endereço ou 4xx contam como indisponibilidade.
+    
+    A sessão HTTP mantém a conexão aberta entre as verificações, o último
+    resultado é reaproveitado por VALIDADE_SONDA segundos e cada verificação
+    fica no histórico (disponibilidade e latência) usado pelo agendador para
+    adiar ciclos enquanto o SSW estiver instável.
+    """
+    
+    def __init__(self, url_base=SSW_URL_BASE, timeout=TIMEOUT_SONDA, validade=VALIDADE_SONDA,
+                 tamanho_historico=HISTORICO_SONDA):
+        """Inicializa a sonda sem abrir conexões"""
+        self.url = url_base.rstrip('/') + SSW_CAMINHO_LOGIN
+        self.timeout = timeout
+        self.validade = validade
+        self.historico = deque(maxlen=tamanho_historico)  # (momento, disponível, latência em ms)
+        self.sessao = None
+        self.ultima_verificacao = None  # (time.monotonic(), disponível)
+        self.trava = Lock()
+    
+    def obter_sessao(self):
+        """Cria (uma única vez) a sessão HTTP reaproveitada entre as verificações"""
+        if self.sessao is None:
+            carregar_requests()
+            self.sessao = requests.Session()
+            adaptador = HTTPAdapter(pool_connections=1, pool_maxsize=1)
+            self.sessao.mount('https://', adaptador)
+            self.sessao.mount('http://', adaptador)
+            self.sessao.headers['User-Agent'] = f"{APP_NAME}/{APP_VERSION}"
+        return self.sessao
+    
+    def verificar(self, forcar=False):
+        """
+        Indica se o SSW está disponível, usando o resultado em cache se ainda válido
+        
+        Args:
+            forcar (bool): Ignora o cache e consulta o SSW
+            
+        Returns:
+            bool: True se a página de login respondeu 2xx (ou redirecionou para ela mesma)
+        """
+        with self.trava:
+            if (not forcar and self.ultima_verificacao is not None
+                    and time.monotonic() - self.ultima_verificacao[0] < self.validade):
+                return self.ultima_verificacao[1]
+            
+            sessao = self.obter_sessao()
+            inicio = time.perf_counter()
+            try:
+                resposta = sessao.head(self.url, timeout=self.timeout, allow_redirects=False)
+                if resposta.status_code in (405, 501):  # Servidor que não aceita HEAD
+                    resposta = sessao.get(self.url, timeout=self.timeout, allow_redirects=False)
+                disponivel = self.resposta_valida(resposta)
+                if not disponivel:
+                    destino = resposta.headers.get('Location')
+                    logging.error(
+                        f"SSW respondeu com status {resposta.status_code}" + (f" para {destino}" if destino else "")
+                    )
+            except requests.RequestException as e:
+                logging.error(f"Falha de conexão com {self.url}: {e}")
+                disponivel = False
+            latencia = (time.perf_counter() - inicio) * 1000
+            
+            self.historico.append((datetime.now(), disponivel, latencia))
+            self.ultima_verificacao = (time.monotonic(), disponivel)
+            return disponivel
+    
+    def resposta_valida(self, resposta):
+        """Indica se a resposta é a página de login (2xx) ou um redirecionamento para ela"""
+        if 200 <= resposta.status_code < 300:
+            return True
+        if resposta.is_redirect:
+            destino = urljoin(self.url, resposta.headers.get('Location', ''))
+            return urlsplit(destino).path.rstrip('/') == SSW_CAMINHO_LOGIN
+        return False
+    
+    def disponibilidade(self, janela=None):
+        """Fração das últimas verificações (todas, ou as 'janela' mais recentes) com sucesso"""
+        with self.trava:
+            registros = list(self.historico)[-janela:] if janela else list(self.historico)
+        if not registros:
+            return 1.0
+        return sum(1 for _, disponivel, _ in registros if disponivel) / len(registros)
+    
+    def latencia_media(self, janela=None):
+        """Latência média, em ms, das últimas verificações com sucesso (None se não houver)"""
+        with self.trava:
+            registros = list(self.historico)[-janela:] if janela else list(self.historico)
+        latencias = [latencia for _, disponivel, latencia in registros if disponivel]
+        return sum(latencias) / len(latencias) if latencias else None
+    
+    def instavel(self, janela=JANELA_INSTABILIDADE, minimo=DISPONIBILIDADE_MINIMA):
+        """Indica se o SSW falhou em muitas das verificações recentes"""
+        return self.disponibilidade(janela) < minimo
+    
+    def resumo(self):
+        """Texto com disponibilidade e latência do histórico, para o log"""
+        latencia = self.latencia_media()
+        texto_latencia = f"{latencia:.0f} ms" if latencia is not None else "indisponível"
+        return (f"SSW: {self.disponibilidade():.0%} de disponibilidade em {len(self.historico)} "
+                f"verificações, latência média {texto_latencia}")
+    
+    def fechar(self):
+        """Encerra a sessão HTTP"""
+        if self.sessao is not None:
+            self.sessao.close()
+            self.sessao = None
+
+
+# ===== AGENDAMENTO =====
+
+def notificar_controle():
+    """Acorda as threads que aguardam em aguardar() após pausar, retomar ou parar"""
+    with controle_condicao:
+        controle_condicao.notify_all()
+
+
+def aguardar(segundos, interromper_na_pausa=True):
+    """
+    Aguarda sem consumir CPU, retornando imediatamente ao parar (ou pausar)
+    
+    Args:
+        segundos (float): Tempo máximo de espera
+        interromper_na_pausa (bool): Se a pausa também encerra a espera
+        
+    Returns:
+        bool: True se a extração foi parada durante a espera
+    """
+    def interromper():
+        return stop_event.is_set() or (interromper_na_pausa and pause_event.is_set())
+    
+    with controle_condicao:
+        controle_condicao.wait_for(interromper, timeout=max(segundos, 0))
+    return stop_event.is_set()
+
+
+def aguardar_retomada():
+    """Aguarda enquanto a extração estiver pausada; retorna True se ela foi parada"""
+    with controle_condicao:
+        controle_condicao.wait_for(lambda: stop_event.is_set() or not pause_event.is_set())
+    return stop_event.is_set()
+
+
+class ExpressaoAgenda:
+    """
+    Expressão no formato do cron: "minuto hora dia mês dia_da_semana"
+    
+    Cada campo aceita '*', valores, listas ("0,30"), intervalos ("7-17") e
+    passos ("*/15", "8-18/2"; "5/20" vai de 5 até o máximo do campo: 5, 25, 45).
+    Dia da semana: 0 ou 7 = domingo. Como no cron, se dia e dia da semana
+    forem restritos, basta um deles coincidir.
+    
+    Exemplo:
+        ExpressaoAgenda("5 7-17 * * 1-5")  # De hora em hora às :05, das 7h às 17h, em dias úteis
+    """
+    
+    LIMITES = [(0, 59), (0, 23), (1, 31), (1, 12), (0, 7)]
+    
+    def __init__(self, texto):
+        """Interpreta a expressão, gerando ValueError se ela for inválida"""
+        self.texto = texto
+        campos = texto.split()
+        if len(campos) != 5:
+            raise ValueError(f"Expressão de agenda deve ter 5 campos: '{texto}'")
+        
+        valores = [self._interpretar(campo, *limites) for campo, limites in zip(campos, self.LIMITES)]
+        self.minutos, self.horas, self.dias, self.meses, dias_semana = valores
+        self.dias_semana = {dia % 7 for dia in dias_semana}
+        self.dia_restrito = campos[2] != '*'
+        self.dia_semana_restrito = campos[4] != '*'
+    
+    def _interpretar(self, campo, minimo, maximo):
+        valores = set()
+        for parte in campo.split(','):
+            faixa, _, passo = parte.partition('/')
+            try:
+                if faixa == '*':
+                    inicio, fim = minimo, maximo
+                elif '-' in faixa:
+                    inicio, fim = (int(valor) for valor in faixa.split('-', 1))
+                else:
+                    inicio = int(faixa)
+                    fim = maximo if passo else inicio  # Como no cron, "a/n" vai de a até o máximo
+                passo = int(passo) if passo else 1
+            except ValueError:
+                raise ValueError(f"Campo inválido na expressão de agenda '{self.texto}': '{parte}'") from None
+            if not minimo <= inicio <= fim <= maximo or passo < 1:
+                raise ValueError(f"Campo fora dos limites na expressão de agenda '{self.texto}': '{parte}'")
+            valores.update(range(inicio, fim + 1, passo))
+        return valores
+    
+    def _dia_valido(self, momento):
+        no_dia = momento.day in self.dias
+        no_dia_semana = (momento.weekday() + 1) % 7 in self.dias_semana
+        if self.dia_restrito and self.dia_semana_restrito:
+            return no_dia or no_dia_semana
+        return no_dia and no_dia_semana
+    
+    def proxima(self, depois):
+        """
+        Retorna o primeiro horário que satisfaz a expressão após 'depois'
+        
+        Raises:
+            ValueError: Se a expressão não ocorrer nos próximos 5 anos (ex.: 31/02)
+        """
+        momento = depois.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limite = momento + timedelta(days=5 * 366)
+        
+        while momento < limite:
+            if momento.month not in self.meses:
+                momento = (momento.replace(day=1) + timedelta(days=32)).replace(day=1, hour=0, minute=0)
+            elif not self._dia_valido(momento):
+                momento = momento.replace(hour=0, minute=0) + timedelta(days=1)
+            elif momento.hour not in self.horas:
+                momento = momento.replace(minute=0) + timedelta(hours=1)
+            elif momento.minute not in self.minutos:
+                momento += timedelta(minutes=1)
+            else:
+                return momento
+        
+        raise ValueError(f"A expressão de agenda '{self.texto}' nunca ocorre")
+
+
+class Agendador:
+    """
+    Mantém o horário da próxima execução de cada extração
+    
+    Os horários são alinhados ao relógio (ver calcular_proxima_extracao e
+    ExpressaoAgenda), então a duração de cada ciclo não desloca os seguintes.
+    As esperas usam aguardar(), que não acorda a cada segundo e retorna
+    imediatamente ao pausar ou parar.
+    """
+    
+    def __init__(self, jobs):
+        """Agenda todas as extrações para execução imediata"""
+        agora = datetime.now()
+        self.expressoes = {job['nome']: ExpressaoAgenda(job['agenda']) if job['agenda'] else None for job in jobs}
+        self.proximas = {job['nome']: agora for job in jobs}
+    
+    def calcular_proxima(self, job, agora=None):
+        """
+        Calcula o próximo horário da extração dentro do seu horário comercial
+
+        Como no agendamento por intervalo, os horários vão de hora_inicio até
+        antes de hora_fim (com hora_fim = 18, a última extração é antes das 18h).
+        """
+        agora = agora or datetime.now()
+        expressao = self.expressoes[job['nome']]
+        if expressao is None:
+            return calcular_proxima_extracao(
+                job['hora_inicio'], job['intervalo_horas'], job['hora_fim'], job['minuto'], agora
+            )
+        
+        momento = expressao.proxima(agora)
+        inicio = dt_time(job['hora_inicio'], 0)
+        fim = dt_time(job['hora_fim'], 0) if job['hora_fim'] < 24 else None
+        for _ in range(10000):
+            if inicio <= momento.time() and (fim is None or momento.time() < fim):
+                return momento
+            momento = expressao.proxima(momento)
+        raise ValueError(f"A agenda de {job['nome']} não ocorre dentro do horário comercial")
+    
+    def reagendar(self, job, agora=None):
+        """Agenda a próxima execução da extração e retorna o horário agendado"""
+        self.proximas[job['nome']] = self.calcular_proxima(job, agora)
+        return self.proximas[job['nome']]
+    
+    def pendentes(self, jobs, agora=None):
+        """Retorna as extrações cujo horário já chegou"""
+        agora = agora or datetime.now()
+        return [job for job in jobs if self.proximas[job['nome']] <= agora]
+    
+    def segundos_ate_proxima(self, agora=None):
+        """Segundos até a próxima extração agendada"""
+        agora = agora or datetime.now()
+        return max((min(self.proximas.values()) - agora).total_seconds(), 0)
+    
+    def aguardar_proxima(self):
+        """
+        Aguarda até a próxima extração agendada, a pausa ou a parada
+        
+        Returns:
+            bool: True se a extração foi parada durante a espera
+        """
+        return aguardar(min(self.segundos_ate_proxima(), ESPERA_MAXIMA_AGENDADOR))
+
+
+# ===== RETENTATIVAS E DISJUNTOR =====
+
+class PoliticaRetentativa:
+    """
+    Espera exponencial com variação aleatória entre tentativas
+    
+    A espera da tentativa n é espera_inicial * multiplicador^(n-1), limitada
+    a espera_maxima, reduzida aleatoriamente em até 'variacao' (fração) para
+    que extrações que falharam juntas não tentem novamente ao mesmo tempo.
+    """
+    
+    def __init__(self, tentativas=5, espera_inicial=5, multiplicador=2, espera_maxima=600, variacao=0.5):
+        """Inicializa a política; tentativas=None não limita as tentativas"""
+        self.tentativas = tentativas
+        self.espera_inicial = espera_inicial
+        self.multiplicador = multiplicador
+        self.espera_maxima = espera_maxima
+        self.variacao = variacao
+    
+    def espera(self, tentativa):
+        """Segundos de espera após a falha da tentativa informada (1, 2, ...)"""
+        base = min(self.espera_maxima, self.espera_inicial * self.multiplicador ** (tentativa - 1))
+        return base * (1 - self.variacao * random.random())
+    
+    def pode_tentar(self, tentativa):
+        """Indica se a tentativa informada (1, 2, ...) ainda é permitida"""
+        return self.tentativas is None or tentativa <= self.tentativas
+
+
+class Disjuntor:
+    """
+    Disjuntor (circuit breaker) das falhas de acesso ao SSW
+    
+    Depois de 'limite_falhas' falhas seguidas o disjuntor abre e as
+    extrações deixam de ser tentadas (sem abrir navegadores) por
+    'tempo_aberto' segundos. Passado esse tempo ele fica meio aberto e libera
+    uma única extração de teste: se ela funcionar o disjuntor fecha; se falhar
+    ele abre novamente pelo dobro do tempo, até 'tempo_aberto_maximo'.
+    """
+    
+    FECHADO = 'fechado'
+    ABERTO = 'aberto'
+    MEIO_ABERTO = 'meio aberto'
+    
+    def __init__(self, limite_falhas=5, tempo_aberto=120, tempo_aberto_maximo=1800):
+        """Inicializa o disjuntor fechado"""
+        self.limite_falhas = limite_falhas
+        self.tempo_aberto_inicial = tempo_aberto
+        self.tempo_aberto_maximo = tempo_aberto_maximo
+        self.tempo_aberto = tempo_aberto
+        self.estado = self.FECHADO
+        self.falhas = 0
+        self.aberto_em = None
+        self.teste_em_andamento = False
+        self.trava = Lock()
+    
+    def segundos_ate_liberar(self):
+        """Segundos até o disjuntor liberar uma extração de teste (0 se já libera)"""
+        with self.trava:
+            if self.estado != self.ABERTO:
+                return 0
+            return max(self.aberto_em + self.tempo_aberto - time.monotonic(), 0)
+    
+    def permitir(self):
+        """
+        Indica se uma extração pode ser tentada agora
+        
+        No estado meio aberto, apenas a primeira chamada recebe True até que
+        o resultado do teste seja registrado.
+        """
+        with self.trava:
+            if self.estado == self.ABERTO and time.monotonic() - self.aberto_em >= self.tempo_aberto:
+                self.estado = self.MEIO_ABERTO
+                self.teste_em_andamento = False
+            
+            if self.estado == self.FECHADO:
+                return True
+            if self.estado == self.MEIO_ABERTO and not self.teste_em_andamento:
+                self.teste_em_andamento = True
+                return True
+            return False
+    
+    def registrar_sucesso(self):
+        """Fecha o disjuntor e zera as falhas"""
+        with self.trava:
+            self.estado = self.FECHADO
+            self.falhas = 0
+            self.tempo_aberto = self.tempo_aberto_inicial
+            self.teste_em_andamento = False
+    
+    def registrar_falha(self):
+        """
+        Contabiliza uma falha, abrindo o disjuntor quando necessário
+        
+        Returns:
+            bool: True se esta falha abriu o disjuntor
+        """
+        with self.trava:
+            self.falhas += 1
+            if self.estado == self.MEIO_ABERTO:
+                # O teste falhou: reabre por mais tempo
+                self.tempo_aberto = min(self.tempo_aberto * 2, self.tempo_aberto_maximo)
+            elif self.estado == self.ABERTO or self.falhas < self.limite_falhas:
+                return False
+            
+            self.estado = self.ABERTO
+            self.aberto_em = time.monotonic()
+            self.teste_em_andamento = False
+            return True
+    
+    def cancelar_teste(self):
+        """Libera a extração de teste quando ela foi interrompida sem resultado"""
+        with self.trava:
+            self.teste_em_andamento = False
+
+
+# ===== RETENÇÃO DE ARQUIVOS =====
+
+class GerenciadorRetencao:
+    """
+    Controla os arquivos publicados por uma extração com um manifesto local
+
+    O manifesto (JSON em ESTADO_DIR) registra cada arquivo gerado e o momento
+    da geração, de modo que a política de retenção é avaliada sem listar nem
+    consultar a pasta de destino, que pode estar em um drive de rede lento.
+    A pasta só é lida uma vez, para criar o manifesto quando ele não existe.
+
+    Políticas aceitas (chave 'retencao' da extração):
+        manter_ultimos (int): Mantém apenas os N arquivos mais recentes
+        max_idade_horas (float): Exclui arquivos mais antigos que H horas
+        escalonada (dict): Mantém todos das últimas 'horarios' horas, o último
+            de cada um dos últimos 'diarios' dias e o último de cada uma das
+            últimas 'semanais' semanas; quando presente, as demais são ignoradas
+
+    O arquivo mais recente nunca é excluído. Arquivos derivados (a cópia
+    colunar publicada junto com o .sswweb) são excluídos com o principal.
+    """
+
+    def __init__(self, nome, pasta, politica, caminho_manifesto=None):
+        """Inicializa o gerenciador e carrega (ou cria) o manifesto"""
+        self.nome = nome
+        self.pasta = pasta
+        self.politica = politica or {}
+        self.caminho_manifesto = Path(caminho_manifesto or ESTADO_DIR / f"retencao_{identificador_job(nome)}.json")
+        self.trava = RLock()  # A thread da extração e a do publicador usam o mesmo manifesto
+        self.ultimo_sha256 = None
+        self.inalterados = []
+        self.pendentes = set()  # Conteúdos na fila de publicação (apenas em memória)
+        self.arquivos = self.carregar()
+
+    def carregar(self):
+        """Lê o manifesto do disco ou o cria a partir dos arquivos já existentes na pasta"""
+        if self.caminho_manifesto.exists():
+            try:
+                with open(self.caminho_manifesto, encoding='utf-8') as arquivo:
+                    manifesto = json.load(arquivo)
+                self.ultimo_sha256 = manifesto.get('ultimo_sha256')
+                self.inalterados = manifesto.get('inalterados', [])
+                return manifesto['arquivos']
+            except (OSError, ValueError, KeyError) as e:
+                logging.warning(f"Manifesto de retenção inválido ({self.caminho_manifesto}), recriando: {e}")
+
+        principais = {}
+        derivados = {}
+        try:
+            with os.scandir(self.pasta) as entradas:
+                for entrada in entradas:
+                    if not entrada.is_file():
+                        continue
+                    base, extensao = os.path.splitext(entrada.name)
+                    if extensao.lower() == EXTENSAO_RELATORIO:
+                        principais[base] = entrada
+                    elif extensao.lower() in EXTENSOES_COLUNARES.values():
+                        derivados.setdefault(base, []).append(entrada)
+        except OSError as e:
+            logging.warning(f"Não foi possível listar {self.pasta} para criar o manifesto: {e}")
+
+        # Cópias colunares sem o .sswweb de mesmo nome foram publicadas no lugar dele
+        for base, entradas in derivados.items():
+            if base not in principais:
+                principais[base] = entradas.pop(0)
+
+        arquivos = []
+        for base, entrada in principais.items():
+            momento = datetime.fromtimestamp(entrada.stat().st_mtime)
+            item = {'arquivo': entrada.name, 'momento': momento.isoformat()}
+            if derivados.get(base):
+                item['derivados'] = [derivado.name for derivado in derivados[base]]
+            arquivos.append(item)
+
+        arquivos.sort(key=lambda item: item['momento'])
+        self.arquivos = arquivos
+        self.salvar()
+        logging.info(f"Manifesto de retenção criado com {len(arquivos)} arquivos existentes: {self.caminho_manifesto}")
+        return arquivos
+
+    def salvar(self):
+        """Grava o manifesto de forma atômica"""
+        temporario = self.caminho_manifesto.with_suffix('.tmp')
+        manifesto = {
+            'pasta': str(self.pasta),
+            'ultimo_sha256': self.ultimo_sha256,
+            'inalterados': self.inalterados,
+            'arquivos': self.arquivos
+        }
+        with self.trava:
+            with open(temporario, 'w', encoding='utf-8') as arquivo:
+                json.dump(manifesto, arquivo, ensure_ascii=False, indent=1)
+            os.replace(temporario, self.caminho_manifesto)
+
+    def registrar(self, caminho, momento=None, sha256=None, derivados=None):
+        """Registra no manifesto um arquivo recém-publicado (e os derivados publicados com ele)"""
+        momento = momento or datetime.now()
+        nome = os.path.basename(caminho)
+        registro = {'arquivo': nome, 'momento': momento.isoformat(), 'sha256': sha256}
+        if derivados:
+            registro['derivados'] = [os.path.basename(derivado) for derivado in derivados]
+        with self.trava:
+            self.arquivos = [item for item in self.arquivos if item['arquivo'] != nome]
+            self.arquivos.append(registro)
+            self.arquivos.sort(key=lambda item: item['momento'])
+            self.salvar()
+
+    def conteudo_inalterado(self, sha256):
+        """Indica se o conteúdo é igual ao do último arquivo publicado ou ao de um que aguarda publicação"""
+        with self.trava:
+            return sha256 is not None and (sha256 == self.ultimo_sha256 or sha256 in self.pendentes)
+
+    def registrar_conteudo(self, sha256):
+        """Define o conteúdo do arquivo publicado como referência para as próximas comparações"""
+        with self.trava:
+            self.ultimo_sha256 = sha256
+            self.salvar()
+
+    def registrar_pendente(self, sha256):
+        """Marca um conteúdo como aguardando publicação, para não enfileirá-lo de novo"""
+        with self.trava:
+            self.pendentes.add(sha256)
+
+    def liberar_pendente(self, sha256):
+        """Retira a marca de aguardando publicação (publicado ou mantido na área local após falha)"""
+        with self.trava:
+            self.pendentes.discard(sha256)
+
+    def ultimo_momento(self):
+        """Momento do arquivo publicado mais recente, ou None se não houver"""
+        with self.trava:
+            return datetime.fromisoformat(self.arquivos[-1]['momento']) if self.arquivos else None
+
+    def registrar_inalterado(self, momento=None):
+        """Registra que o relatório estava inalterado no momento informado"""
+        momento = momento or datetime.now()
+        with self.trava:
+            self.inalterados = (self.inalterados + [momento.isoformat()])[-MAX_REGISTROS_INALTERADOS:]
+            self.salvar()
+
+    def selecionar_exclusoes(self, agora=None):
+        """
+        Aplica a política de retenção sobre o manifesto
+
+        Returns:
+            list: Itens do manifesto que devem ser excluídos
+        """
+        agora = agora or datetime.now()
+        if not self.arquivos:
+            return []
+
+        # Do mais recente para o mais antigo
+        itens = sorted(self.arquivos, key=lambda item: item['momento'], reverse=True)
+        momentos = [datetime.fromisoformat(item['momento']) for item in itens]
+
+        if 'escalonada' in self.politica:
+            manter = self._manter_escalonada(itens, momentos, agora)
+        else:
+            manter = set(range(len(itens)))
+            if self.politica.get('manter_ultimos') is not None:
+                manter &= set(range(int(self.politica['manter_ultimos'])))
+            if self.politica.get('max_idade_horas') is not None:
+                limite = agora - timedelta(hours=float(self.politica['max_idade_horas']))
+                manter &= {i for i, momento in enumerate(momentos) if momento >= limite}
+
+        # O arquivo mais recente é sempre mantido
+        manter.add(0)
+        return [item for i, item in enumerate(itens) if i not in manter]
+
+    def _manter_escalonada(self, itens, momentos, agora):
+        """Seleciona os índices mantidos pelo desbaste horário → diário → semanal"""
+        escalonada = self.politica['escalonada']
+        limite_horarios = agora - timedelta(hours=escalonada.get('horarios', 24))
+        manter = {i for i, momento in enumerate(momentos) if momento >= limite_horarios}
+
+        camadas = [
+            (escalonada.get('diarios', 7), lambda momento: momento.date()),
+            (escalonada.get('semanais', 4), lambda momento: momento.isocalendar()[:2])
+        ]
+        for quantidade, chave in camadas:
+            vistos = set()
+            for i, momento in enumerate(momentos):
+                grupo = chave(momento)
+                if grupo in vistos:
+                    continue
+                if len(vistos) >= quantidade:
+                    break
+                vistos.add(grupo)
+                manter.add(i)  # O primeiro visto é o mais recente do grupo
+        return manter
+
+    def aplicar(self, agora=None):
+        """
+        Exclui de uma vez os arquivos fora da política e atualiza o manifesto
+
+        Returns:
+            str: Resumo das exclusões para o log
+        """
+        with self.trava:
+            return self._aplicar(agora)
+
+    def _aplicar(self, agora):
+        """Executa as exclusões com o manifesto já travado"""
+        exclusoes = self.selecionar_exclusoes(agora)
+        if not exclusoes:
+            return "Retenção: nenhum arquivo a excluir."
+
+        excluidos = []
+        falhas = []
+        for item in exclusoes:
+            try:
+                for nome in [item['arquivo']] + item.get('derivados', []):
+                    try:
+                        os.remove(os.path.join(self.pasta, nome))
+                    except FileNotFoundError:
+                        pass  # Já removido por outra pessoa: apenas sai do manifesto
+                excluidos.append(item)
+            except OSError as e:
+                falhas.append(item)
+                logging.error(f"Erro ao excluir {item['arquivo']}: {e}")
+
+        removidos = {item['arquivo'] for item in excluidos}
+        self.arquivos = [item for item in self.arquivos if item['arquivo'] not in removidos]
+        self.salvar()
+
+        mensagem = f"Retenção: {len(excluidos)} arquivo(s) excluído(s): {', '.join(sorted(removidos))}"
+        if falhas:
+            mensagem += f" ({len(falhas)} falha(s), nova tentativa no próximo ciclo)"
+        return mensagem
+
+
+# ===== HISTÓRICO DE SNAPSHOTS (DELTAS) =====
+
+def ler_relatorio_ssw(caminho, coluna_chave=None, codificacao=CODIFICACAO_RELATORIO,
+                      delimitador=DELIMITADOR_RELATORIO):
+    """
+    Lê um relatório CSV do SSW ignorando as linhas de título e de rodapé
+
+    O cabeçalho é a primeira linha que contém a coluna chave (ou, sem chave,
+    a primeira linha com mais de duas colunas preenchidas). Linhas com um
+    número de colunas diferente do cabeçalho, com uma única coluna
+    preenchida ou com a chave vazia são tratadas como rodapé/totais e
+    ignoradas.
+
+    Args:
+        caminho (str): Arquivo .sswweb
+        coluna_chave (str | None): Nome da coluna que identifica cada linha
+
+    Returns:
+        tuple: (cabeçalho, gerador de linhas), cada linha como lista de textos
+
+    Raises:
+        ValueError: Se o cabeçalho não for encontrado
+    """
+    arquivo = open(caminho, encoding=codificacao, newline='')
+    leitor = csv.reader(arquivo, delimiter=delimitador)
+
+    cabecalho = None
+    for linha in leitor:
+        celulas = [celula.strip() for celula in linha]
+        if coluna_chave is not None and coluna_chave in celulas:
+            cabecalho = celulas
+            break
+        if coluna_chave is None and sum(1 for celula in celulas if celula) > 2:
+            cabecalho = celulas
+            break
+
+    if cabecalho is None:
+        arquivo.close()
+        raise ValueError(f"Cabeçalho do relatório não encontrado em {os.path.basename(caminho)}")
+
+    indice_chave = cabecalho.index(coluna_chave) if coluna_chave is not None else None
+
+    def linhas():
+        with arquivo:
+            for linha in leitor:
+                if len(linha) != len(cabecalho) or sum(1 for celula in linha if celula.strip()) < 2:
+                    continue
+                if indice_chave is not None and not linha[indice_chave].strip():
+                    continue
+                yield [celula.strip() for celula in linha]
+
+    return cabecalho, linhas()
+
+
+class HistoricoDeltas:
+    """
+    Guarda o histórico de um relatório como snapshots completos e deltas
+
+    A cada novo relatório é gravado um delta com as linhas adicionadas,
+    removidas e alteradas (identificadas pela coluna chave, o CTRC) em
+    relação ao relatório anterior. A cada 'base_a_cada' deltas, ou quando o
+    cabeçalho muda, é gravado um snapshot completo (base). Todos os arquivos
+    são JSON compactados com gzip e listados em indice.json.
+
+    Um relatório com chaves repetidas não pode ser descrito por deltas: ele
+    é gravado como base com todas as linhas, e o relatório seguinte também.
+    """
+
+    def __init__(self, nome, configuracao=None):
+        """Inicializa o histórico de uma extração e carrega o índice"""
+        self.nome = nome
+        self.configuracao = {**HISTORICO_PADRAO, **(configuracao or {})}
+        self.pasta = Path(self.configuracao['pasta'] or HISTORICO_DIR / identificador_job(nome))
+        self.pasta.mkdir(parents=True, exist_ok=True)
+        self.caminho_indice = self.pasta / "indice.json"
+        self.indice = self._carregar_indice()
+        self.ultimo = None  # (cabeçalho, linhas) do último snapshot, reconstruído sob demanda
+
+    def _carregar_indice(self):
+        if self.caminho_indice.exists():
+            with open(self.caminho_indice, encoding='utf-8') as arquivo:
+                return json.load(arquivo)
+        return []
+
+    def _salvar_indice(self):
+        temporario = self.caminho_indice.with_suffix('.tmp')
+        with open(temporario, 'w', encoding='utf-8') as arquivo:
+            json.dump(self.indice, arquivo, ensure_ascii=False, indent=1)
+        os.replace(temporario, self.caminho_indice)
+
+    def _gravar(self, nome_arquivo, conteudo):
+        temporario = self.pasta / (nome_arquivo + '.tmp')
+        with gzip.open(temporario, 'wt', encoding='utf-8') as arquivo:
+            json.dump(conteudo, arquivo, ensure_ascii=False, separators=(',', ':'))
+        os.replace(temporario, self.pasta / nome_arquivo)
+
+    def _ler(self, nome_arquivo):
+        with gzip.open(self.pasta / nome_arquivo, 'rt', encoding='utf-8') as arquivo:
+            return json.load(arquivo)
+
+    def registrar(self, caminho_relatorio, momento=None):
+        """
+        Registra um novo relatório como delta (ou base) no histórico
+
+        Returns:
+            str: Resumo do que foi gravado, para o log
+        """
+        momento = momento or datetime.now()
+        chave = self.configuracao['chave']
+        cabecalho, linhas = ler_relatorio_ssw(caminho_relatorio, chave)
+        indice_chave = cabecalho.index(chave)
+        atual = {}
+        todas = []
+        repetidas = []
+        for linha in linhas:
+            if linha[indice_chave] in atual:
+                repetidas.append(linha[indice_chave])
+            atual[linha[indice_chave]] = linha
+            todas.append(linha)
+        if repetidas:
+            logging.warning(
+                f"[{self.nome}] Relatório com {len(repetidas)} linha(s) de {chave} repetido "
+                f"({', '.join(sorted(set(repetidas))[:5])}); gravado como snapshot completo"
+            )
+
+        if self.ultimo is None and self.indice:
+            self.ultimo = self.reconstruir(momento)
+
+        deltas_desde_base = 0
+        for entrada in reversed(self.indice):
+            if entrada['tipo'] == 'base':
+                break
+            deltas_desde_base += 1
+
+        carimbo = momento.strftime('%Y%m%d_%H%M%S_%f')
+        precisa_base = (
+            self.ultimo is None
+            or self.ultimo[0] != cabecalho
+            or deltas_desde_base >= self.configuracao['base_a_cada']
+            or repetidas
+            or (self.indice and self.indice[-1].get('repetidas'))
+        )
+
+        if precisa_base:
+            nome_arquivo = f"base_{carimbo}.json.gz"
+            self._gravar(nome_arquivo, {'cabecalho': cabecalho, 'linhas': todas})
+            entrada = {'momento': momento.isoformat(), 'tipo': 'base', 'arquivo': nome_arquivo, 'linhas': len(todas)}
+            resumo = f"Histórico: snapshot completo com {len(todas)} linhas"
+            if repetidas:
+                entrada['repetidas'] = len(repetidas)
+                resumo += f" ({len(repetidas)} com {chave} repetido)"
+        else:
+            anteriores = {linha[indice_chave]: linha for linha in self.ultimo[1]}
+            adicionadas = [linha for chave_linha, linha in atual.items() if chave_linha not in anteriores]
+            removidas = [chave_linha for chave_linha in anteriores if chave_linha not in atual]
+            alteradas = [
+                linha for chave_linha, linha in atual.items()
+                if chave_linha in anteriores and anteriores[chave_linha] != linha
+            ]
+            nome_arquivo = f"delta_{carimbo}.json.gz"
+            self._gravar(nome_arquivo, {
+                'cabecalho': cabecalho,
+                'adicionadas': adicionadas,
+                'removidas': removidas,
+                'alteradas': alteradas
+            })
+            entrada = {
+                'momento': momento.isoformat(), 'tipo': 'delta', 'arquivo': nome_arquivo,
+                'adicionadas': len(adicionadas), 'removidas': len(removidas), 'alteradas': len(alteradas)
+            }
+            resumo = (f"Histórico: delta com {len(adicionadas)} adicionadas, "
+                      f"{len(removidas)} removidas e {len(alteradas)} alteradas")
+
+        self.indice.append(entrada)
+        self.podar(momento)
+        self._salvar_indice()
+        self.ultimo = (cabecalho, todas)
+        return resumo
+
+    def reconstruir(self, momento=None):
+        """
+        Reconstrói o relatório completo vigente em um momento
+
+        Args:
+            momento (datetime | None): Momento desejado (padrão: o mais recente)
+
+        Returns:
+            tuple | None: (cabeçalho, lista de linhas), ou None se não houver
+                          histórico até o momento informado
+        """
+        limite = (momento or datetime.max).isoformat()
+        entradas = [entrada for entrada in self.indice if entrada['momento'] <= limite]
+        bases = [i for i, entrada in enumerate(entradas) if entrada['tipo'] == 'base']
+        if not bases:
+            return None
+
+        base = self._ler(entradas[bases[-1]]['arquivo'])
+        cabecalho = base['cabecalho']
+        if bases[-1] == len(entradas) - 1:
+            return cabecalho, base['linhas']  # Sem deltas: mantém inclusive as linhas de chave repetida
+        indice_chave = cabecalho.index(self.configuracao['chave'])
+        linhas = {linha[indice_chave]: linha for linha in base['linhas']}
+
+        for entrada in entradas[bases[-1] + 1:]:
+            delta = self._ler(entrada['arquivo'])
+            for chave_linha in delta['removidas']:
+                linhas.pop(chave_linha, None)
+            for linha in delta['adicionadas'] + delta['alteradas']:
+                linhas[linha[indice_chave]] = linha
+
+        return cabecalho, list(linhas.values())
+
+    def deltas_desde(self, momento):
+        """Retorna (entrada do índice, conteúdo) dos deltas gravados após o momento informado"""
+        inicio = momento.isoformat()
+        return [
+            (entrada, self._ler(entrada['arquivo']))
+            for entrada in self.indice
+            if entrada['tipo'] == 'delta' and entrada['momento'] > inicio
+        ]
+
+    def podar(self, agora=None):
+        """Remove as cadeias base + deltas que terminaram antes do período de histórico"""
+        agora = agora or datetime.now()
+        limite = (agora - timedelta(days=self.configuracao['dias'])).isoformat()
+
+        # Mantém a última base anterior ao limite para reconstruir os momentos dentro do período
+        bases_antigas = [
+            i for i, entrada in enumerate(self.indice)
+            if entrada['tipo'] == 'base' and entrada['momento'] <= limite
+        ]
+        if not bases_antigas or bases_antigas[-1] == 0:
+            return
+
+        corte = bases_antigas[-1]
+        for entrada in self.indice[:corte]:
+            try:
+                os.remove(self.pasta / entrada['arquivo'])
+            except FileNotFoundError:
+                pass
+        self.indice = self.indice[corte:]
+
+
+def reconstruir_snapshot(nome_job, momento=None, configuracao=None):
+    """
+    Reconstrói o relatório de uma extração em um momento a partir do histórico
+
+    Exemplo:
+        cabecalho, linhas = reconstruir_snapshot("CTA 19", datetime(2025, 4, 14, 10, 0))
+
+    Returns:
+        tuple | None: (cabeçalho, lista de linhas) ou None se não houver histórico
+    """
+    return HistoricoDeltas(nome_job, configuracao).reconstruir(momento)
+
+
+# ===== CONVERSÃO COLUNAR =====
+
+_PADRAO_INTEIRO = re.compile(r'-?(0|[1-9]\d{0,17})')
+_PADRAO_DECIMAL = re.compile(r'-?(0|[1-9]\d{0,2}(\.\d{3})+|[1-9]\d*)(,\d+)?')
+_PADRAO_DATA = re.compile(r'\d{2}/\d{2}/(\d{2}|\d{4})')
+_PADRAO_DATA_HORA = re.compile(r'\d{2}/\d{2}/(\d{2}|\d{4}) \d{2}:\d{2}(:\d{2})?')
+
+
+def _converter_inteiro(valor):
+    """Converte um inteiro do SSW; números com zeros à esquerda são códigos e ficam como texto"""
+    if not _PADRAO_INTEIRO.fullmatch(valor):
+        raise ValueError(valor)
+    return int(valor)
+
+
+def _converter_decimal(valor):
+    """Converte um número no formato brasileiro ("1.234,56") para float"""
+    if not _PADRAO_DECIMAL.fullmatch(valor):
+        raise ValueError(valor)
+    return float(valor.replace('.', '').replace(',', '.'))
+
+
+def _converter_data(valor):
+    """Converte uma data dd/mm/aa ou dd/mm/aaaa (anos com dois dígitos são de 2000 em diante)"""
+    if not _PADRAO_DATA.fullmatch(valor):
+        raise ValueError(valor)
+    ano = int(valor[6:])
+    return datetime(ano + 2000 if ano < 100 else ano, int(valor[3:5]), int(valor[0:2])).date()
+
+
+def _converter_data_hora(valor):
+    """Converte uma data e hora dd/mm/aa hh:mm[:ss]"""
+    if not _PADRAO_DATA_HORA.fullmatch(valor):
+        raise ValueError(valor)
+    data, hora = valor.split(' ')
+    partes = [int(parte) for parte in hora.split(':')]
+    return datetime.combine(_converter_data(data), dt_time(*partes))
+
+
+# Tipos reconhecidos nas colunas do relatório, em ordem de preferência na inferência
+CONVERSORES_COLUNARES = {
+    'inteiro': _converter_inteiro,
+    'decimal': _converter_decimal,
+    'data': _converter_data,
+    'data_hora': _converter_data_hora
+}
+
+
+class ConversorColunar:
+    """
+    Converte um relatório do SSW em um arquivo colunar tipado (Parquet ou Arrow IPC)
+
+    O relatório é lido duas vezes com ler_relatorio_ssw, sem carregá-lo
+    inteiro na memória: a primeira leitura descobre o tipo de cada coluna
+    (inteiro, decimal no formato "1.234,56", data dd/mm/aa, data e hora ou
+    texto) e a segunda converte e grava blocos de 'linhas_por_bloco' linhas.
+    Células vazias viram nulos. O arquivo é gravado em um temporário e
+    renomeado no final, então nunca fica pela metade.
+    """
+
+    TIPOS_ARROW = {
+        'inteiro': lambda pa: pa.int64(),
+        'decimal': lambda pa: pa.float64(),
+        'data': lambda pa: pa.date32(),
+        'data_hora': lambda pa: pa.timestamp('s'),
+        'texto': lambda pa: pa.string()
+    }
+
+    def __init__(self, configuracao=None):
+        """Inicializa o conversor com a configuração 'colunar' da extração"""
+        self.configuracao = {**COLUNAR_PADRAO, **(configuracao or {})}
+
+    def caminho_destino(self, caminho):
+        """Arquivo colunar gravado ao lado do relatório, com o mesmo nome"""
+        return os.path.splitext(caminho)[0] + EXTENSOES_COLUNARES[self.configuracao['formato']]
+
+    def inferir_tipos(self, caminho):
+        """
+        Descobre o tipo de cada coluna percorrendo o relatório
+
+        Returns:
+            tuple: (cabeçalho, lista com o tipo de cada coluna)
+        """
+        cabecalho, linhas = ler_relatorio_ssw(caminho)
+        candidatos = [list(CONVERSORES_COLUNARES) for _ in cabecalho]
+
+        for linha in linhas:
+            for indice, valor in enumerate(linha):
+                if not valor or not candidatos[indice]:
+                    continue
+                restantes = []
+                for tipo in candidatos[indice]:
+                    try:
+                        CONVERSORES_COLUNARES[tipo](valor)
+                        restantes.append(tipo)
+                    except ValueError:
+                        pass
+                candidatos[indice] = restantes
+
+        return cabecalho, [tipos[0] if tipos else 'texto' for tipos in candidatos]
+
+    def converter(self, caminho, destino=None):
+        """
+        Grava a cópia colunar do relatório
+
+        Args:
+            caminho (str): Arquivo .sswweb
+            destino (str | None): Arquivo gerado (padrão: caminho_destino)
+
+        Returns:
+            tuple: (arquivo gerado, quantidade de linhas, dict coluna -> tipo)
+
+        Raises:
+            ValueError: Se o cabeçalho do relatório não for encontrado
+        """
+        pa = carregar_pyarrow()
+        if pa is None:
+            raise ImportError("pyarrow não instalado")
+
+        destino = destino or self.caminho_destino(caminho)
+        cabecalho, tipos = self.inferir_tipos(caminho)
+
+        nomes = []
+        for indice, nome in enumerate(cabecalho):
+            nome = nome or f"coluna_{indice + 1}"
+            nomes.append(nome if nome not in nomes else f"{nome}_{indice + 1}")
+        esquema = pa.schema(
+            [pa.field(nome, self.TIPOS_ARROW[tipo](pa)) for nome, tipo in zip(nomes, tipos)],
+            metadata={'origem': os.path.basename(caminho)}
+        )
+
+        temporario = destino + '.partial'
+        try:
+            with self._abrir_escritor(pa, temporario, esquema) as escritor:
+                total = self._gravar_blocos(pa, escritor, esquema, caminho, tipos)
+            os.replace(temporario, destino)
+        except BaseException:
+            try:
+                os.remove(temporario)
+            except OSError:
+                pass
+            raise
+
+        return destino, total, dict(zip(nomes, tipos))
+
+    def _abrir_escritor(self, pa, caminho, esquema):
+        """Abre o escritor do formato configurado"""
+        compressao = self.configuracao['compressao']
+        if self.configuracao['formato'] == 'parquet':
+            return pa.parquet.ParquetWriter(caminho, esquema, compression=compressao or 'none')
+        return pa.ipc.new_file(caminho, esquema, options=pa.ipc.IpcWriteOptions(compression=compressao))
+
+    def _gravar_blocos(self, pa, escritor, esquema, caminho, tipos):
+        """
+        Converte as linhas do relatório e grava um lote a cada 'linhas_por_bloco' linhas
+
+        Returns:
+            int: Quantidade de linhas gravadas
+        """
+        conversores = [CONVERSORES_COLUNARES.get(tipo) for tipo in tipos]
+        colunas = [[] for _ in tipos]
+
+        def gravar_bloco():
+            escritor.write_batch(pa.record_batch(
+                [pa.array(valores, type=campo.type) for valores, campo in zip(colunas, esquema)],
+                schema=esquema
+            ))
+            for valores in colunas:
+                valores.clear()
+
+        total = 0
+        _, linhas = ler_relatorio_ssw(caminho)
+        for linha in linhas:
+            for valores, converter, valor in zip(colunas, conversores, linha):
+                valores.append(None if not valor else converter(valor) if converter else valor)
+            total += 1
+            if total % self.configuracao['linhas_por_bloco'] == 0:
+                gravar_bloco()
+        if colunas[0]:
+            gravar_bloco()
+        return total
+
+
+# ===== PUBLICAÇÃO EM SEGUNDO PLANO =====
+
+class PublicadorSegundoPlano:
+    """
+    Publica na pasta de destino os arquivos baixados na área local (staging)
+
+    Uma thread dedicada copia cada arquivo para um temporário na pasta de
+    destino e o renomeia atomicamente para o nome final, de modo que quem lê
+    a pasta nunca vê um arquivo pela metade. Falhas são repetidas com espera
+    crescente; depois de publicar, a retenção é aplicada na mesma thread,
+    para que o ciclo de extração nunca espere pelo drive de rede. Os
+    derivados (cópia colunar) são publicados antes do arquivo principal.
+    """
+
+    def __init__(self, ao_log=None, tentativas=TENTATIVAS_PUBLICACAO, espera=ESPERA_PUBLICACAO):
+        """Inicializa o publicador sem iniciar a thread"""
+        self.ao_log = ao_log or registrar_log
+        self.tentativas = tentativas
+        self.espera = espera
+        self.fila = queue.Queue()
+        self.em_andamento = set()  # Arquivos na fila ou sendo publicados
+        self.cancelar_event = Event()
+        self.thread = None
+
+    def iniciar(self):
+        """Inicia a thread de publicação"""
+        self.cancelar_event.clear()
+        self.thread = Thread(target=self._executar, name='publicador', daemon=True)
+        self.thread.start()
+
+    def enviar(self, origem, job, retencao, sha256=None, derivados=()):
+        """Coloca um arquivo baixado (e seus derivados) na fila de publicação"""
+        self.em_andamento.add(origem)
+        if sha256 is not None:
+            retencao.registrar_pendente(sha256)
+        self.fila.put((origem, job, retencao, sha256, list(derivados), getattr(contexto_log, 'ciclo', None)))
+
+    def recuperar_pendentes(self, jobs, retencoes, limpar_parciais=True):
+        """
+        Coloca na fila os arquivos que ficaram na área local (publicação que falhou ou execução interrompida)
+
+        Só o arquivo pendente mais recente de cada extração é publicado; os
+        anteriores a ele ou ao último arquivo publicado estão desatualizados
+        e são excluídos.
+
+        Args:
+            limpar_parciais (bool): Exclui downloads e conversões incompletos; use
+                                    apenas quando nenhuma extração estiver em andamento
+        """
+        extensoes_colunares = tuple(EXTENSOES_COLUNARES.values())
+        for job in jobs:
+            if not job['staging']:
+                continue
+            pasta = pasta_download_job(job)
+            with os.scandir(pasta) as entradas:
+                entradas = sorted(entradas, key=lambda e: e.stat().st_mtime)
+            relatorios = {os.path.splitext(e.name)[0] for e in entradas if e.name.lower().endswith(EXTENSAO_RELATORIO)}
+
+            # Arquivos principais: o .sswweb ou, sem ele, a cópia colunar publicada no lugar dele
+            principais = []
+            for entrada in entradas:
+                nome = entrada.name.lower()
+                if nome.endswith(EXTENSOES_PARCIAIS):
+                    if limpar_parciais:
+                        try:
+                            os.remove(entrada.path)  # Download ou conversão interrompidos
+                        except OSError as e:
+                            self.ao_log(f"[{job['nome']}] Não foi possível excluir o arquivo incompleto {entrada.name}: {e}", 'warning')
+                elif nome.endswith(EXTENSAO_RELATORIO) or (
+                        nome.endswith(extensoes_colunares) and os.path.splitext(entrada.name)[0] not in relatorios):
+                    principais.append(entrada)
+            if not principais:
+                continue
+
+            retencao = retencoes[job['nome']]
+            ultimo_publicado = retencao.ultimo_momento()
+            for entrada in principais:
+                if entrada.path in self.em_andamento:
+                    continue
+                base = os.path.splitext(entrada.name)[0]
+                recente = entrada is principais[-1] and (
+                    ultimo_publicado is None or datetime.fromtimestamp(entrada.stat().st_mtime) >= ultimo_publicado)
+                derivados = [
+                    os.path.join(pasta, base + extensao) for extensao in extensoes_colunares
+                    if os.path.join(pasta, base + extensao) != entrada.path
+                    and os.path.exists(os.path.join(pasta, base + extensao))
+                ]
+
+                if not recente:
+                    # Arquivo bloqueado (antivírus, Excel) ou já excluído: tenta de novo na próxima recuperação
+                    falhas = []
+                    for caminho in [entrada.path] + derivados:
+                        try:
+                            os.remove(caminho)
+                        except OSError as e:
+                            falhas.append(f"{os.path.basename(caminho)} ({e})")
+                    if falhas:
+                        self.ao_log(f"[{job['nome']}] Não foi possível excluir o arquivo pendente desatualizado: {', '.join(falhas)}", 'warning')
+                    else:
+                        self.ao_log(f"[{job['nome']}] Arquivo pendente desatualizado excluído: {entrada.name}", 'info')
+                    continue
+
+                self.ao_log(f"[{job['nome']}] Publicando arquivo pendente: {entrada.name}", 'warning')
+                sha256 = None
+                if entrada.name.lower().endswith(EXTENSAO_RELATORIO):
+                    sha256 = calcular_hash(entrada.path, job['linhas_ignoradas_hash'])
+                self.enviar(entrada.path, job, retencao, sha256, derivados)
+
+    def parar(self, timeout=60):
+        """Publica o que estiver na fila e encerra a thread"""
+        if self.thread is None:
+            return
+        self.fila.put(None)
+        self.thread.join(timeout)
+        if self.thread.is_alive():
+            # Interrompe as esperas entre tentativas; os arquivos ficam na área local
+            self.cancelar_event.set()
+            self.thread.join(5)
+        self.thread = None
+
+    def _executar(self):
+        """Consome a fila de publicação até receber o sinal de encerramento"""
+        while True:
+            item = self.fila.get()
+            if item is None:
+                break
+            origem, job, retencao, sha256, derivados, ciclo = item
+            with contexto_execucao(ciclo=ciclo, extracao=job['nome'], fase='publicacao'):
+                try:
+                    self.publicar(origem, job, retencao, sha256, derivados)
+                except Exception as e:
+                    self.ao_log(f"[{job['nome']}] Erro inesperado ao publicar {os.path.basename(origem)}: {e}", 'error')
+                finally:
+                    # Se a publicação falhou, o arquivo fica na área local para a próxima recuperação
+                    self.em_andamento.discard(origem)
+                    retencao.liberar_pendente(sha256)
+
+    def publicar(self, origem, job, retencao, sha256=None, derivados=()):
+        """
+        Copia o arquivo (e os derivados) para a pasta de destino e aplica a retenção
+
+        Um derivado que não pôde ser copiado fica na área local e o arquivo
+        principal é publicado sem ele.
+
+        Returns:
+            bool: True se o arquivo foi publicado
+        """
+        inicio = time.perf_counter()
+        publicados = [derivado for derivado in derivados if self.copiar(derivado, job)]
+        if not self.copiar(origem, job):
+            return False
+
+        # O momento registrado é o do download, para comparar com os arquivos que ficaram na área local
+        momento = datetime.fromtimestamp(os.path.getmtime(origem))
+        for caminho in [origem] + publicados:
+            os.remove(caminho)
+        medidor_fases.registrar('publicacao', time.perf_counter() - inicio)
+        nomes = [os.path.basename(caminho) for caminho in [origem] + publicados]
+        self.ao_log(f"[{job['nome']}] Arquivo publicado: {', '.join(nomes)}", 'success')
+
+        # Registra o arquivo no manifesto e aplica a política de retenção
+        with medir_fase('retencao'):
+            retencao.registrar(os.path.join(job['pasta_destino'], nomes[0]), momento, sha256, nomes[1:])
+            if sha256 is not None:
+                retencao.registrar_conteudo(sha256)
+            mensagem = retencao.aplicar()
+        self.ao_log(f"[{job['nome']}] {mensagem}", 'info')
+        return True
+
+    def copiar(self, origem, job):
+        """
+        Copia um arquivo para a pasta de destino via temporário, repetindo as falhas
+
+        Returns:
+            bool: True se o arquivo foi copiado
+        """
+        nome = os.path.basename(origem)
+        destino = os.path.join(job['pasta_destino'], nome)
+        temporario = destino + '.partial'
+
+        for tentativa in range(1, self.tentativas + 1):
+            try:
+                shutil.copyfile(origem, temporario)
+                os.replace(temporario, destino)
+                break
+            except OSError as e:
+                try:
+                    os.remove(temporario)
+                except OSError:
+                    pass
+
+                if tentativa == self.tentativas:
+                    self.ao_log(
+                        f"[{job['nome']}] Falha ao publicar {nome}: {e}. O arquivo foi mantido em {origem}",
+                        'error'
+                    )
+                    return False
+
+                espera = self.espera * 2 ** (tentativa - 1)
+                self.ao_log(
+                    f"[{job['nome']}] Falha ao publicar {nome} (tentativa {tentativa} de {self.tentativas}): {e}. "
+                    f"Nova tentativa em {espera} segundos...",
+                    'warning'
+                )
+                if self.cancelar_event.wait(espera):
+                    return False
+        return True
+
+
+# ===== SESSÃO PERSISTENTE DO NAVEGADOR =====
+
+class ErroExtracao(Exception):
+    """Falha de um motor de extração ao obter o relatório do SSW"""
+
+
+class SessaoExpirada(ErroExtracao):
+    """Indica que o SSW voltou para a tela de login durante a extração"""
+
+
+class EsperaNavegador:
+    """
+    Esperas por condição do fluxo no navegador, no lugar de pausas fixas
+    
+    Cada espera retorna assim que a condição é atendida e, se o tempo
+    esgotar, lança TimeoutException com o nome da etapa que não concluiu.
+    
+    Exemplo:
+        espera = EsperaNavegador(driver)
+        espera.clicavel(By.ID, "5", "login")
+    """
+    
+    def __init__(self, driver, timeout=TEMPO_ESPERA_NAVEGADOR, intervalo=INTERVALO_ESPERA_NAVEGADOR):
+        """Inicializa as esperas do driver"""
+        self.driver = driver
+        self.timeout = timeout
+        self.intervalo = intervalo
+    
+    def ate(self, condicao, etapa, descricao, timeout=None):
+        """
+        Aguarda uma condição do WebDriver
+        
+        Args:
+            condicao (callable): Condição (expected_conditions ou função que recebe o driver)
+            etapa (str): Nome da etapa do fluxo, usado na mensagem de erro
+            descricao (str): O que era esperado, usado na mensagem de erro
+            timeout (float | None): Tempo máximo; padrão do objeto se None
+            
+        Returns:
+            Valor retornado pela condição
+            
+        Raises:
+            TimeoutException: Se a condição não for atendida no tempo
+        """
+        timeout = timeout or self.timeout
+        try:
+            return WebDriverWait(self.driver, timeout, poll_frequency=self.intervalo).until(condicao)
+        except TimeoutException as e:
+            raise TimeoutException(f"Etapa '{etapa}' não concluída em {timeout} s: {descricao}") from e
+    
+    def documento_pronto(self, etapa):
+        """Aguarda o HTML da página atual ser interpretado (readyState 'interactive' ou 'complete')"""
+        return self.ate(
+            lambda driver: driver.execute_script("return document.readyState") in ('interactive', 'complete'),
+            etapa, "página não carregou"
+        )
+    
+    def elemento(self, por, valor, etapa):
+        """Aguarda um elemento estar presente e o retorna"""
+        return self.ate(EC.presence_of_element_located((por, valor)), etapa, f"elemento {valor} não apareceu")
+    
+    def clicavel(self, por, valor, etapa):
+        """Aguarda um elemento estar visível e habilitado e o retorna"""
+        return self.ate(EC.element_to_be_clickable((por, valor)), etapa, f"elemento {valor} não ficou clicável")
+    
+    def nova_janela(self, janelas_antes, etapa):
+        """
+        Aguarda uma nova janela ou aba ser aberta
+        
+        Args:
+            janelas_antes (list): driver.window_handles antes da ação que abre a janela
+            
+        Returns:
+            str: Identificador da nova janela
+        """
+        self.ate(EC.new_window_is_opened(janelas_antes), etapa, "nova janela não foi aberta")
+        novas = [handle for handle in self.driver.window_handles if handle not in janelas_antes]
+        return novas[-1]
+
+
+class ProvisionadorDriver:
+    """
+    Resolve o msedgedriver uma única vez e o reaproveita nas próximas aberturas do Edge
+    
+    Sem um Service explícito, cada webdriver.Edge() executa o Selenium Manager
+    (um subprocesso que pode consultar a internet) para localizar o driver.
+    O caminho resolvido é gravado em ARQUIVO_DRIVER_EDGE junto com a
+    assinatura (data e tamanho) do executável do Edge; enquanto o Edge não
+    for atualizado, o driver gravado é usado diretamente. Se o executável do
+    Edge não for localizado, o driver não é gravado e é resolvido a cada abertura.
+    """
+    
+    def __init__(self, caminho=ARQUIVO_DRIVER_EDGE):
+        """Inicializa o provisionador (o cache é lido a cada abertura)"""
+        self.caminho = Path(caminho)
+        self.trava = Lock()
+    
+    @staticmethod
+    def assinatura(caminho_navegador):
+        """Data de modificação e tamanho do executável do Edge, ou None se não existir"""
+        try:
+            estado = os.stat(caminho_navegador)
+        except (OSError, TypeError):
+            return None
+        return [estado.st_mtime_ns, estado.st_size]
+    
+    def ler_cache(self):
+        """Lê o driver gravado (None se não houver)"""
+        try:
+            with open(self.caminho, encoding='utf-8') as arquivo:
+                return json.load(arquivo)
+        except (OSError, ValueError):
+            return None
+    
+    def gravar_cache(self, cache):
+        """Grava o driver resolvido de forma atômica"""
+        temporario = self.caminho.with_suffix('.tmp')
+        with open(temporario, 'w', encoding='utf-8') as arquivo:
+            json.dump(cache, arquivo, ensure_ascii=False, indent=1)
+        os.replace(temporario, self.caminho)
+    
+    def invalidar(self):
+        """Descarta o driver gravado, forçando uma nova resolução"""
+        try:
+            self.caminho.unlink()
+        except OSError:
+            pass
+    
+    def servico(self, opcoes):
+        """
+        Cria o Service do Edge com o caminho do driver
+        
+        Returns:
+            tuple: (Service, True se o driver veio do cache)
+        """
+        if DriverFinder is None:
+            return Service(), False
+        
+        with self.trava:
+            cache = self.ler_cache()
+            # Sem a assinatura do Edge não há como saber se ele foi atualizado: resolve de novo
+            if (cache and os.path.isfile(cache['driver']) and cache['assinatura'] is not None
+                    and self.assinatura(cache['navegador']) == cache['assinatura']):
+                logging.info(
+                    f"msedgedriver em cache (Edge {cache.get('versao_navegador') or '?'}): "
+                    f"Selenium Manager evitado, cerca de {cache['segundos_resolucao']:.1f} s economizados."
+                )
+                return Service(executable_path=cache['driver']), True
+            
+            inicio = time.perf_counter()
+            localizador = DriverFinder(Service(), opcoes)
+            driver = localizador.get_driver_path()
+            navegador = localizador.get_browser_path()
+            segundos = time.perf_counter() - inicio
+            medidor_fases.registrar('resolucao_driver', segundos)
+            logging.info(f"msedgedriver resolvido pelo Selenium Manager em {segundos:.1f} s: {driver}")
+            
+            assinatura = self.assinatura(navegador)
+            if assinatura is None:
+                logging.warning(
+                    f"Executável do Edge não localizado ({navegador or 'caminho não informado'}); "
+                    f"o msedgedriver não será gravado em cache."
+                )
+                self.invalidar()
+                return Service(executable_path=driver), False
+            
+            try:
+                self.gravar_cache({
+                    'driver': driver,
+                    'navegador': navegador,
+                    'assinatura': assinatura,
+                    'segundos_resolucao': round(segundos, 3),
+                    'versao_navegador': None,
+                    'versao_driver': None
+                })
+            except OSError as e:
+                logging.warning(f"Falha ao gravar o cache do msedgedriver: {e}")
+            return Service(executable_path=driver), False
+    
+    def registrar_versao(self, driver):
+        """
+        Grava as versões do Edge e do driver abertos; se as versões principais
+        não coincidirem, descarta o cache para resolver de novo na próxima abertura
+        """
+        capacidades = driver.capabilities or {}
+        versao_navegador = capacidades.get('browserVersion')
+        versao_driver = (capacidades.get('msedge') or {}).get('msedgedriverVersion', '').split(' ')[0] or None
+        
+        with self.trava:
+            cache = self.ler_cache()
+            if cache is None:
+                return
+            if versao_navegador and versao_driver and versao_navegador.split('.')[0] != versao_driver.split('.')[0]:
+                logging.warning(
+                    f"msedgedriver {versao_driver} não corresponde ao Edge {versao_navegador}; "
+                    f"o driver será resolvido novamente."
+                )
+                self.invalidar()
+                return
+            if (cache.get('versao_navegador'), cache.get('versao_driver')) != (versao_navegador, versao_driver):
+                cache.update(versao_navegador=versao_navegador, versao_driver=versao_driver)
+                try:
+                    self.gravar_cache(cache)
+                except OSError as e:
+                    logging.warning(f"Falha ao gravar o cache do msedgedriver: {e}")
+
+
+# Driver compartilhado por todas as sessões do processo
+provisionador_driver = ProvisionadorDriver()
+
+
+class SessaoNavegador:
+    """
+    Mantém uma instância headless do Edge aberta e autenticada entre os ciclos
+
+    O navegador só é reiniciado após uma falha (processo encerrado ou sem
+    resposta) ou quando ultrapassa o limite de memória. O login só é refeito
+    quando a sessão do SSW expira.
+    """
+
+    def __init__(self, download_folder=None, limite_memoria_mb=LIMITE_MEMORIA_NAVEGADOR_MB,
+                 url_login=SSW_URL_LOGIN, perfil=PERFIL_NAVEGADOR):
+        """Inicializa a sessão sem abrir o navegador"""
+        if perfil not in PERFIS_NAVEGADOR:
+            raise ValueError(f"Perfil do navegador desconhecido: {perfil}")
+        carregar_selenium()
+        self.perfil = perfil
+        self.download_folder = download_folder
+        self.url_login = url_login
+        self.limite_memoria_mb = limite_memoria_mb
+        self.driver = None
+        self.pid_driver = None
+        self.motivo_encerramento = None  # Definido quando o vigia encerra o navegador à força
+        self.janela_principal = None
+        self.autenticado = False
+        self.pasta_download_atual = None
+
+    def criar_opcoes(self):
+        """Cria as opções do Edge usadas pela sessão"""
+        perfil = PERFIS_NAVEGADOR[self.perfil]
+        edge_options = Options()
+        edge_options.add_argument("--headless")
+        edge_options.add_argument("--disable-gpu")
+        edge_options.add_argument("--window-size=1920,1080")
+        edge_options.add_argument(MARCADOR_NAVEGADOR)
+        for argumento in perfil['argumentos']:
+            edge_options.add_argument(argumento)
+        edge_options.page_load_strategy = perfil['estrategia_carregamento']
+        prefs = {
+            "download.prompt_for_download": False,
+            "download.directory_upgrade": True,
+            "safebrowsing.enabled": True
+        }
+        if self.download_folder:
+            prefs["download.default_directory"] = self.download_folder
+        edge_options.add_experimental_option('prefs', prefs)
+        return edge_options
+
+    def iniciar(self):
+        """Abre uma nova instância do navegador"""
+        logging.info(f"Iniciando o navegador Edge (perfil {self.perfil})...")
+        opcoes = self.criar_opcoes()
+        servico, em_cache = provisionador_driver.servico(opcoes)
+        try:
+            self.driver = webdriver.Edge(service=servico, options=opcoes)
+        except WebDriverException as e:
+            if not em_cache:
+                raise
+            # Driver gravado removido ou incompatível: resolve novamente
+            logging.warning(f"Falha ao abrir o Edge com o msedgedriver em cache ({e}); resolvendo novamente...")
+            provisionador_driver.invalidar()
+            servico, _ = provisionador_driver.servico(opcoes)
+            self.driver = webdriver.Edge(service=servico, options=opcoes)
+        self.motivo_encerramento = None
+        self.pid_driver = self.driver.service.process.pid
+        vigia_navegador.registrar_processo(self.pid_driver)
+        provisionador_driver.registrar_versao(self.driver)
+        self.bloquear_recursos()
+        self.janela_principal = self.driver.current_window_handle
+        self.autenticado = False
+        self.pasta_download_atual = self.download_folder
+
+    def bloquear_recursos(self):
+        """Impede o download de imagens, fontes e CSS do perfil (via Chrome DevTools Protocol)"""
+        padroes = PERFIS_NAVEGADOR[self.perfil]['bloquear']
+        if not padroes:
+            return
+        try:
+            self.driver.execute_cdp_cmd('Network.enable', {})
+            self.driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': padroes})
+        except WebDriverException as e:
+            # Sem o bloqueio o fluxo continua funcionando, apenas mais lento
+            logging.warning(f"Não foi possível bloquear os recursos do perfil {self.perfil}: {e}")
+
+    def fechar(self):
+        """Encerra o navegador, ignorando falhas de um processo já finalizado"""
+        processos = vigia_navegador.arvore(self.pid_driver) if self.pid_driver else []
+        if self.driver is not None:
+            try:
+                self.driver.quit()
+            except Exception as e:
+                logging.warning(f"Falha ao encerrar o navegador: {e}")
+        if self.pid_driver:
+            # Processos que sobreviveram ao quit() (ex.: navegador travado)
+            vigia_navegador.encerrar_processos(processos)
+            vigia_navegador.remover_processo(self.pid_driver)
+        self.driver = None
+        self.pid_driver = None
+        self.janela_principal = None
+        self.autenticado = False
+        self.pasta_download_atual = None
+
+    def encerrar_forcado(self, motivo):
+        """
+        Encerra o msedgedriver e o Edge à força (chamado pelo vigia, de outra thread)
+        
+        O comando do WebDriver em andamento falha e o navegador é aberto de
+        novo na próxima utilização.
+        """
+        self.motivo_encerramento = motivo
+        if not self.pid_driver:
+            return
+        if carregar_psutil() is None:
+            # Sem psutil encerra somente o msedgedriver, ainda ativo durante a extração
+            try:
+                os.kill(self.pid_driver, signal.SIGTERM)
+            except OSError:
+                pass
+            return
+        vigia_navegador.encerrar_processos(vigia_navegador.arvore(self.pid_driver))
+
+    def definir_pasta_download(self, pasta):
+        """Altera a pasta de download do navegador já aberto (via Chrome DevTools Protocol)"""
+        if pasta == self.pasta_download_atual:
+            return
+        self.driver.execute_cdp_cmd('Browser.setDownloadBehavior', {
+            'behavior': 'allow',
+            'downloadPath': pasta
+        })
+        self.pasta_download_atual = pasta
+
+    def reiniciar(self, motivo):
+        """Fecha e abre novamente o navegador"""
+        logging.warning(f"Reiniciando o navegador: {motivo}")
+        self.fechar()
+        self.iniciar()
+
+    def esta_ativo(self):
+        """Verifica se o navegador ainda responde aos comandos do WebDriver"""
+        if self.driver is None:
+            return False
+        try:
+            self.driver.window_handles
+            return True
+        except WebDriverException:
+            return False
+
+    def uso_memoria_mb(self):
+        """
+        Calcula a memória residente do navegador e de seus processos filhos
+
+        Returns:
+            float | None: Memória em MB, ou None se não for possível medir
+        """
+        if psutil is None or self.driver is None:
+            return None
+        try:
+            processo = psutil.Process(self.driver.service.process.pid)
+            processos = [processo] + processo.children(recursive=True)
+            total = 0
+            for p in processos:
+                try:
+                    total += p.memory_info().rss
+                except psutil.Error:
+                    continue
+            return total / (1024 * 1024)
+        except (psutil.Error, AttributeError):
+            return None
+
+    def limpar_janelas(self):
+        """Fecha as janelas extras e volta para a janela principal"""
+        for handle in self.driver.window_handles:
+            if handle != self.janela_principal:
+                self.driver.switch_to.window(handle)
+                self.driver.close()
+        self.driver.switch_to.window(self.janela_principal)
+
+    def esta_autenticado(self):
+        """Verifica se a janela principal ainda exibe o menu do SSW"""
+        if not self.autenticado:
+            return False
+        try:
+            self.limpar_janelas()
+            # O menu tem os campos f2/f3, enquanto a tela de login tem também a senha (f4)
+            menu = self.driver.find_elements(By.NAME, "f3")
+            login = self.driver.find_elements(By.NAME, "f4")
+            return bool(menu) and not login
+        except WebDriverException:
+            return False
+
+    def fazer_login(self):
+        """Abre a página do SSW (se ainda não estiver aberta, ver preaquecer) e realiza o login"""
+        self.autenticado = False
+        espera = EsperaNavegador(self.driver)
+        with medir_fase('pagina_login'):
+            if not self.pagina_login_aberta():
+                self.driver.get(self.url_login)
+
+            # Aguarda a página de login
+            espera.documento_pronto('pagina_login')
+            espera.elemento(By.NAME, "f1", 'pagina_login')
+
+        with medir_fase('login'):
+            # Preenche o formulário de login
+            for campo, valor in SSW_CREDENCIAIS.items():
+                self.driver.find_element(By.NAME, campo).send_keys(valor)
+            self.driver.find_element(By.NAME, "f4").send_keys("+")
+
+            # Clica no botão de login assim que ele estiver habilitado
+            login_button = espera.clicavel(By.ID, "5", 'login')
+            self.driver.execute_script("arguments[0].click();", login_button)
+
+            # Aguarda a tela do menu: a tela de login também tem f2/f3, mas só ela tem a senha (f4)
+            espera.documento_pronto('login')
+            espera.ate(
+                lambda driver: driver.find_elements(By.NAME, "f3") and not driver.find_elements(By.NAME, "f4"),
+                'login', "tela do menu não apareceu"
+            )
+        self.janela_principal = self.driver.current_window_handle
+        self.autenticado = True
+        logging.info("Login no SSW realizado.")
+
+    def pagina_login_aberta(self):
+        """Indica se a janela atual já mostra o formulário de login vazio (aberto pelo pré-aquecimento)"""
+        try:
+            if self.driver.current_url.split('?')[0] != self.url_login:
+                return False
+            campos = self.driver.find_elements(By.NAME, "f1")
+            return bool(campos) and not campos[0].get_attribute('value')
+        except WebDriverException:
+            return False
+
+    def invalidar_login(self):
+        """Força um novo login na próxima utilização"""
+        self.autenticado = False
+
+    def obter_driver(self):
+        """
+        Retorna um driver pronto para uso, com o navegador ativo e autenticado
+
+        Reinicia o navegador apenas se ele tiver falhado ou ultrapassado o
+        limite de memória, e refaz o login apenas se a sessão tiver expirado.
+        """
+        if not self.esta_ativo():
+            with medir_fase('inicio_navegador'):
+                if self.driver is None:
+                    self.iniciar()
+                else:
+                    self.reiniciar("o navegador não está respondendo")
+        else:
+            memoria = self.uso_memoria_mb()
+            if memoria is not None and memoria > self.limite_memoria_mb:
+                with medir_fase('inicio_navegador'):
+                    self.reiniciar(f"uso de memória de {memoria:.0f} MB acima do limite")
+
+        if not self.esta_autenticado():
+            self.fazer_login()
+
+        return self.driver
+
+    def preaquecer(self, login=True):
+        """
+        Deixa o navegador pronto antes da próxima extração
+
+        Args:
+            login (bool): Faz o login; com False apenas abre a página de login
+        """
+        if login:
+            self.obter_driver()
+            return
+
+        if not self.esta_ativo():
+            with medir_fase('inicio_navegador'):
+                if self.driver is None:
+                    self.iniciar()
+                else:
+                    self.reiniciar("o navegador não está respondendo")
+        if not self.esta_autenticado():
+            with medir_fase('pagina_login'):
+                self.driver.get(self.url_login)
+                EsperaNavegador(self.driver).documento_pronto('pagina_login')
+
+
+# ===== VIGIA DO NAVEGADOR =====
+
+class VigiaNavegador:
+    """
+    Limita o tempo e a memória do Edge em cada extração e encerra processos órfãos
+    
+    Durante motor.extrair() uma thread verifica a cada 'intervalo' segundos o
+    tempo decorrido e a memória da árvore de processos (msedgedriver, Edge e
+    filhos); acima dos limites a árvore inteira é encerrada, o que faz a
+    extração falhar e ser tentada de novo com um navegador novo.
+    
+    Os msedgedriver abertos ficam registrados em ARQUIVO_PROCESSOS_NAVEGADOR
+    com o PID do processo dono; limpar_orfaos() encerra os processos de
+    execuções anteriores que não foram fechados e os drivers/navegadores desta
+    aplicação (identificados por MARCADOR_NAVEGADOR, do mesmo usuário) cujo
+    processo pai não existe mais. Sem psutil, apenas o tempo
+    máximo é aplicado (encerrar_forcado() encerra somente o msedgedriver).
+    """
+    
+    def __init__(self, tempo_maximo=VIGIA_NAVEGADOR['tempo_maximo'],
+                 memoria_maxima_mb=VIGIA_NAVEGADOR['memoria_maxima_mb'],
+                 intervalo=VIGIA_NAVEGADOR['intervalo'], caminho=ARQUIVO_PROCESSOS_NAVEGADOR):
+        """Inicializa o vigia; a thread só existe enquanto houver extrações vigiadas"""
+        self.tempo_maximo = tempo_maximo
+        self.memoria_maxima_mb = memoria_maxima_mb
+        self.intervalo = intervalo
+        self.caminho = Path(caminho)
+        self.vigiadas = {}   # id(sessão) -> (sessão, início)
+        self.thread = None
+        self.trava = Lock()
+    
+    @contextmanager
+    def vigiar(self, sessao):
+        """Vigia a sessão do navegador durante o bloco"""
+        with self.trava:
+            self.vigiadas[id(sessao)] = (sessao, time.monotonic())
+            if self.thread is None:
+                self.thread = Thread(target=self._executar, name='vigia_navegador', daemon=True)
+                self.thread.start()
+        try:
+            yield
+        finally:
+            with self.trava:
+                self.vigiadas.pop(id(sessao), None)
+    
+    def _executar(self):
+        """Verifica as sessões vigiadas até não restar nenhuma"""
+        while True:
+            with self.trava:
+                if not self.vigiadas:
+                    self.thread = None
+                    return
+                vigiadas = list(self.vigiadas.values())
+            
+            for sessao, inicio in vigiadas:
+                self.verificar(sessao, inicio)
+            time.sleep(self.intervalo)
+    
+    def verificar(self, sessao, inicio):
+        """Encerra o navegador da sessão se ela ultrapassou o tempo ou a memória"""
+        decorrido = time.monotonic() - inicio
+        if decorrido > self.tempo_maximo:
+            motivo = f"extração em andamento há {decorrido:.0f} s (limite de {self.tempo_maximo} s)"
+        else:
+            memoria = sessao.uso_memoria_mb()
+            if memoria is None or memoria <= self.memoria_maxima_mb:
+                return
+            motivo = f"uso de memória de {memoria:.0f} MB (limite de {self.memoria_maxima_mb} MB)"
+        
+        logging.error(f"Vigia do navegador: {motivo}. Encerrando o Edge e seus processos...")
+        with self.trava:
+            self.vigiadas.pop(id(sessao), None)
+        sessao.encerrar_forcado(motivo)
+    
+    @staticmethod
+    def arvore(pid):
+        """
+        Processo e todos os seus descendentes
+        
+        Returns:
+            list: Processos psutil (vazia se o processo não existir ou sem psutil)
+        """
+        if carregar_psutil() is None:
+            return []
+        try:
+            raiz = psutil.Process(pid)
+            return [raiz] + raiz.children(recursive=True)
+        except psutil.Error:
+            return []
+    
+    @staticmethod
+    def encerrar_processos(processos):
+        """
+        Encerra os processos (retornados por arvore) que ainda estiverem ativos
+        
+        Returns:
+            int: Processos encerrados
+        """
+        if not processos:
+            return 0
+        
+        ativos = []
+        for processo in processos:
+            try:
+                processo.kill()
+                ativos.append(processo)
+            except psutil.Error:
+                continue
+        psutil.wait_procs(ativos, timeout=5)
+        return len(ativos)
+    
+    def _ler_registro(self):
+        try:
+            with open(self.caminho, encoding='utf-8') as arquivo:
+                return json.load(arquivo)
+        except (OSError, ValueError):
+            return []
+    
+    def _gravar_registro(self, itens):
+        temporario = self.caminho.with_suffix('.tmp')
+        with open(temporario, 'w', encoding='utf-8') as arquivo:
+            json.dump(itens, arquivo, indent=1)
+        os.replace(temporario, self.caminho)
+    
+    def registrar_processo(self, pid):
+        """Registra o msedgedriver aberto por este processo"""
+        item = {'pid': pid, 'dono': os.getpid(), 'criado': None}
+        if carregar_psutil() is not None:
+            try:
+                item['criado'] = psutil.Process(pid).create_time()
+            except psutil.Error:
+                pass
+        with self.trava:
+            try:
+                self._gravar_registro(self._ler_registro() + [item])
+            except OSError as e:
+                logging.warning(f"Falha ao registrar o processo do navegador: {e}")
+    
+    def remover_processo(self, pid):
+        """Remove do registro o msedgedriver encerrado normalmente"""
+        with self.trava:
+            itens = self._ler_registro()
+            restantes = [item for item in itens if not (item['pid'] == pid and item['dono'] == os.getpid())]
+            if len(restantes) != len(itens):
+                try:
+                    self._gravar_registro(restantes)
+                except OSError as e:
+                    logging.warning(f"Falha ao atualizar o registro dos processos do navegador: {e}")
+    
+    @staticmethod
+    def _marcado(processo):
+        """Indica se o processo é um Edge aberto por esta aplicação (ou um driver que abriu um)"""
+        try:
+            for candidato in [processo] + processo.children(recursive=True):
+                if MARCADOR_NAVEGADOR in candidato.cmdline():
+                    return True
+        except psutil.Error:
+            pass
+        return False
+    
+    @staticmethod
+    def _orfao(processo):
+        """Indica se o processo pai não existe mais (ou o PID foi reutilizado)"""
+        try:
+            if os.name != 'nt' and processo.ppid() == 1:
+                return True
+            pai = processo.parent()
+            return pai is None or pai.create_time() > processo.create_time()
+        except psutil.Error:
+            return False
+    
+    def limpar_orfaos(self):
+        """
+        Encerra os processos do navegador deixados por execuções anteriores ou sem processo pai
+        
+        Returns:
+            int: Processos encerrados
+        """
+        if carregar_psutil() is None:
+            return 0
+        
+        encerrados = 0
+        with self.trava:
+            mantidos = []
+            for item in self._ler_registro():
+                if item['dono'] == os.getpid() or psutil.pid_exists(item['dono']):
+                    mantidos.append(item)
+                    continue
+                # Dono encerrado sem fechar o navegador: confirma que o PID não foi reutilizado
+                try:
+                    processo = psutil.Process(item['pid'])
+                    if item['criado'] is not None and abs(processo.create_time() - item['criado']) < 1:
+                        encerrados += self.encerrar_processos(self.arvore(item['pid']))
+                except psutil.Error:
+                    pass
+            try:
+                self._gravar_registro(mantidos)
+            except OSError as e:
+                logging.warning(f"Falha ao atualizar o registro dos processos do navegador: {e}")
+        
+        # Drivers e navegadores desta aplicação (do mesmo usuário) cujo processo pai não existe mais;
+        # os de outras automações ou de outros usuários da máquina não são tocados
+        try:
+            usuario = psutil.Process().username()
+        except psutil.Error:
+            return encerrados
+        for processo in psutil.process_iter(['name', 'username']):
+            nome = (processo.info['name'] or '').lower()
+            if nome not in NOMES_PROCESSOS_DRIVER and nome not in NOMES_PROCESSOS_NAVEGADOR:
+                continue
+            if processo.info['username'] != usuario or not self._marcado(processo):
+                continue
+            if self._orfao(processo):
+                encerrados += self.encerrar_processos(self.arvore(processo.pid))
+        
+        return encerrados
+
+
+# Vigia compartilhado por todas as sessões do processo
+vigia_navegador = VigiaNavegador()
+
+
+# ===== MOTORES DE EXTRAÇÃO =====
+
+class MotorNavegador:
+    """Motor de extração que conduz o Edge pelo fluxo de telas do SSW"""
+
+    nome = 'navegador'
+    experimental = False
+
+    def __init__(self, url_base=SSW_URL_BASE, perfil=PERFIL_NAVEGADOR):
+        """Inicializa o motor com uma sessão persistente do navegador no perfil informado (PERFIS_NAVEGADOR)"""
+        self.sessao = SessaoNavegador(url_login=url_base.rstrip('/') + SSW_CAMINHO_LOGIN, perfil=perfil)
+
+    def extrair(self, job, pasta_download):
+        """
+        Gera e baixa o relatório de uma extração pelo navegador
+
+        Args:
+            job (dict): Extração carregada por carregar_jobs
+            pasta_download (str): Pasta onde o arquivo deve ser gravado
+
+        Returns:
+            dict | None: 'arquivo' (caminho), 'sha256' e 'tamanho' do arquivo
+                         baixado, ou None se a extração foi parada
+
+        Raises:
+            ErroExtracao: Se o navegador falhar em alguma etapa do fluxo
+        """
+        with vigia_navegador.vigiar(self.sessao):
+            try:
+                try:
+                    return self._extrair(job, pasta_download)
+                except SessaoExpirada as e:
+                    # Refaz o login uma única vez antes de considerar a tentativa perdida
+                    logging.warning(f"{e}. Realizando novo login...")
+                    self.sessao.invalidar_login()
+                    return self._extrair(job, pasta_download)
+            except (TimeoutException, WebDriverException) as e:
+                # O estado da página é desconhecido: valida a sessão antes de reutilizá-la
+                self.sessao.invalidar_login()
+                if self.sessao.motivo_encerramento:
+                    raise ErroExtracao(f"Navegador encerrado pelo vigia: {self.sessao.motivo_encerramento}") from e
+                raise ErroExtracao(str(e)) from e
+            except Exception as e:
+                # Com o msedgedriver encerrado, a conexão falha com exceções do urllib3
+                if not self.sessao.motivo_encerramento:
+                    raise
+                self.sessao.invalidar_login()
+                raise ErroExtracao(f"Navegador encerrado pelo vigia: {self.sessao.motivo_encerramento}") from e
+
+    def _extrair(self, job, pasta_download):
+        """Executa o fluxo de menu, formulário e download no navegador"""
+        # Obtém o navegador aberto e autenticado (reaproveitado entre ciclos)
+        driver = self.sessao.obter_driver()
+        self.sessao.definir_pasta_download(pasta_download)
+
+        espera = EsperaNavegador(driver)
+        with medir_fase('menu'):
+            # Preenche o menu com a unidade e a opção do relatório ("+" abre a opção)
+            janelas_antes = driver.window_handles
+            driver.find_element(By.NAME, "f2").clear()
+            driver.find_element(By.NAME, "f2").send_keys(job['unidade'])
+            driver.find_element(By.NAME, "f3").clear()
+            driver.find_element(By.NAME, "f3").send_keys(f"{job['opcao']}+")
+
+            # Troca para a nova aba aberta assim que ela existir
+            driver.switch_to.window(espera.nova_janela(janelas_antes, 'menu'))
+            espera.documento_pronto('menu')
+
+            # Aguarda o formulário do relatório ou, se a sessão expirou, a tela de login
+            campos = preencher_campos(job['campos'])
+            primeiro_campo = next(iter(campos), None)
+            if primeiro_campo:
+                espera.ate(
+                    lambda driver: driver.find_elements(By.NAME, primeiro_campo) or driver.find_elements(By.NAME, "f1"),
+                    'menu', f"formulário da opção {job['opcao']} não apareceu"
+                )
+                if not driver.find_elements(By.NAME, primeiro_campo):
+                    raise SessaoExpirada("Sessão do SSW expirada")
+
+        with medir_fase('formulario'):
+            # Preenche os campos do formulário do relatório
+            for nome, valor in campos.items():
+                campo = driver.find_element(By.NAME, nome)
+                campo.clear()
+                campo.send_keys(valor)
+
+        # Registra os arquivos existentes antes do download
+        arquivos_antes = listar_arquivos(pasta_download)
+
+        # Clica no botão para enviar
+        envia_button = espera.clicavel(By.ID, "btn_envia", 'formulario')
+        driver.execute_script("arguments[0].click();", envia_button)
+        inicio = time.perf_counter()
+        detectado = []
+
+        def ao_detectar():
+            # Até o arquivo aparecer, o SSW está gerando o relatório; depois, é o download
+            detectado.append(time.perf_counter())
+            medidor_fases.registrar('geracao_relatorio', detectado[0] - inicio)
+
+        # Aguarda até o download ser concluído
+        arquivo_baixado = aguardar_download(
+            pasta_download, arquivos_antes, ao_detectar=ao_detectar,
+            cancelado=lambda: self.sessao.motivo_encerramento is not None
+        )
+        if arquivo_baixado is not None:
+            medidor_fases.registrar('download', time.perf_counter() - (detectado[0] if detectado else inicio))
+        if arquivo_baixado is None:
+            if stop_event.is_set():
+                return None
+            raise TimeoutException(f"Download não concluído em {TEMPO_MAXIMO_DOWNLOAD} segundos")
+
+        # O navegador grava o arquivo sozinho: o hash é calculado após o download (disco local)
+        return {
+            'arquivo': arquivo_baixado,
+            'sha256': calcular_hash(arquivo_baixado, job['linhas_ignoradas_hash']),
+            'tamanho': os.path.getsize(arquivo_baixado)
+        }
+
+    def preaquecer(self, login=True):
+        """
+        Abre o navegador (e faz o login) antes da próxima extração
+
+        Raises:
+            ErroExtracao: Se o navegador não puder ser preparado
+        """
+        try:
+            self.sessao.preaquecer(login)
+        except (TimeoutException, WebDriverException) as e:
+            self.sessao.invalidar_login()
+            raise ErroExtracao(str(e)) from e
+
+    def fechar(self):
+        """Encerra o navegador"""
+        self.sessao.fechar()
+
+
+class _LeitorFormulario(HTMLParser):
+    """Coleta a ação e os campos do primeiro formulário de uma página HTML"""
+
+    def __init__(self):
+        super().__init__()
+        self.acao = None
+        self.campos = {}
+        self._dentro_formulario = False
+        self._formularios = 0
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == 'form':
+            self._formularios += 1
+            self._dentro_formulario = self._formularios == 1
+            if self._dentro_formulario:
+                self.acao = attrs.get('action')
+        elif tag == 'input' and (self._dentro_formulario or self._formularios == 0):
+            nome = attrs.get('name')
+            if nome and attrs.get('type', 'text').lower() not in ('button', 'submit', 'image', 'reset'):
+                self.campos[nome] = attrs.get('value') or ''
+
+    def handle_endtag(self, tag):
+        if tag == 'form':
+            self._dentro_formulario = False
+
+
+def ler_formulario(html):
+    """
+    Extrai a ação e os campos (incluindo os ocultos) de uma página do SSW
+
+    Returns:
+        tuple: (ação do formulário ou None, dicionário nome -> valor)
+    """
+    leitor = _LeitorFormulario()
+    leitor.feed(html)
+    return leitor.acao, leitor.campos
+
+
+def nome_arquivo_resposta(resposta, padrao):
+    """Obtém o nome do arquivo do cabeçalho Content-Disposition da resposta"""
+    disposicao = resposta.headers.get('Content-Disposition', '')
+    encontrado = re.search(r'filename\*?=(?:UTF-8\'\')?"?([^";]+)"?', disposicao, re.IGNORECASE)
+    if encontrado:
+        return os.path.basename(encontrado.group(1).strip())
+    return padrao
+
+
+class MotorHTTP:
+    """
+    Motor de extração sem navegador
+
+    Reproduz o login e o envio do formulário do relatório com uma
+    requests.Session (conexões reaproveitadas) e grava o corpo da resposta
+    diretamente no disco, em blocos.
+
+    Experimental: o fluxo (GET do formulário ssw0036 e POST dos campos) foi
+    modelado a partir do ssw_simulado.py e ainda não foi validado no SSW
+    de produção.
+    """
+
+    nome = 'http'
+    experimental = True
+
+    def __init__(self, url_base=SSW_URL_BASE, timeout=TIMEOUT_HTTP):
+        """Inicializa o motor sem abrir conexões"""
+        self.url_base = url_base.rstrip('/')
+        self.timeout = timeout
+        self.sessao = None
+        self.autenticado = False
+
+    def obter_sessao(self):
+        """Cria (uma única vez) a sessão HTTP com pool de conexões"""
+        if self.sessao is None:
+            carregar_requests()
+            self.sessao = requests.Session()
+            adaptador = HTTPAdapter(pool_connections=2, pool_maxsize=4)
+            self.sessao.mount('https://', adaptador)
+            self.sessao.mount('http://', adaptador)
+            self.sessao.headers['User-Agent'] = f"{APP_NAME}/{APP_VERSION}"
+        return self.sessao
+
+    def fazer_login(self):
+        """Envia o formulário de login do SSW"""
+        self.autenticado = False
+        sessao = self.obter_sessao()
+        url_login = self.url_base + SSW_CAMINHO_LOGIN
+
+        resposta = sessao.get(url_login, timeout=self.timeout)
+        resposta.raise_for_status()
+        acao, campos = ler_formulario(resposta.text)
+        campos.update(SSW_CREDENCIAIS)
+
+        resposta = sessao.post(urljoin(url_login, acao or ''), data=campos, timeout=self.timeout)
+        resposta.raise_for_status()
+        _, campos_menu = ler_formulario(resposta.text)
+
+        # O menu tem os campos f2/f3, enquanto a tela de login tem também a senha (f4)
+        if 'f3' not in campos_menu or 'f4' in campos_menu:
+            raise ErroExtracao("Login no SSW não foi aceito")
+
+        self.autenticado = True
+        logging.info("Login no SSW realizado.")
+
+    def extrair(self, job, pasta_download):
+        """
+        Gera e baixa o relatório de uma extração via HTTP
+
+        Args:
+            job (dict): Extração carregada por carregar_jobs
+            pasta_download (str): Pasta onde o arquivo deve ser gravado
+
+        Returns:
+            dict | None: 'arquivo' (caminho), 'sha256' e 'tamanho' do arquivo
+                         baixado, ou None se a extração foi parada
+
+        Raises:
+            ErroExtracao: Se alguma requisição falhar ou o SSW responder algo inesperado
+        """
+        self.obter_sessao()
+        try:
+            try:
+                return self._extrair(job, pasta_download)
+            except SessaoExpirada as e:
+                logging.warning(f"{e}. Realizando novo login...")
+                self.autenticado = False
+                return self._extrair(job, pasta_download)
+        except requests.RequestException as e:
+            self.autenticado = False
+            raise ErroExtracao(str(e)) from e
+
+    def _extrair(self, job, pasta_download):
+        """Executa o login (se necessário), o formulário e o download"""
+        if not self.autenticado:
+            with medir_fase('login'):
+                self.fazer_login()
+
+        sessao = self.obter_sessao()
+        url_relatorio = self.url_base + job['caminho_relatorio']
+
+        # Abre o formulário do relatório (equivalente à janela aberta pela opção do menu)
+        with medir_fase('formulario'):
+            resposta = sessao.get(url_relatorio, params={'f2': job['unidade'], 'f3': job['opcao']},
+                                  timeout=self.timeout)
+            resposta.raise_for_status()
+            acao, campos = ler_formulario(resposta.text)
+
+        valores = preencher_campos(job['campos'])
+        if not set(valores) <= set(campos):
+            if 'f1' in campos:
+                raise SessaoExpirada("Sessão do SSW expirada")
+            raise ErroExtracao("Formulário do relatório não encontrado na resposta do SSW")
+
+        # Preenche os campos do formulário do relatório
+        campos.update(valores)
+
+        inicio = time.perf_counter()
+        with sessao.post(urljoin(url_relatorio, acao or ''), data=campos,
+                         stream=True, timeout=self.timeout) as resposta:
+            resposta.raise_for_status()
+            
+            # Até os cabeçalhos chegarem, o SSW está gerando o relatório; depois, é o download
+            medidor_fases.registrar('geracao_relatorio', time.perf_counter() - inicio)
+            inicio = time.perf_counter()
+
+            if 'text/html' in resposta.headers.get('Content-Type', ''):
+                _, campos_resposta = ler_formulario(resposta.text)
+                if 'f1' in campos_resposta:
+                    raise SessaoExpirada("Sessão do SSW expirada")
+                raise ErroExtracao("O SSW não retornou o arquivo do relatório")
+
+            programa = os.path.basename(job['caminho_relatorio'])
+            padrao = f"CSV{programa}a{SSW_CREDENCIAIS['f1']}{datetime.now().strftime('%H%M%S')}{EXTENSAO_RELATORIO}"
+            destino = os.path.join(pasta_download, nome_arquivo_resposta(resposta, padrao))
+            parcial = destino + '.partial'
+
+            # Grava em um arquivo parcial para nunca expor um download incompleto,
+            # calculando o hash do conteúdo à medida que ele chega
+            sha256 = HashConteudo(job['linhas_ignoradas_hash'])
+            tamanho = 0
+            try:
+                with open(parcial, 'wb') as arquivo:
+                    for bloco in resposta.iter_content(chunk_size=TAMANHO_BLOCO_DOWNLOAD):
+                        if stop_event.is_set():
+                            break
+                        arquivo.write(bloco)
+                        sha256.update(bloco)
+                        tamanho += len(bloco)
+
+                if stop_event.is_set():
+                    os.remove(parcial)
+                    return None
+
+                os.replace(parcial, destino)
+            except BaseException:
+                # Conexão interrompida no meio do download: o parcial não pode ficar na pasta
+                # (sem staging, ela é a própria pasta de destino)
+                try:
+                    os.remove(parcial)
+                except OSError:
+                    pass
+                raise
+            medidor_fases.registrar('download', time.perf_counter() - inicio)
+
+        return {'arquivo': destino, 'sha256': sha256.hexdigest(), 'tamanho': tamanho}
+
+    def preaquecer(self, login=True):
+        """
+        Abre a conexão com o SSW (e faz o login) antes da próxima extração
+
+        Raises:
+            ErroExtracao: Se o SSW não responder
+        """
+        sessao = self.obter_sessao()
+        try:
+            if login:
+                if not self.autenticado:
+                    self.fazer_login()
+            else:
+                sessao.get(self.url_base + SSW_CAMINHO_LOGIN, timeout=self.timeout).raise_for_status()
+        except requests.RequestException as e:
+            raise ErroExtracao(str(e)) from e
+
+    def fechar(self):
+        """Encerra a sessão HTTP e suas conexões"""
+        if self.sessao is not None:
+            self.sessao.close()
+        self.sessao = None
+        self.autenticado = False
+
+
+# Motores disponíveis para a interface e para o agendador
+MOTORES = {
+    MotorNavegador.nome: MotorNavegador,
+    MotorHTTP.nome: MotorHTTP
 }
 
 
-# ===== FUNÇÕES AUXILIARES =====
+def rotulo_motor(nome):
+    """Nome do motor exibido na interface e na ajuda, com a indicação de experimental"""
+    return f"{nome} (experimental)" if MOTORES[nome].experimental else nome
 
-def get_status_style(status_key):
-    """Obtém o estilo ttk para uma label de status com base em sua chave"""
-    return STATUS_STYLES.get(status_key, 'StatusIdle.TLabel')
 
+def criar_motor(nome, **kwargs):
+    """Cria o motor de extração pelo nome ('navegador' ou 'http')"""
+    try:
+        return MOTORES[nome](**kwargs)
+    except KeyError:
+        raise ValueError(f"Motor de extração desconhecido: {nome}") from None
 
-def get_status_message(status_key, **kwargs):
-    """Obtém a mensagem de status com formatação opcional"""
-    message = STATUS_MESSAGES.get(status_key, "Status desconhecido")
-    if kwargs:
-        return message.format(**kwargs)
-    return message
+
+class PoolMotores:
+    """
+    Mantém no máximo `limite` motores de extração abertos
+
+    Cada extração em andamento pega um motor emprestado e o devolve ao
+    terminar, para que navegadores e sessões HTTP sejam reaproveitados entre
+    extrações sem ultrapassar o limite de execuções simultâneas.
+    """
+
+    def __init__(self, nome_motor, limite=MAX_JOBS_SIMULTANEOS, **kwargs):
+        """Inicializa o pool sem criar motores"""
+        self.nome_motor = nome_motor
+        self.limite = limite
+        self.kwargs = kwargs
+        self.disponiveis = queue.LifoQueue()
+        self.criados = []
+        self.trava = Lock()
+
+    def emprestar(self, bloquear=True):
+        """
+        Retorna um motor livre, criando um novo se o limite permitir
+
+        Args:
+            bloquear (bool): Espera a devolução de um motor quando todos estão em uso;
+                             com False retorna None
+        """
+        try:
+            return self.disponiveis.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self.trava:
+            if len(self.criados) < self.limite:
+                motor = criar_motor(self.nome_motor, **self.kwargs)
+                self.criados.append(motor)
+                return motor
+
+        if not bloquear:
+            return None
+        return self.disponiveis.get()
+
+    def devolver(self, motor):
+        """Devolve o motor para ser reaproveitado"""
+        self.disponiveis.put(motor)
+
+    def preaquecer(self, quantidade, login=True):
+        """
+        Prepara até 'quantidade' motores (criando-os se preciso) para a próxima extração
+
+        Usa apenas os motores livres: os que estão em uso (extração ou
+        publicação demorada) não são esperados, para não travar o agendador.
+
+        Returns:
+            int: Motores preparados com sucesso
+        """
+        motores = []
+        while len(motores) < min(quantidade, self.limite):
+            motor = self.emprestar(bloquear=False)
+            if motor is None:
+                break
+            motores.append(motor)
+        preparados = 0
+        try:
+            for motor in motores:
+                try:
+                    motor.preaquecer(login)
+                    preparados += 1
+                except ErroExtracao as e:
+                    # A extração refaz o que faltar no horário agendado
+                    logging.warning(f"Falha ao pré-aquecer o motor {self.nome_motor}: {e}")
+        finally:
+            for motor in motores:
+                self.devolver(motor)
+        return preparados
+
+    def fechar_todos(self):
+        """Libera os navegadores e conexões de todos os motores, mantendo-os reutilizáveis"""
+        with self.trava:
+            for motor in self.criados:
+                motor.fechar()
 
 
-def verificar_conexao(url="https://www.google.com/"):
+# ===== EXECUÇÃO DAS EXTRAÇÕES =====
+
+class ErroConfiguracao(Exception):
+    """Configuração das extrações inválida; 'titulo' resume o problema para a interface"""
+    
+    def __init__(self, titulo, mensagem):
+        super().__init__(mensagem)
+        self.titulo = titulo
+
+
+def registrar_log(mensagem, nivel='info'):
+    """Registra uma mensagem no log do sistema com o nível da interface ('success' vira info)"""
+    if nivel == 'info':
+        logging.info(mensagem)
+    elif nivel == 'success':
+        logging.info(f"SUCESSO: {mensagem}")
+    elif nivel == 'warning':
+        logging.warning(mensagem)
+    elif nivel == 'error':
+        logging.error(mensagem)
+
+
+def ler_estado_execucao():
+    """Lê o resultado da última execução de cada extração (vazio se não houver)"""
     try:
-        response = requests.get(url, timeout=5)
-        return response.status_code == 200
-    except requests.ConnectionError:
-        logging.error(f"Falha de conexão com {url}")
-        return False
-    except Exception as e:
-        logging.error(f"Erro ao verificar conexão: {e}")
-        return False
+        with open(ARQUIVO_ESTADO_EXECUCAO, encoding='utf-8') as arquivo:
+            return json.load(arquivo)
+    except (OSError, ValueError):
+        return {}
 
 
-def excluir_penultimo_arquivo(diretorio, arquivos_ignorados=None):
-    if arquivos_ignorados is None:
-        arquivos_ignorados = ["desktop.ini"]
+class ExecutorExtracoes:
+    """
+    Laço de extração independente da interface gráfica
+    
+    Carrega as extrações, agenda os ciclos e executa cada extração no pool de
+    motores. O progresso é informado pelos callbacks: a interface Tkinter os
+    liga aos seus widgets e o modo sem interface (--once/--daemon) ao logging.
+    """
+    
+    def __init__(self, ao_log=None, ao_status=None, ao_sucesso=None, arquivo_jobs=ARQUIVO_JOBS,
+                 url_base=SSW_URL_BASE, perfil_navegador=PERFIL_NAVEGADOR):
+        """
+        Args:
+            ao_log (callable): Recebe (mensagem, nivel)
+            ao_status (callable): Recebe a chave de STATUS_MESSAGES
+            ao_sucesso (callable): Chamado ao fim de um ciclo com ao menos uma extração bem-sucedida
+            arquivo_jobs (Path): Arquivo de configuração das extrações
+            url_base (str): Endereço do SSW
+            perfil_navegador (str): Perfil do Edge no motor 'navegador' (PERFIS_NAVEGADOR)
+        """
+        self.ao_log = ao_log or registrar_log
+        self.ao_status = ao_status or (lambda status_key, **kwargs: None)
+        self.ao_sucesso = ao_sucesso or (lambda: None)
+        self.arquivo_jobs = arquivo_jobs
+        self.url_base = url_base
+        self.perfil_navegador = perfil_navegador
+    
+    def executar(self, nome_motor=MOTOR_PADRAO, uma_vez=False):
+        """
+        Executa as extrações configuradas com o motor informado ('navegador' ou 'http')
         
-    try:
-        # Verificar se o diretório existe
-        if not os.path.exists(diretorio):
-            return f"O diretório {diretorio} não existe."
+        Args:
+            nome_motor (str): Motor de extração
+            uma_vez (bool): Executa cada extração no horário comercial uma única vez e retorna
             
-        # Obter todos os arquivos, excluindo os ignorados
-        arquivos = [
-            f for f in os.listdir(diretorio) 
-            if os.path.isfile(os.path.join(diretorio, f)) and f not in arquivos_ignorados
-        ]
+        Returns:
+            bool: True se todas as extrações executadas baixaram o relatório
+            
+        Raises:
+            ErroConfiguracao: Se a configuração das extrações for inválida
+        """
+        try:
+            jobs = carregar_jobs(self.arquivo_jobs)
+        except (OSError, ValueError) as e:
+            raise ErroConfiguracao("Erro de Configuração", f"Configuração das extrações inválida: {e}") from e
+        
+        # Navegadores deixados abertos por execuções anteriores
+        if nome_motor == 'navegador' and carregar_psutil() is None:
+            self.ao_log("psutil não instalado: sem limite de memória nem limpeza de processos órfãos do navegador.",
+                        nivel='warning')
+        self.limpar_processos_orfaos()
+        
+        # Tempos por fase e último sucesso das execuções anteriores
+        medidor_fases.carregar()
+        metricas.carregar_estado(ler_estado_execucao())
+        
+        # Verificar se os diretórios de download existem
+        jobs_validos = []
+        for job in jobs:
+            if os.path.exists(job['pasta_destino']):
+                jobs_validos.append(job)
+            else:
+                self.ao_log(
+                    f"[{job['nome']}] Diretório de download não encontrado: {job['pasta_destino']}",
+                    nivel='error'
+                )
+        
+        if not jobs_validos:
+            raise ErroConfiguracao("Erro de Diretório", "Nenhum diretório de download das extrações foi encontrado.")
+        
+        # Manifestos de retenção de cada extração
+        retencoes = {
+            job['nome']: GerenciadorRetencao(job['nome'], job['pasta_destino'], job['retencao'])
+            for job in jobs_validos
+        }
+        
+        # Histórico de snapshots por deltas das extrações que o configuram
+        historicos = {
+            job['nome']: HistoricoDeltas(job['nome'], job['historico']) if job['historico'] else None
+            for job in jobs_validos
+        }
+        
+        # Publicação em segundo plano dos arquivos baixados na área local
+        publicador = PublicadorSegundoPlano(ao_log=self.ao_log)
+        publicador.iniciar()
+        publicador.recuperar_pendentes(jobs_validos, retencoes)
+        
+        # Motores reaproveitados entre os ciclos, limitados às extrações simultâneas
+        opcoes_motor = {'url_base': self.url_base}
+        if nome_motor == 'navegador':
+            opcoes_motor['perfil'] = self.perfil_navegador
+        pool = PoolMotores(nome_motor, limite=min(MAX_JOBS_SIMULTANEOS, len(jobs_validos)), **opcoes_motor)
+        self.ao_log(
+            f"Motor de extração: {nome_motor} ({len(jobs_validos)} extrações, até {pool.limite} simultâneas)",
+            nivel='info'
+        )
+        if MOTORES[nome_motor].experimental:
+            self.ao_log(
+                f"O motor {nome_motor} é experimental: o fluxo ainda não foi validado no SSW de produção.",
+                nivel='warning'
+            )
+        
+        metricas.definir_pool(pool)
+        try:
+            return self.executar_ciclos(pool, jobs_validos, retencoes, publicador, historicos, uma_vez)
+        finally:
+            metricas.definir_pool(None)
+            pool.fechar_todos()
+            publicador.parar()
+            self.salvar_tempos()  # Inclui as publicações concluídas no encerramento
+    
+    def limpar_processos_orfaos(self):
+        """Encerra os processos do navegador órfãos (ver VigiaNavegador.limpar_orfaos)"""
+        try:
+            encerrados = vigia_navegador.limpar_orfaos()
+        except Exception as e:
+            self.ao_log(f"Falha ao procurar processos órfãos do navegador: {e}", nivel='warning')
+            return
+        if encerrados:
+            self.ao_log(f"{encerrados} processos órfãos do navegador encerrados.", nivel='warning')
+    
+    def salvar_tempos(self):
+        """Grava os tempos por fase, sem interromper as extrações em caso de falha"""
+        try:
+            medidor_fases.salvar()
+        except OSError as e:
+            self.ao_log(f"Falha ao gravar os tempos por fase: {e}", nivel='warning')
+    
+    def executar_ciclos(self, pool, jobs, retencoes, publicador, historicos, uma_vez=False):
+        """
+        Executa os ciclos de extração, disparando em paralelo as extrações pendentes
+        
+        Returns:
+            bool: Com uma_vez, True se todas as extrações executadas tiveram sucesso
+        """
+        # Horário da próxima execução de cada extração, alinhado ao relógio
+        agendador = Agendador(jobs)
+        
+        # Falhas seguidas do SSW suspendem as extrações; falhas de conexão esperam cada vez mais
+        disjuntor = Disjuntor(**DISJUNTOR_SSW)
+        politica_conexao = PoliticaRetentativa(**RETENTATIVA_CONEXAO)
+        falhas_conexao = 0
+        sonda = SondaSSW(self.url_base)
+        preaquecido_para = None
+        motores_liberados = False
+        
+        with ThreadPoolExecutor(max_workers=pool.limite, thread_name_prefix='extracao') as executor:
+            while not stop_event.is_set():
+                # Verifica se está pausado
+                if pause_event.is_set():
+                    aguardar_retomada()
+                    continue
+                
+                agora = datetime.now()
+                pendentes = agendador.pendentes(jobs, agora)
+                
+                if not pendentes:
+                    # Fim do dia (ou longa espera): libera os navegadores/conexões até a próxima extração
+                    proxima = min(agendador.proximas.values())
+                    if not motores_liberados and (
+                            proxima.date() != agora.date()
+                            or agendador.segundos_ate_proxima(agora) > ESPERA_LIBERAR_MOTORES):
+                        pool.fechar_todos()
+                        motores_liberados = True
+                        self.ao_log(
+                            f"Navegadores liberados até a próxima extração ({proxima.strftime('%d/%m %H:%M')}).",
+                            nivel='info'
+                        )
+                    
+                    # Pouco antes da próxima extração, prepara os motores que ela vai usar
+                    antecedencia = PREAQUECIMENTO['antecedencia']
+                    if antecedencia and preaquecido_para != proxima:
+                        espera = agendador.segundos_ate_proxima() - antecedencia
+                        if espera > 0:
+                            aguardar(min(espera, ESPERA_MAXIMA_AGENDADOR))
+                        else:
+                            preaquecido_para = proxima
+                            # Com o SSW fora do ar ou o disjuntor aberto, não abre navegadores nem faz login
+                            if disjuntor.segundos_ate_liberar() > 0 or not sonda.verificar() or sonda.instavel():
+                                self.ao_log("SSW indisponível; pré-aquecimento ignorado.", nivel='warning')
+                            else:
+                                motores_liberados = False
+                                self.preaquecer(
+                                    pool, [job for job in jobs if agendador.proximas[job['nome']] == proxima]
+                                )
+                        continue
+                    
+                    # Aguarda a próxima extração, retornando imediatamente se for pausado ou parado
+                    agendador.aguardar_proxima()
+                    continue
+                motores_liberados = False
+                
+                # Verifica se cada extração está no seu horário comercial
+                no_horario = []
+                for job in pendentes:
+                    if esta_no_horario_comercial(job['hora_inicio'], job['hora_fim']):
+                        no_horario.append(job)
+                        continue
+                    
+                    proxima = agendador.reagendar(job, agora)
+                    self.ao_log(
+                        f"[{job['nome']}] Fora do horário comercial. "
+                        f"Próxima extração às {proxima.strftime('%d/%m %H:%M')} "
+                        f"(em {formatar_tempo_restante((proxima - agora).total_seconds())}).",
+                        nivel='warning'
+                    )
+                
+                if not no_horario:
+                    self.ao_status('outside_hours')
+                    if uma_vez:
+                        return True  # Nada a executar fora do horário
+                    
+                    # Libera os navegadores/conexões enquanto não houver extrações
+                    pool.fechar_todos()
+                    continue
+                
+                # Verifica se o SSW responde; com falhas frequentes recentes, adia o ciclo
+                disponivel = sonda.verificar()
+                if not disponivel or sonda.instavel():
+                    if uma_vez and not disponivel:
+                        self.ao_log(f"Sem conexão com o SSW. ({sonda.resumo()})", nivel='error')
+                        return False
+                    if not disponivel:
+                        falhas_conexao += 1
+                    espera = politica_conexao.espera(max(falhas_conexao, 1))
+                    self.ao_status('no_connection')
+                    mensagem = "Sem conexão com o site" if not disponivel else "SSW instável"
+                    self.ao_log(
+                        f"{mensagem}. Tentando reconectar em {espera:.0f} segundos... ({sonda.resumo()})", 
+                        nivel='error'
+                    )
+                    
+                    # Aguarda antes de tentar novamente, consultando o SSW de novo
+                    aguardar(espera)
+                    sonda.verificar(forcar=True)
+                    continue
+                falhas_conexao = 0
+                
+                # SSW falhando seguidamente: aguarda o disjuntor liberar uma extração de teste
+                espera = disjuntor.segundos_ate_liberar()
+                if espera > 0:
+                    self.ao_status('ssw_unavailable')
+                    self.ao_log(
+                        f"SSW indisponível. Nova tentativa em {formatar_tempo_restante(max(espera, 60))}.",
+                        nivel='warning'
+                    )
+                    aguardar(espera)
+                    continue
+                
+                # Inicia o processo de extração
+                self.ao_status('extracting')
+                self.ao_log("Iniciando processo de extração de dados...", nivel='info')
+                
+                # Executa as extrações pendentes em paralelo, limitadas pelo tamanho do pool
+                ciclo = datetime.now().strftime('%Y%m%d-%H%M%S')
+                futuros = {
+                    executor.submit(
+                        self.executar_job, pool, job, retencoes[job['nome']], publicador,
+                        historicos[job['nome']], disjuntor, ciclo
+                    ): job
+                    for job in no_horario
+                }
+                houve_sucesso = False
+                todos_com_sucesso = True
+                
+                for futuro in as_completed(futuros):
+                    job = futuros[futuro]
+                    sucesso = False
+                    try:
+                        sucesso = futuro.result()
+                    except Exception as e:
+                        # Registra erro crítico no log
+                        self.ao_log(f"[{job['nome']}] Erro crítico: {e}", nivel='error')
+                    houve_sucesso = houve_sucesso or sucesso
+                    todos_com_sucesso = todos_com_sucesso and sucesso
+                    
+                    # O próximo horário é calculado a partir do relógio, não do fim da extração
+                    proxima = agendador.reagendar(job)
+                    self.registrar_execucao(job, sucesso, proxima)
+                
+                if houve_sucesso:
+                    # Atualiza status e tempo da última execução
+                    self.ao_status('success')
+                    self.ao_sucesso()
+                
+                # Grava os tempos por fase do ciclo e encerra processos do navegador que ficaram para trás
+                self.salvar_tempos()
+                self.limpar_processos_orfaos()
+                
+                # Tenta de novo publicar os arquivos que ficaram na área local após falhas de publicação
+                publicador.recuperar_pendentes(jobs, retencoes, limpar_parciais=False)
+                
+                if uma_vez:
+                    sonda.fechar()
+                    return todos_com_sucesso
+                
+                # Configura para aguardar próxima execução
+                proxima = min(agendador.proximas.values())
+                self.ao_status('waiting')
+                self.ao_log(
+                    f"Próxima execução às {proxima.strftime('%H:%M')} "
+                    f"(em {formatar_tempo_restante(agendador.segundos_ate_proxima())})...",
+                    nivel='info'
+                )
+                self.ao_log("-" * 80, nivel='info')
+        
+        sonda.fechar()
+        return False
+    
+    def preaquecer(self, pool, proximos):
+        """Abre os navegadores/conexões das próximas extrações antes do horário agendado"""
+        inicio = time.perf_counter()
+        with contexto_execucao(fase='preaquecimento'):
+            preparados = pool.preaquecer(len(proximos), login=PREAQUECIMENTO['login'])
+        if preparados:
+            self.ao_log(
+                f"Motor pré-aquecido para {', '.join(job['nome'] for job in proximos)} "
+                f"({preparados} em {time.perf_counter() - inicio:.1f} s).",
+                nivel='info'
+            )
+    
+    def registrar_execucao(self, job, sucesso, proxima):
+        """Grava o resultado da última execução de cada extração, consultado por --report"""
+        metricas.registrar_execucao(job['nome'], sucesso, proxima)
+        estado = ler_estado_execucao()
+        agora = datetime.now().isoformat(timespec='seconds')
+        estado[job['nome']] = {
+            'ultima_execucao': agora,
+            'sucesso': bool(sucesso),
+            'ultimo_sucesso': agora if sucesso else estado.get(job['nome'], {}).get('ultimo_sucesso'),
+            'proxima_execucao': proxima.isoformat(timespec='seconds')
+        }
+        temporario = ARQUIVO_ESTADO_EXECUCAO.with_suffix('.tmp')
+        with open(temporario, 'w', encoding='utf-8') as arquivo:
+            json.dump(estado, arquivo, ensure_ascii=False, indent=1)
+        os.replace(temporario, ARQUIVO_ESTADO_EXECUCAO)
+    
+    def executar_job(self, pool, job, retencao, publicador, historico, disjuntor, ciclo=None):
+        """
+        Executa uma extração com novas tentativas em espera exponencial, usando um motor do pool
+        
+        Enquanto o disjuntor do SSW estiver aberto nenhum motor é emprestado,
+        então uma queda longa do SSW não abre navegadores à toa.
         
-        # Verificar se há pelo menos 2 arquivos
-        if len(arquivos) < 2:
-            return "Não há arquivos suficientes para excluir o penúltimo (precisa de pelo menos 2)."
+        Returns:
+            bool: True se o arquivo foi baixado com sucesso
+        """
+        with contexto_execucao(ciclo=ciclo, extracao=job['nome'], fase='extracao', tempos={}):
+            inicio = time.perf_counter()
+            politica = PoliticaRetentativa(**job['retentativa'])
+            tentativa = 1
             
-        # Ordenar por data de modificação (mais antigos primeiro)
-        arquivos.sort(key=lambda x: os.path.getmtime(os.path.join(diretorio, x)))
-        
-        # Pegar o penúltimo arquivo (o segundo mais antigo)
-        penultimo_arquivo = arquivos[0]
-        caminho_completo = os.path.join(diretorio, penultimo_arquivo)
-        
-        # Excluir o arquivo
-        os.remove(caminho_completo)
-        logging.info(f"Arquivo excluído: {penultimo_arquivo}")
-        return f"Arquivo excluído: {penultimo_arquivo}"
-        
-    except PermissionError:
-        erro_msg = f"Permissão negada ao tentar excluir arquivo em {diretorio}"
-        logging.error(erro_msg)
-        return erro_msg
-    except Exception as e:
-        erro_msg = f"Ocorreu um erro ao tentar excluir o arquivo: {e}"
-        logging.error(erro_msg)
-        return erro_msg
-
-
-def esta_no_horario_comercial(hora_inicio=7, hora_fim=18):
-    """
-    Verifica se o momento atual está dentro do horário comercial definido
+            while politica.pode_tentar(tentativa) and not stop_event.is_set():
+                # SSW indisponível: aguarda o disjuntor liberar uma tentativa
+                if not disjuntor.permitir():
+                    espera = disjuntor.segundos_ate_liberar() or politica.espera(1)
+                    if aguardar(espera) or pause_event.is_set():
+                        return False
+                    continue
+                
+                motor = pool.emprestar()
+                try:
+                    # Gera e baixa o relatório com o motor selecionado
+                    with contexto_execucao(fase='download'):
+                        resultado = motor.extrair(job, pasta_download_job(job))
+                except ErroExtracao as e:
+                    abriu = disjuntor.registrar_falha()
+                    
+                    # Registra erro no log
+                    erro_msg = f"[{job['nome']}] Erro: {e}. Tentativa {tentativa}"
+                    if politica.tentativas is not None:
+                        erro_msg += f" de {politica.tentativas}"
+                    self.ao_log(erro_msg, nivel='error')
+                    
+                    if abriu:
+                        self.ao_log(
+                            f"SSW falhou {disjuntor.falhas} vezes seguidas. Extrações suspensas por "
+                            f"{formatar_tempo_restante(disjuntor.segundos_ate_liberar())}.",
+                            nivel='error'
+                        )
+                    
+                    # Aguarda antes de tentar novamente, com espera crescente
+                    tentativa += 1
+                    if not politica.pode_tentar(tentativa):
+                        self.ao_log(f"[{job['nome']}] Número máximo de tentativas excedido.", nivel='error')
+                        return False
+                    metricas.registrar_retentativa(job['nome'])
+                    
+                    espera = politica.espera(tentativa - 1)
+                    self.ao_log(
+                        f"[{job['nome']}] Aguardando {espera:.0f} segundos antes de tentar novamente...",
+                        nivel='warning'
+                    )
+                    if aguardar(espera) or pause_event.is_set():
+                        return False
+                    continue
+                except Exception:
+                    disjuntor.cancelar_teste()
+                    raise
+                finally:
+                    pool.devolver(motor)
+                
+                if resultado is None:
+                    disjuntor.cancelar_teste()
+                    return False  # Extração interrompida
+                
+                disjuntor.registrar_sucesso()
+                with contexto_execucao(fase='processamento'):
+                    sucesso = self.processar_resultado(job, resultado, retencao, publicador, historico)
+                
+                # Duração de cada fase da extração (a publicação em segundo plano é medida à parte)
+                medidor_fases.registrar('extracao', time.perf_counter() - inicio)
+                self.ao_log(f"[{job['nome']}] Tempos: {formatar_tempos(contexto_log.tempos)}", nivel='info')
+                return sucesso
+            
+            return False
     
-    Args:
-        hora_inicio (int): Hora de início do horário comercial (24h)
-        hora_fim (int): Hora de término do horário comercial (24h)
+    def processar_resultado(self, job, resultado, retencao, publicador, historico):
+        """
+        Descarta, registra no histórico, converte e publica o arquivo baixado por uma extração
         
-    Returns:
-        bool: True se está no horário comercial, False caso contrário
-    """
-    agora = datetime.now().time()
-    horario_inicio = dt_time(hora_inicio, 0)
-    horario_fim = dt_time(hora_fim, 0)
-    return horario_inicio <= agora <= horario_fim
+        Returns:
+            bool: True (o arquivo foi baixado com sucesso)
+        """
+        arquivo_baixado = resultado['arquivo']
+        
+        # Tamanho e linhas do arquivo, exportados pelas métricas
+        linhas = None
+        if metricas.ativo:
+            try:
+                linhas = sum(1 for _ in ler_relatorio_ssw(arquivo_baixado)[1])
+            except (OSError, ValueError, csv.Error):
+                pass
+        metricas.registrar_arquivo(job['nome'], resultado['tamanho'], linhas)
+        
+        # Registra sucesso no log
+        self.ao_log(
+            f"[{job['nome']}] Arquivo baixado com sucesso: {os.path.basename(arquivo_baixado)}",
+            nivel='success'
+        )
+        
+        # Conteúdo idêntico ao último publicado: não publica nem rotaciona
+        if retencao.conteudo_inalterado(resultado['sha256']):
+            os.remove(arquivo_baixado)
+            retencao.registrar_inalterado()
+            self.ao_log(
+                f"[{job['nome']}] Conteúdo inalterado desde o último arquivo publicado; publicação ignorada.",
+                nivel='info'
+            )
+            return True
+        
+        historico_gravado = False
+        if historico is not None:
+            # Grava o delta em relação ao relatório anterior
+            try:
+                with medir_fase('historico'):
+                    mensagem = historico.registrar(arquivo_baixado)
+                self.ao_log(f"[{job['nome']}] {mensagem}", nivel='info')
+                historico_gravado = True
+            except (OSError, ValueError) as e:
+                self.ao_log(f"[{job['nome']}] Falha ao gravar o histórico: {e}", nivel='warning')
+        
+        # Cópia colunar: publicada junto com o .sswweb ou no lugar dele
+        arquivo_publicado = arquivo_baixado if job['publicar_completo'] else None
+        derivados = []
+        if job['colunar'] is not None:
+            arquivo_colunar = self.converter_colunar(job, arquivo_baixado)
+            if arquivo_colunar and (job['colunar']['substituir'] or arquivo_publicado is None):
+                arquivo_publicado = arquivo_colunar
+            elif arquivo_colunar:
+                derivados.append(arquivo_colunar)
+        
+        if arquivo_publicado != arquivo_baixado:
+            os.remove(arquivo_baixado)
+        if arquivo_publicado is None:
+            # Apenas o histórico é mantido; sem a cópia colunar configurada (conversão falhou),
+            # o conteúdo não vira referência e é processado de novo na próxima extração
+            if historico_gravado and job['colunar'] is None:
+                retencao.registrar_conteudo(resultado['sha256'])
+            return True
+        
+        # O conteúdo só vira referência para as próximas comparações depois de publicado
+        if job['staging']:
+            # A publicação e a retenção ocorrem em segundo plano
+            publicador.enviar(arquivo_publicado, job, retencao, resultado['sha256'], derivados)
+        else:
+            # Registra o arquivo no manifesto e aplica a política de retenção
+            with medir_fase('retencao'):
+                retencao.registrar(arquivo_publicado, sha256=resultado['sha256'], derivados=derivados)
+                retencao.registrar_conteudo(resultado['sha256'])
+                mensagem = retencao.aplicar()
+            self.ao_log(f"[{job['nome']}] {mensagem}", nivel='info')
+        return True
+    
+    def converter_colunar(self, job, arquivo):
+        """
+        Grava a cópia colunar (Parquet/Arrow) do relatório ao lado do arquivo baixado
+        
+        Uma falha na conversão não interrompe a extração: o .sswweb é publicado normalmente.
+        
+        Returns:
+            str | None: Arquivo colunar gerado, ou None se a conversão não foi feita
+        """
+        if carregar_pyarrow() is None:
+            self.ao_log(f"[{job['nome']}] pyarrow não instalado; cópia colunar não gerada.", nivel='warning')
+            return None
+        
+        try:
+            with medir_fase('conversao'):
+                destino, linhas, tipos = ConversorColunar(job['colunar']).converter(arquivo)
+        except (OSError, ValueError, csv.Error) as e:
+            self.ao_log(f"[{job['nome']}] Falha na conversão colunar: {e}", nivel='warning')
+            return None
+        
+        tipados = sum(1 for tipo in tipos.values() if tipo != 'texto')
+        self.ao_log(
+            f"[{job['nome']}] Cópia colunar gravada: {os.path.basename(destino)} "
+            f"({linhas} linhas, {tipados} de {len(tipos)} colunas tipadas)",
+            nivel='info'
+        )
+        return destino
 
 
-def tempo_ate_proxima_extracao(hora_inicio=7, intervalo_horas=1):
+def gerar_relatorio_estado(jobs, agora=None):
     """
-    Calcula o tempo restante até a próxima extração
+    Monta o relatório de situação das extrações exibido por --report
     
-    Args:
-        hora_inicio (int): Hora de início do horário comercial (24h)
-        intervalo_horas (int): Intervalo entre extrações em horas
-        
     Returns:
-        float: Tempo em segundos até a próxima extração
+        str: Última execução, próximo horário, último arquivo publicado e histórico de cada extração
     """
-    agora = datetime.now()
+    agora = agora or datetime.now()
+    estado = ler_estado_execucao()
+    agendador = Agendador(jobs)
+    medidor_fases.carregar()
+    linhas = [f"{APP_NAME} v{APP_VERSION} - situação em {agora.strftime('%d/%m/%Y %H:%M')}"]
     
-    # Se estiver fora do horário comercial (após as 18h), calcular para o próximo dia
-    if agora.time() > dt_time(18, 0):
-        proximo_dia = agora + timedelta(days=1)
-        proxima_extracao = proximo_dia.replace(hour=hora_inicio, minute=0, second=0, microsecond=0)
-    else:
-        # Se antes do horário comercial, calcular para o início do dia atual
-        if agora.time() < dt_time(hora_inicio, 0):
-            proxima_extracao = agora.replace(hour=hora_inicio, minute=0, second=0, microsecond=0)
-        else:
-            # Durante o horário comercial, calcular próximo intervalo
-            hora_atual = agora.hour
-            # Calcular quantas horas completas passaram desde o início
-            horas_passadas = hora_atual - hora_inicio
-            # Calcular próximo múltiplo de intervalo_horas
-            proxima_hora = hora_inicio + ((horas_passadas // intervalo_horas) + 1) * intervalo_horas
-            
-            # Se a próxima hora calculada for após o horário comercial
-            if proxima_hora >= 18:
-                proximo_dia = agora + timedelta(days=1)
-                proxima_extracao = proximo_dia.replace(hour=hora_inicio, minute=0, second=0, microsecond=0)
-            else:
-                proxima_extracao = agora.replace(hour=proxima_hora, minute=0, second=0, microsecond=0)
+    cache_driver = provisionador_driver.ler_cache()
+    if cache_driver:
+        linhas.append(
+            f"msedgedriver em cache: {cache_driver['driver']} (Edge {cache_driver.get('versao_navegador') or '?'}; "
+            f"{cache_driver['segundos_resolucao']:.1f} s economizados por abertura)"
+        )
     
-    # Se a próxima extração já passou (devido a atrasos), usar o intervalo padrão
-    if proxima_extracao <= agora:
-        proxima_extracao = agora + timedelta(hours=intervalo_horas)
+    for job in jobs:
+        linhas.append("")
+        linhas.append(f"[{job['nome']}] {job['unidade']} / opção {job['opcao']} -> {job['pasta_destino']}")
+        
+        execucao = estado.get(job['nome'])
+        if execucao:
+            resultado = "sucesso" if execucao['sucesso'] else "falha"
+            linhas.append(f"  Última execução: {execucao['ultima_execucao']} ({resultado})")
+        else:
+            linhas.append("  Última execução: nunca")
+        linhas.append(f"  Próxima execução: {agendador.calcular_proxima(job, agora).isoformat(timespec='minutes')}")
+        
+        caminho_manifesto = ESTADO_DIR / f"retencao_{identificador_job(job['nome'])}.json"
+        try:
+            with open(caminho_manifesto, encoding='utf-8') as arquivo:
+                manifesto = json.load(arquivo)
+            arquivos = manifesto.get('arquivos', [])
+            if arquivos:
+                linhas.append(f"  Último arquivo publicado: {arquivos[-1]['arquivo']} ({arquivos[-1]['momento']})")
+            linhas.append(f"  Arquivos mantidos: {len(arquivos)}; "
+                          f"execuções sem alteração registradas: {len(manifesto.get('inalterados', []))}")
+        except (OSError, ValueError):
+            linhas.append("  Nenhum arquivo publicado")
+        
+        if job['historico']:
+            historico = HistoricoDeltas(job['nome'], job['historico'])
+            deltas = sum(1 for entrada in historico.indice if entrada['tipo'] == 'delta')
+            linhas.append(f"  Histórico: {len(historico.indice) - deltas} snapshots completos e {deltas} deltas")
+        
+        if job['colunar']:
+            colunar = job['colunar']
+            linhas.append(
+                f"  Cópia colunar: {colunar['formato']} ({colunar['compressao'] or 'sem compressão'})"
+                f"{', no lugar do .sswweb' if colunar['substituir'] else ''}"
+            )
+        
+        tempos = {fase: medidor_fases.percentis(fase, job['nome']) for fase in medidor_fases.fases()}
+        tempos = {fase: valores for fase, valores in tempos.items() if valores}
+        if tempos:
+            linhas.append("  Tempos por fase (p50 / p95 / máx.):")
+            for fase, valores in tempos.items():
+                linhas.append(f"    {fase}: {valores['p50']:.1f} / {valores['p95']:.1f} / {valores['max']:.1f} s "
+                              f"({valores['amostras']} medições)")
     
-    tempo_restante = (proxima_extracao - agora).total_seconds()
-    return max(tempo_restante, 60)  # Mínimo de 60 segundos
+    return "\n".join(linhas)
 
 
-def formatar_tempo_restante(segundos):
+def executar_sem_interface(nome_motor, uma_vez, arquivo_jobs=ARQUIVO_JOBS, url_base=SSW_URL_BASE,
+                           perfil_navegador=PERFIL_NAVEGADOR):
     """
-    Formata um tempo em segundos para formato legível
+    Executa as extrações sem Tkinter, para serviços (systemd) e agendadores (cron)
+    
+    SIGINT e SIGTERM encerram o laço após a extração em andamento.
     
-    Args:
-        segundos (float): Tempo em segundos
-        
     Returns:
-        str: Tempo formatado como "X horas e Y minutos"
+        int: Código de saída (0 = sucesso, 1 = falha em alguma extração ou erro inesperado,
+             2 = configuração inválida)
     """
-    horas = int(segundos // 3600)
-    minutos = int((segundos % 3600) // 60)
+    def encerrar(numero_sinal, quadro):
+        logging.info(f"Sinal {numero_sinal} recebido, encerrando a extração...")
+        stop_event.set()
+        notificar_controle()
     
-    if horas > 0:
-        return f"{horas} {'hora' if horas == 1 else 'horas'} e {minutos} {'minuto' if minutos == 1 else 'minutos'}"
-    else:
-        return f"{minutos} {'minuto' if minutos == 1 else 'minutos'}"
+    signal.signal(signal.SIGINT, encerrar)
+    signal.signal(signal.SIGTERM, encerrar)
+    
+    executor = ExecutorExtracoes(arquivo_jobs=arquivo_jobs, url_base=url_base, perfil_navegador=perfil_navegador)
+    try:
+        sucesso = executor.executar(nome_motor, uma_vez=uma_vez)
+    except ErroConfiguracao as e:
+        logging.error(f"{e.titulo}: {e}")
+        return 2
+    except Exception as e:
+        logging.exception(f"Erro crítico: {e}")
+        return 1
+    return 0 if sucesso or not uma_vez else 1
 
 
 # ===== CLASSE DE TEMA MODERNO =====
@@ -300,8 +4476,11 @@ class ModernTheme:
                         background=COLORS['background'], 
                         foreground=COLORS['text'], 
                         font=('Helvetica', 11))
-        
-        style.configure('Title.TLabel', 
+
+        style.configure('Surface.TLabel',
+                        background=COLORS['surface'])
+
+        style.configure('Title.TLabel',
                         font=('Helvetica', 20, 'bold'), 
                         foreground=COLORS['primary_dark'])
         
@@ -388,12 +4567,25 @@ class ModernTheme:
 class Application:
     """Aplicação principal para extração automatizada de dados SSW"""
     
-    def __init__(self, root):
-        """Inicializa a aplicação"""
+    def __init__(self, root, args=None):
+        """
+        Inicializa a aplicação
+        
+        Args:
+            root (ThemedTk): Janela principal
+            args (argparse.Namespace | None): Opções da linha de comando (--motor, --jobs,
+                                              --url-base, --perfil-navegador); padrão: valores padrão
+        """
         self.root = root
+        self.args = args if args is not None else criar_parser().parse_args([])
+        
+        # Atualizações da interface enviadas por qualquer thread e aplicadas pela thread do Tk
+        self.fila_interface = queue.SimpleQueue()
+        
         self.setup_window()
         self.create_ui()
         self.initialize_state()
+        self.root.after(INTERVALO_ATUALIZACAO_INTERFACE, self.processar_fila_interface)
         
     def setup_window(self):
         """Configura a janela principal"""
@@ -498,16 +4690,47 @@ class Application:
         )
         self.stop_btn.pack(side=tk.LEFT)
         
+        # Seleção do motor de extração
+        self.motores_por_rotulo = {rotulo_motor(nome): nome for nome in MOTORES}
+        self.motor_var = tk.StringVar(value=rotulo_motor(self.args.motor))
+        self.motor_combo = ttk.Combobox(
+            self.controls_frame,
+            textvariable=self.motor_var,
+            values=list(self.motores_por_rotulo),
+            state='readonly',
+            width=18
+        )
+        self.motor_combo.pack(side=tk.RIGHT, padx=(PADDING['small'], 0))
+        
+        self.motor_label = ttk.Label(
+            self.controls_frame,
+            text="Motor:",
+            style='Surface.TLabel'
+        )
+        self.motor_label.pack(side=tk.RIGHT, padx=(PADDING['medium'], 0))
+        
         # Área de log
         self.log_frame = ttk.Frame(self.main_frame, style='Surface.TFrame')
         self.log_frame.pack(fill=tk.BOTH, expand=True, pady=PADDING['medium'])
         
+        self.log_toolbar = ttk.Frame(self.log_frame, style='Surface.TFrame')
+        self.log_toolbar.pack(fill=tk.X, padx=PADDING['medium'], pady=PADDING['small'])
+        
         self.log_header = ttk.Label(
-            self.log_frame, 
+            self.log_toolbar, 
             text="Registro de Atividades", 
             style='Heading.TLabel'
         )
-        self.log_header.pack(anchor=tk.W, padx=PADDING['medium'], pady=PADDING['small'])
+        self.log_header.pack(side=tk.LEFT)
+        
+        # Linhas que saíram da área de log continuam disponíveis no arquivo
+        self.older_btn = ttk.Button(
+            self.log_toolbar,
+            text=BUTTONS['older']['text'],
+            style=BUTTONS['older']['style'],
+            command=self.abrir_log_anterior
+        )
+        self.older_btn.pack(side=tk.RIGHT)
         
         # Estilização da área de texto
         text_font = tkFont.Font(family="Consolas", size=10)
@@ -523,6 +4746,10 @@ class Application:
         )
         self.log_area.pack(fill=tk.BOTH, expand=True, padx=PADDING['medium'], pady=PADDING['small'])
         
+        # Cores de cada nível de mensagem, configuradas uma única vez
+        for nivel, cor in LOG_COLORS.items():
+            self.log_area.tag_config(nivel, foreground=cor)
+        
         # Footer com informações
         self.footer_frame = ttk.Frame(self.main_frame)
         self.footer_frame.pack(fill=tk.X, pady=PADDING['small'])
@@ -560,52 +4787,70 @@ class Application:
         self.atualizar_status('idle')
     
     def atualizar_status(self, status_key, **kwargs):
-        """Atualiza o status na interface"""
-        message = get_status_message(status_key, **kwargs)
-        style = get_status_style(status_key)
-        
-        # Atualiza o texto e o estilo
-        self.status_label.config(text=f"Status: {message}", style=style)
+        """Atualiza o status na interface (pode ser chamado de qualquer thread)"""
+        self.fila_interface.put(('status', status_key, kwargs))
         
         # Atualiza o log com a mesma mensagem se necessário
         if status_key in ['initializing', 'extracting', 'waiting', 'paused', 'stopped', 'error', 'success']:
-            self.adicionar_log(message)
+            self.adicionar_log(get_status_message(status_key, **kwargs))
     
     def adicionar_log(self, mensagem, nivel='info'):
-        """Adiciona uma mensagem ao log com formatação de hora"""
+        """Adiciona uma mensagem ao log com formatação de hora (pode ser chamado de qualquer thread)"""
         hora_atual = datetime.now().strftime('%H:%M:%S')
+        nivel = nivel if nivel in LOG_COLORS else 'info'
+        self.fila_interface.put(('log', (f"[{hora_atual}] ", 'time', f"{mensagem}\n", nivel)))
         
-        # Definição de cores para diferentes níveis de log
-        cores = {
-            'info': '#333333',     # Preto padrão
-            'success': '#2ecc71',  # Verde
-            'warning': '#f39c12',  # Laranja
-            'error': '#e74c3c'     # Vermelho
-        }
+        # Registra no log do sistema
+        registrar_log(mensagem, nivel)
+    
+    def executar_na_interface(self, funcao, *args):
+        """Agenda a chamada de uma função na thread do Tk (ex.: caixas de diálogo)"""
+        self.fila_interface.put(('chamada', funcao, args))
+    
+    def processar_fila_interface(self):
+        """
+        Aplica em lote as atualizações enfileiradas pelas threads
         
-        cor = cores.get(nivel, cores['info'])
+        As mensagens de log pendentes viram um único insert no widget e
+        apenas o último status é aplicado, então rajadas de mensagens não
+        travam a interface.
+        """
+        trechos = []
+        ultimo_status = None
+        chamadas = []
         
-        self.log_area.tag_config(nivel, foreground=cor)
+        for _ in range(MAX_ITENS_POR_ATUALIZACAO):
+            try:
+                item = self.fila_interface.get_nowait()
+            except queue.Empty:
+                break
+            if item[0] == 'log':
+                trechos.extend(item[1])
+            elif item[0] == 'status':
+                ultimo_status = item[1:]
+            else:
+                chamadas.append(item[1:])
         
-        # Adiciona a mensagem com a tag de cor apropriada
-        self.log_area.insert(tk.END, f"[{hora_atual}] ", 'time')
-        self.log_area.insert(tk.END, f"{mensagem}\n", nivel)
+        if trechos:
+            self.log_area.insert(tk.END, *trechos)
+            
+            # Mantém apenas as últimas linhas, removendo o excedente em bloco
+            total_linhas = int(self.log_area.index('end-1c').split('.')[0])
+            excedente = total_linhas - MAX_LINHAS_LOG_INTERFACE
+            if excedente > FOLGA_LINHAS_LOG_INTERFACE:
+                self.log_area.delete('1.0', f'{excedente + 1}.0')
+            
+            self.log_area.yview(tk.END)
         
-        # Configura a tag de tempo para ser cinza
-        self.log_area.tag_config('time', foreground='#7f8c8d')
+        if ultimo_status is not None:
+            status_key, kwargs = ultimo_status
+            message = get_status_message(status_key, **kwargs)
+            self.status_label.config(text=f"Status: {message}", style=get_status_style(status_key))
         
-        # Rola para a última linha
-        self.log_area.yview(tk.END)
+        for funcao, args in chamadas:
+            funcao(*args)
         
-        # Registra no log do sistema
-        if nivel == 'info':
-            logging.info(mensagem)
-        elif nivel == 'success':
-            logging.info(f"SUCESSO: {mensagem}")
-        elif nivel == 'warning':
-            logging.warning(mensagem)
-        elif nivel == 'error':
-            logging.error(mensagem)
+        self.root.after(INTERVALO_ATUALIZACAO_INTERFACE, self.processar_fila_interface)
     
     def iniciar_extracao(self):
         """Inicia a extração em uma thread separada"""
@@ -615,18 +4860,20 @@ class Application:
             self.pause_btn.config(state=tk.NORMAL)
             self.resume_btn.config(state=tk.DISABLED)
             self.stop_btn.config(state=tk.NORMAL)
+            self.motor_combo.config(state=tk.DISABLED)
             
             # Atualiza o status
             self.atualizar_status('initializing')
             
-            # Inicia a thread de extração
-            self.extraction_thread = Thread(target=self.executar_extracao)
+            # Inicia a thread de extração com o motor selecionado
+            self.extraction_thread = Thread(target=self.executar_extracao, args=(self.motores_por_rotulo[self.motor_var.get()],))
             self.extraction_thread.daemon = True
             self.extraction_thread.start()
     
     def pausar_extracao(self):
         """Pausa a extração"""
         pause_event.set()
+        notificar_controle()
         self.atualizar_status('paused')
         
         # Atualiza os botões
@@ -636,6 +4883,7 @@ class Application:
     def continuar_extracao(self):
         """Continua a extração"""
         pause_event.clear()
+        notificar_controle()
         self.atualizar_status('extracting')
         
         # Atualiza os botões
@@ -646,6 +4894,7 @@ class Application:
         """Para a extração"""
         stop_event.set()
         pause_event.clear()
+        notificar_controle()
         
         self.atualizar_status('stopped')
         
@@ -654,206 +4903,172 @@ class Application:
         self.pause_btn.config(state=tk.DISABLED)
         self.resume_btn.config(state=tk.DISABLED)
         self.stop_btn.config(state=tk.DISABLED)
+        self.motor_combo.config(state='readonly')
         
         # Adiciona separador no log
-        self.log_area.insert(tk.END, "-" * 80 + "\n")
-        self.log_area.yview(tk.END)
+        self.fila_interface.put(('log', ("-" * 80 + "\n", 'info')))
+    
+    def abrir_log_anterior(self):
+        """Abre uma janela que pagina o log, das linhas mais recentes para as mais antigas, incluindo os arquivos rotacionados"""
+        janela = tk.Toplevel(self.root)
+        janela.title(f"{APP_NAME} - Registros anteriores")
+        janela.geometry("950x600")
+        
+        barra = ttk.Frame(janela)
+        barra.pack(fill=tk.X, padx=PADDING['medium'], pady=PADDING['small'])
+        
+        area = scrolledtext.ScrolledText(
+            janela,
+            wrap=tk.NONE,
+            font=tkFont.Font(family="Consolas", size=10),
+            background="#f8f9fa",
+            foreground="#333333"
+        )
+        area.pack(fill=tk.BOTH, expand=True, padx=PADDING['medium'], pady=PADDING['small'])
+        
+        # Arquivo (índice em 'arquivos') e posição final de cada página exibida; o topo da pilha é a página atual
+        arquivos = arquivos_log(LOG_FILE)
+        paginas = [(0, None)]
+        inicio_atual = [0]
+        
+        def exibir():
+            indice, fim = paginas[-1]
+            linhas, inicio = ler_pagina_log(arquivos[indice], fim)
+            inicio_atual[0] = inicio
+            area.config(state=tk.NORMAL)
+            area.delete('1.0', tk.END)
+            area.insert(tk.END, "\n".join(linhas))
+            area.config(state=tk.DISABLED)
+            area.yview(tk.END)
+            arquivo_label.config(text=str(arquivos[indice]))
+            mais_antigos = inicio > 0 or indice + 1 < len(arquivos)
+            anteriores_btn.config(state=tk.NORMAL if mais_antigos else tk.DISABLED)
+            recentes_btn.config(state=tk.NORMAL if len(paginas) > 1 else tk.DISABLED)
+        
+        def anteriores():
+            indice = paginas[-1][0]
+            # No início do arquivo, continua no arquivo rotacionado anterior
+            paginas.append((indice, inicio_atual[0]) if inicio_atual[0] > 0 else (indice + 1, None))
+            exibir()
+        
+        def recentes():
+            paginas.pop()
+            exibir()
+        
+        anteriores_btn = ttk.Button(barra, text="◀ Anteriores", command=anteriores)
+        anteriores_btn.pack(side=tk.LEFT)
+        recentes_btn = ttk.Button(barra, text="Mais recentes ▶", command=recentes)
+        recentes_btn.pack(side=tk.LEFT, padx=(PADDING['small'], 0))
+        arquivo_label = ttk.Label(barra, text=str(LOG_FILE))
+        arquivo_label.pack(side=tk.RIGHT)
+        
+        exibir()
     
     def on_closing(self):
         """Manipulador para quando a janela é fechada"""
         if messagebox.askokcancel("Sair", "Deseja realmente sair? A extração será interrompida."):
             stop_event.set()
+            notificar_controle()
             self.root.destroy()
     
     def atualizar_ultima_execucao(self):
-        """Atualiza a label de última execução"""
+        """Atualiza a label de última execução (pode ser chamado de qualquer thread)"""
         agora = datetime.now().strftime('%d/%m/%Y %H:%M')
-        self.last_run_label.config(text=f"Última execução: {agora}")
+        self.executar_na_interface(self.last_run_label.config, {'text': f"Última execução: {agora}"})
     
     def mostrar_mensagem_erro(self, titulo, mensagem):
         """Exibe uma caixa de diálogo de erro"""
         messagebox.showerror(titulo, mensagem)
         self.adicionar_log(mensagem, nivel='error')
     
-    def executar_extracao(self):
-        """Executa a extração de dados"""
-        # Caminho para o diretório de download
-        download_folder = os.path.expanduser('I:\\.shortcut-targets-by-id\\1BbEijfOOPBwgJuz8LJhqn9OtOIAaEdeO\\Logdi\\Relatório e Dashboards\\CTRCs Disponíveis para Transferência - 19\\DB_CTRCs Disponíveis para Transferência\\CTA')
-        
-        # Verificar se o diretório de download existe
-        if not os.path.exists(download_folder):
-            mensagem = f"Diretório de download não encontrado: {download_folder}"
-            self.mostrar_mensagem_erro("Erro de Diretório", mensagem)
-            self.parar_extracao()
-            return
-        
-        # Configurações do Edge
-        edge_options = Options()
-        edge_options.add_argument("--headless")
-        edge_options.add_argument("--disable-gpu")
-        edge_options.add_argument("--window-size=1920,1080")
-        edge_options.add_experimental_option('prefs', {
-            "download.default_directory": download_folder,
-            "download.prompt_for_download": False,
-            "download.directory_upgrade": True,
-            "safebrowsing.enabled": True
-        })
-        
-        while not stop_event.is_set():
-            # Verifica se está pausado
-            if pause_event.is_set():
-                time.sleep(1)
-                continue
-            
-            # Verifica se está no horário comercial
-            if not esta_no_horario_comercial():
-                tempo_restante = tempo_ate_proxima_extracao()
-                tempo_formatado = formatar_tempo_restante(tempo_restante)
-                
-                self.atualizar_status('outside_hours')
-                self.adicionar_log(
-                    f"Fora do horário comercial. Próxima extração em {tempo_formatado}.",
-                    nivel='warning'
-                )
-                
-                # Aguarda até a próxima extração, verificando a cada segundo se foi pausado ou parado
-                for _ in range(int(min(tempo_restante, 3600))):  # Verifica de novo após no máximo 1 hora
-                    if stop_event.is_set() or pause_event.is_set():
-                        break
-                    time.sleep(1)
-                
-                continue
-            
-            # Verifica conexão com o site
-            if not verificar_conexao():
-                self.atualizar_status('no_connection')
-                self.adicionar_log(
-                    "Sem conexão com o site. Tentando reconectar em 60 segundos...", 
-                    nivel='error'
-                )
-                
-                # Aguarda 60 segundos antes de tentar novamente
-                for _ in range(60):
-                    if stop_event.is_set() or pause_event.is_set():
-                        break
-                    time.sleep(1)
-                    
-                continue
-            
-            # Inicia o processo de extração
-            self.atualizar_status('extracting')
-            self.adicionar_log("Iniciando processo de extração de dados...", nivel='info')
-            
-            try:
-                with webdriver.Edge(options=edge_options) as driver:
-                    max_tentativas = 3
-                    tentativa = 0
-                    
-                    while tentativa < max_tentativas and not stop_event.is_set():
-                        try:
-                            # Abre o site do SSW
-                            driver.get("https://sistema.ssw.inf.br/bin/ssw0422")
-                            
-                            # Aguarda a página de login
-                            WebDriverWait(driver, 20).until(EC.presence_of_element_located((By.NAME, "f1")))
-                            
-                            # Preenche o formulário de login
-                            driver.find_element(By.NAME, "f1").send_keys("LDI")
-                            driver.find_element(By.NAME, "f2").send_keys("41968069020")
-                            driver.find_element(By.NAME, "f3").send_keys("botlogdi")
-                            driver.find_element(By.NAME, "f4").send_keys("logbotdi")
-                            driver.find_element(By.NAME, "f4").send_keys("+")
-                            time.sleep(1)
-                            
-                            # Clica no botão de login
-                            login_button = driver.find_element(By.ID, "5")
-                            driver.execute_script("arguments[0].click();", login_button)
-                            time.sleep(5)
-                            
-                            # Aguarda a próxima tela e preenche
-                            WebDriverWait(driver, 20).until(EC.presence_of_element_located((By.NAME, "f2")))
-                            driver.find_element(By.NAME, "f2").clear()
-                            driver.find_element(By.NAME, "f2").send_keys("CTA")
-                            driver.find_element(By.NAME, "f3").send_keys("19+")
-                            time.sleep(5)
-                            
-                            # Troca para a nova aba aberta
-                            abas = driver.window_handles
-                            driver.switch_to.window(abas[-1])
-                            
-                            # Preenche a data e configurações
-                            data_atual = datetime.now().strftime('%d%m%y')
-                            driver.find_element(By.NAME, "data_prev_man").clear()
-                            driver.find_element(By.NAME, "data_prev_man").send_keys(data_atual)
-                            driver.find_element(By.NAME, "hora_prev_man").clear()
-                            driver.find_element(By.NAME, "hora_prev_man").send_keys("0001")
-                            driver.find_element(By.NAME, "relatorio_excel").clear()
-                            driver.find_element(By.NAME, "relatorio_excel").send_keys("S")
-                            
-                            # Clica no botão para enviar
-                            login_button = driver.find_element(By.ID, "btn_envia")
-                            driver.execute_script("arguments[0].click();", login_button)
-                            
-                            # Aguarda o download
-                            time.sleep(30)
-                            
-                            # Registra sucesso no log
-                            self.adicionar_log("Arquivo baixado com sucesso.", nivel='success')
-                            
-                            # Exclui o último arquivo (caso necessário)
-                            resultado = excluir_penultimo_arquivo(download_folder)
-                            self.adicionar_log(resultado, nivel='info')
-                            
-                            # Atualiza status e tempo da última execução
-                            self.atualizar_status('success')
-                            self.atualizar_ultima_execucao()
-                            
-                            # Sai do loop de tentativas
-                            break
-                            
-                        except (TimeoutException, WebDriverException) as e:
-                            # Registra erro no log
-                            erro_msg = f"Erro: {e}. Tentativa {tentativa + 1} de {max_tentativas}"
-                            logging.error(erro_msg)
-                            self.adicionar_log(erro_msg, nivel='error')
-                            
-                            # Incrementa contador de tentativas
-                            tentativa += 1
-                            
-                            # Aguarda antes de tentar novamente (10 min)
-                            if tentativa < max_tentativas:
-                                self.adicionar_log("Aguardando 10 minutos antes de tentar novamente...", nivel='warning')
-                                
-                                for _ in range(600):  # 10 minutos
-                                    if stop_event.is_set() or pause_event.is_set():
-                                        break
-                                    time.sleep(1)
-                            else:
-                                self.adicionar_log("Número máximo de tentativas excedido.", nivel='error')
-                                
-            except Exception as e:
-                # Registra erro crítico no log
-                erro_msg = f"Erro crítico: {e}"
-                logging.error(erro_msg)
-                self.adicionar_log(erro_msg, nivel='error')
-            
-            # Configura para aguardar próxima execução
-            self.atualizar_status('waiting')
-            self.adicionar_log("Aguardando 1 hora para próxima execução...", nivel='info')
-            self.adicionar_log("-" * 80, nivel='info')
-            
-            # Espera 1 hora ou até que o evento de parada seja acionado
-            for _ in range(3600):  # 3600 segundos = 1 hora
-                if stop_event.is_set() or pause_event.is_set():
-                    break
-                time.sleep(1)
+    def executar_extracao(self, nome_motor=MOTOR_PADRAO):
+        """Executa as extrações configuradas com o motor informado ('navegador' ou 'http')"""
+        executor = ExecutorExtracoes(
+            ao_log=self.adicionar_log,
+            ao_status=self.atualizar_status,
+            ao_sucesso=self.atualizar_ultima_execucao,
+            arquivo_jobs=self.args.jobs,
+            url_base=self.args.url_base,
+            perfil_navegador=self.args.perfil_navegador
+        )
+        try:
+            executor.executar(nome_motor)
+        except ErroConfiguracao as e:
+            # Caixa de diálogo e botões só podem ser alterados pela thread do Tk
+            self.executar_na_interface(self.mostrar_mensagem_erro, e.titulo, str(e))
+            self.executar_na_interface(self.parar_extracao)
+        except Exception as e:
+            # Sem isso a thread terminaria em silêncio com os botões ainda em "extraindo"
+            logging.exception("Erro crítico na extração")
+            self.executar_na_interface(self.mostrar_mensagem_erro, "Erro Crítico", f"Erro crítico: {e}")
+            self.executar_na_interface(self.parar_extracao)
 
-def main():
+def criar_parser():
+    """Cria o parser dos argumentos de linha de comando"""
+    parser = argparse.ArgumentParser(
+        description=f"{APP_NAME} v{APP_VERSION}. Sem opções, abre a interface gráfica."
+    )
+    modo = parser.add_mutually_exclusive_group()
+    modo.add_argument('--once', action='store_true',
+                      help="Executa uma vez as extrações no horário comercial e encerra (cron/timer)")
+    modo.add_argument('--daemon', action='store_true',
+                      help="Executa os ciclos de extração sem interface até receber SIGINT/SIGTERM")
+    modo.add_argument('--report', action='store_true',
+                      help="Mostra a situação das extrações e encerra")
+    experimentais = [nome for nome, motor in MOTORES.items() if motor.experimental]
+    parser.add_argument('--motor', choices=list(MOTORES), default=MOTOR_PADRAO,
+                        help=f"Motor de extração (experimental, ainda não validado no SSW de produção: "
+                             f"{', '.join(experimentais)})" if experimentais else "Motor de extração")
+    parser.add_argument('--perfil-navegador', choices=list(PERFIS_NAVEGADOR), default=PERFIL_NAVEGADOR,
+                        help="Perfil do Edge no motor 'navegador' ('enxuto' não carrega imagens, fontes nem CSS)")
+    parser.add_argument('--jobs', type=Path, default=ARQUIVO_JOBS, help="Arquivo de configuração das extrações")
+    parser.add_argument('--url-base', default=SSW_URL_BASE, help="Endereço do SSW")
+    parser.add_argument('--log-json', action='store_true', default=LOG_ESTRUTURADO,
+                        help=f"Grava também o registro estruturado em {LOG_JSON_FILE.name}")
+    parser.add_argument('--metrics-port', type=int, default=METRICAS_PORTA,
+                        help=f"Expõe as métricas (formato Prometheus) em {METRICAS_CAMINHO} nesta porta")
+    parser.add_argument('--metrics-host', default=METRICAS_HOST, help="Endereço de escuta das métricas")
+    return parser
+
+
+def main(argv=None):
     """Função principal que inicia a aplicação"""
-    # Usar o tema ThemedTk
-    root = ThemedTk(theme="arc")
-    app = Application(root)
-    root.mainloop()
+    args = criar_parser().parse_args(argv)
+    configurar_logging(console=not args.report, estruturado=args.log_json)
+    
+    if args.report:
+        try:
+            print(gerar_relatorio_estado(carregar_jobs(args.jobs)))
+        except (OSError, ValueError) as e:
+            print(f"Configuração das extrações inválida: {e}", file=sys.stderr)
+            return 2
+        return 0
+    
+    servidor_metricas = None
+    if args.metrics_port is not None:
+        servidor_metricas = ServidorMetricas(args.metrics_port, args.metrics_host)
+        try:
+            servidor_metricas.iniciar()
+        except OSError as e:
+            print(f"Não foi possível abrir a porta de métricas {args.metrics_port}: {e}", file=sys.stderr)
+            return 2
+    
+    try:
+        if args.once or args.daemon:
+            return executar_sem_interface(args.motor, args.once, args.jobs, args.url_base, args.perfil_navegador)
+        
+        if not carregar_interface():
+            print("Tkinter/ttkthemes não disponíveis. Use --once, --daemon ou --report.", file=sys.stderr)
+            return 2
+        
+        # Usar o tema ThemedTk
+        root = ThemedTk(theme="arc")
+        app = Application(root, args)
+        root.mainloop()
+        return 0
+    finally:
+        if servidor_metricas is not None:
+            servidor_metricas.parar()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
\ No newline at end of file
@@ -6,7 +6,15 @@ a = Analysis(
     pathex=[],
     binaries=[],
     datas=[],
-    hiddenimports=[],
+    hiddenimports=[
+        # Importados sob demanda em auto_19.py (carregar_interface/selenium/requests)
+        'ttkthemes',
+        'selenium.webdriver.edge.options',
+        'selenium.webdriver.edge.service',
+        'selenium.webdriver.common.driver_finder',
+        'selenium.webdriver.support.expected_conditions',
+        'requests.adapters',
+    ],
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
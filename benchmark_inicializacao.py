@@ -0,0 +1,172 @@
+"""
+Mede o tempo de inicialização do auto_19 nos modos interface, CLI e --once
+
+Cada medição executa um novo interpretador Python com -X importtime sobre
+uma cópia do auto_19.py em uma pasta temporária (com estado e logs
+próprios) e registra o tempo total do processo e o tempo de importação dos
+módulos. O modo --once baixa o relatório de um SSW simulado local
+(ssw_simulado.py), então não acessa o SSW de produção.
+
+Uso:
+    python benchmark_inicializacao.py --repeticoes 5 --json inicializacao.json
+
+    Para detectar regressões em relação a uma medição anterior:
+    python benchmark_inicializacao.py --comparar inicializacao.json --tolerancia 0.25
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import ssw_simulado
+
+BASE_DIR = Path(__file__).resolve().parent
+SCRIPT = BASE_DIR / "auto_19.py"
+
+CODIGO_IMPORTACAO = "import auto_19"
+CODIGO_INTERFACE = (
+    "import auto_19\n"
+    "auto_19.carregar_interface()\n"
+    "root = auto_19.ThemedTk(theme='arc')\n"
+    "app = auto_19.Application(root)\n"
+    "root.update()\n"
+    "root.destroy()\n"
+)
+
+MODOS = ('importacao', 'report', 'once', 'interface')
+
+
+def ler_importtime(saida_erro):
+    """
+    Interpreta as linhas de -X importtime
+
+    Returns:
+        tuple: (tempo total de importação em ms, dict módulo de primeiro nível -> ms acumulados)
+    """
+    modulos = {}
+    for linha in saida_erro.splitlines():
+        if not linha.startswith("import time:") or "|" not in linha:
+            continue
+        _, acumulado, nome = linha.split("|", 2)
+        if nome.startswith("  ") or not acumulado.strip().isdigit():
+            continue  # Importações aninhadas já estão no acumulado do módulo pai
+        modulos[nome.strip()] = int(acumulado) / 1000
+    return sum(modulos.values()), modulos
+
+
+def comando_modo(modo, pasta, url_base, arquivo_jobs):
+    """Monta a linha de comando de um modo de medição"""
+    script = str(pasta / "auto_19.py")
+    if modo == 'importacao':
+        return [sys.executable, "-X", "importtime", "-c", CODIGO_IMPORTACAO]
+    if modo == 'interface':
+        return [sys.executable, "-X", "importtime", "-c", CODIGO_INTERFACE]
+    if modo == 'report':
+        return [sys.executable, "-X", "importtime", script, "--report", "--jobs", str(arquivo_jobs)]
+    return [sys.executable, "-X", "importtime", script, "--once", "--motor", "http",
+            "--url-base", url_base, "--jobs", str(arquivo_jobs)]
+
+
+def medir(modo, repeticoes, url_base):
+    """
+    Executa as medições de um modo
+
+    Returns:
+        dict | None: Tempos (ms) e módulos mais lentos, ou None se o modo não
+                     pôde ser executado (ex.: interface sem display)
+    """
+    totais, importacoes, ultimo_modulos = [], [], {}
+
+    for _ in range(repeticoes):
+        with ssw_simulado.pasta_benchmark(SCRIPT, "bench_auto19_") as pasta:
+            arquivo_jobs = ssw_simulado.criar_jobs_benchmark(pasta)
+            inicio = time.perf_counter()
+            processo = subprocess.run(
+                comando_modo(modo, pasta, url_base, arquivo_jobs),
+                cwd=pasta, env=ssw_simulado.ambiente_benchmark(pasta), capture_output=True, text=True, timeout=300
+            )
+            total = (time.perf_counter() - inicio) * 1000
+            sem_arquivo = ssw_simulado.extracoes_sem_arquivo(arquivo_jobs) if modo == 'once' else []
+
+        if processo.returncode != 0:
+            ultima_linha = (processo.stderr.strip().splitlines() or ["sem saída"])[-1]
+            print(f"  {modo}: não executado ({ultima_linha})", file=sys.stderr)
+            return None
+        if sem_arquivo:
+            print(f"  {modo}: nenhum relatório baixado ({', '.join(sem_arquivo)})", file=sys.stderr)
+            return None
+
+        importacao, ultimo_modulos = ler_importtime(processo.stderr)
+        totais.append(total)
+        importacoes.append(importacao)
+
+    mais_lentos = sorted(ultimo_modulos.items(), key=lambda item: item[1], reverse=True)[:5]
+    return {
+        'total_ms': {
+            'primeira': round(totais[0], 1),
+            'mediana': round(statistics.median(totais), 1),
+            'minimo': round(min(totais), 1),
+            'maximo': round(max(totais), 1)
+        },
+        'importacao_ms': {
+            'mediana': round(statistics.median(importacoes), 1),
+            'minimo': round(min(importacoes), 1)
+        },
+        'modulos_mais_lentos_ms': {nome: round(tempo, 1) for nome, tempo in mais_lentos}
+    }
+
+
+def medianas(resultado):
+    """Medidas de um modo comparadas com a medição anterior (ms)"""
+    return [(medida, resultado[medida]['mediana']) for medida in ('total_ms', 'importacao_ms')]
+
+
+def main():
+    """Executa as medições e mostra o resumo"""
+    parser = argparse.ArgumentParser(description="Tempo de inicialização do auto_19")
+    parser.add_argument('--modos', nargs='+', choices=MODOS, default=list(MODOS), help="Modos medidos")
+    parser.add_argument('--repeticoes', type=int, default=5, help="Execuções por modo")
+    parser.add_argument('--json', type=Path, help="Grava os resultados neste arquivo")
+    parser.add_argument('--comparar', type=Path, help="Resultado anterior (JSON) usado como referência")
+    parser.add_argument('--tolerancia', type=float, default=0.25,
+                        help="Aumento relativo da mediana tolerado na comparação")
+    args = parser.parse_args()
+
+    servidor = ssw_simulado.iniciar_em_segundo_plano(linhas=1000)
+    try:
+        resultados = {}
+        for modo in args.modos:
+            print(f"Medindo {modo} ({args.repeticoes}x)...", file=sys.stderr)
+            resultados[modo] = medir(modo, args.repeticoes, servidor.url_base)
+    finally:
+        servidor.shutdown()
+        servidor.server_close()
+
+    print(f"{'modo':<12}{'1ª exec.':>10}{'mediana':>10}{'mín.':>10}{'máx.':>10}{'import.':>10}  (ms)")
+    for modo, resultado in resultados.items():
+        if resultado is None:
+            print(f"{modo:<12}{'-':>10}")
+            continue
+        total = resultado['total_ms']
+        print(f"{modo:<12}{total['primeira']:>10.1f}{total['mediana']:>10.1f}{total['minimo']:>10.1f}"
+              f"{total['maximo']:>10.1f}{resultado['importacao_ms']['mediana']:>10.1f}")
+        lentos = ", ".join(f"{nome} {tempo:.0f}" for nome, tempo in resultado['modulos_mais_lentos_ms'].items())
+        print(f"{'':<12}mais lentos: {lentos}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as arquivo:
+            json.dump({'python': sys.version.split()[0], 'modos': resultados}, arquivo, ensure_ascii=False, indent=1)
+
+    if args.comparar:
+        regressoes = ssw_simulado.comparar_benchmark(resultados, args.comparar, 'modos', medianas, args.tolerancia)
+        for regressao in regressoes:
+            print(f"REGRESSÃO: {regressao}")
+        return 1 if regressoes else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
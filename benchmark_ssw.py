@@ -0,0 +1,258 @@
+"""
+Mede ciclos completos de extração contra o SSW simulado (ssw_simulado.py)
+
+Cada medição executa "auto_19.py --once" em um novo interpretador, sobre
+uma cópia do script em uma pasta temporária (com estado e logs próprios),
+com 1 ou mais extrações configuradas. São registrados:
+
+- a latência do ciclo (tempo do processo e duração da fase 'extracao');
+- a vazão com vários relatórios (relatórios por minuto);
+- o pico de memória do processo (e dos navegadores, no motor navegador);
+- a duração de cada fase (ver MedidorFases), a partir de tempos_fases.json.
+
+A latência, o tempo de geração do relatório, a velocidade do download e a
+taxa de erros do servidor simulado podem ser configurados, então nenhuma
+medição acessa o SSW de produção.
+
+Uso:
+    python benchmark_ssw.py --relatorios 1 4 --linhas 20000 --repeticoes 5 --json ssw.json
+
+    Tempo de carregamento das páginas com e sem o perfil enxuto do Edge:
+    python benchmark_ssw.py --motor navegador --perfis padrao enxuto
+
+    Com um SSW lento e instável:
+    python benchmark_ssw.py --latencia 0.2 --geracao 2 --vazao 500000 --taxa-erro 0.1
+
+    Para detectar regressões em relação a uma medição anterior:
+    python benchmark_ssw.py --comparar ssw.json --tolerancia 0.25
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import ssw_simulado
+
+BASE_DIR = Path(__file__).resolve().parent
+SCRIPT = BASE_DIR / "auto_19.py"
+
+MARCADOR_RESULTADO = "BENCHMARK_SSW "
+
+# Executa o --once e informa o pico de memória do processo e dos processos filhos
+CODIGO_EXECUCAO = (
+    "import json, sys\n"
+    "import auto_19\n"
+    "codigo = auto_19.main(sys.argv[1:])\n"
+    "memoria = {}\n"
+    "try:\n"
+    "    import resource\n"
+    "    fator = 1 if sys.platform == 'darwin' else 1024\n"
+    "    memoria['processo'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * fator\n"
+    "    memoria['filhos'] = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * fator\n"
+    "except ImportError:\n"
+    "    try:\n"
+    "        import psutil\n"
+    "        memoria['processo'] = psutil.Process().memory_info().peak_wset\n"
+    "    except (ImportError, AttributeError):\n"
+    "        pass\n"
+    f"print({MARCADOR_RESULTADO!r} + json.dumps({{'codigo': codigo, 'memoria': memoria}}))\n"
+)
+
+# Novas tentativas curtas, para que os erros simulados não dominem a medição
+RETENTATIVA_BENCHMARK = {
+    'tentativas': 5,
+    'espera_inicial': 0.5,
+    'multiplicador': 2,
+    'espera_maxima': 5,
+    'variacao': 0
+}
+
+
+def percentil(valores, p):
+    """Percentil pelo método do posto mais próximo"""
+    ordenados = sorted(valores)
+    return ordenados[max(0, -(-p * len(ordenados) // 100) - 1)]
+
+
+def executar_ciclo(relatorios, motor, url_base, perfil=None):
+    """
+    Executa um ciclo --once com 'relatorios' extrações em uma pasta temporária
+
+    Args:
+        perfil (str | None): Perfil do Edge (--perfil-navegador), apenas no motor navegador
+
+    Returns:
+        dict: 'total_s', 'memoria' (bytes) e 'fases' (fase -> lista de segundos)
+
+    Raises:
+        RuntimeError: Se o ciclo não terminar com sucesso
+    """
+    with ssw_simulado.pasta_benchmark(SCRIPT, "bench_ssw_") as pasta:
+        arquivo_jobs = ssw_simulado.criar_jobs_benchmark(pasta, relatorios, retentativa=RETENTATIVA_BENCHMARK)
+
+        comando = [sys.executable, "-c", CODIGO_EXECUCAO, "--once", "--motor", motor,
+                   "--url-base", url_base, "--jobs", str(arquivo_jobs)]
+        if perfil:
+            comando += ["--perfil-navegador", perfil]
+
+        inicio = time.perf_counter()
+        processo = subprocess.run(
+            comando, cwd=pasta, env=ssw_simulado.ambiente_benchmark(pasta), capture_output=True, text=True, timeout=1800
+        )
+        total = time.perf_counter() - inicio
+
+        resultado = None
+        for linha in processo.stdout.splitlines():
+            if linha.startswith(MARCADOR_RESULTADO):
+                resultado = json.loads(linha[len(MARCADOR_RESULTADO):])
+        if processo.returncode != 0 or resultado is None or resultado['codigo'] != 0:
+            ultima_linha = (processo.stderr.strip().splitlines() or ["sem saída"])[-1]
+            raise RuntimeError(ultima_linha)
+        sem_arquivo = ssw_simulado.extracoes_sem_arquivo(arquivo_jobs)
+        if sem_arquivo:
+            raise RuntimeError(f"nenhum relatório baixado: {', '.join(sem_arquivo)}")
+
+        try:
+            with open(pasta / "estado" / "tempos_fases.json", encoding='utf-8') as arquivo:
+                tempos = json.load(arquivo)
+        except (OSError, ValueError):
+            tempos = {}
+
+    return {
+        'total_s': total,
+        'memoria': resultado['memoria'],
+        'fases': {fase: [item['segundos'] for item in itens] for fase, itens in tempos.items()}
+    }
+
+
+def medir(relatorios, repeticoes, motor, url_base, perfil=None):
+    """
+    Executa as repetições de um cenário
+
+    Returns:
+        dict | None: Latência, vazão, memória e fases, ou None se o cenário falhou
+    """
+    totais, ciclos, memorias = [], [], []
+    fases = {}
+
+    for _ in range(repeticoes):
+        try:
+            execucao = executar_ciclo(relatorios, motor, url_base, perfil)
+        except (RuntimeError, subprocess.TimeoutExpired) as e:
+            print(f"  {relatorios} relatório(s): não executado ({e})", file=sys.stderr)
+            return None
+
+        totais.append(execucao['total_s'])
+        # Sem a fase 'extracao' (ex.: falha ao medir), usa o tempo do processo
+        ciclos.append(max(execucao['fases'].get('extracao') or [execucao['total_s']]))
+        memoria = execucao['memoria']
+        if memoria:
+            memorias.append((memoria.get('processo', 0) + memoria.get('filhos', 0)) / (1024 * 1024))
+        for fase, valores in execucao['fases'].items():
+            fases.setdefault(fase, []).extend(valores)
+
+    return {
+        'processo_s': {
+            'mediana': round(statistics.median(totais), 3),
+            'p95': round(percentil(totais, 95), 3),
+            'maximo': round(max(totais), 3)
+        },
+        'ciclo_s': {
+            'mediana': round(statistics.median(ciclos), 3),
+            'p95': round(percentil(ciclos, 95), 3),
+            'maximo': round(max(ciclos), 3)
+        },
+        'relatorios_por_minuto': round(relatorios * 60 / statistics.median(totais), 2),
+        'memoria_mb': round(max(memorias), 1) if memorias else None,
+        'fases_s': {
+            fase: {'p50': round(percentil(valores, 50), 3), 'p95': round(percentil(valores, 95), 3)}
+            for fase, valores in fases.items()
+        }
+    }
+
+
+def medidas_comparadas(resultado):
+    """Latência e memória de um cenário comparadas com a medição anterior"""
+    return [
+        ('ciclo_s', resultado['ciclo_s']['mediana']),
+        ('processo_s', resultado['processo_s']['mediana']),
+        ('memoria_mb', resultado['memoria_mb'])
+    ]
+
+
+def main():
+    """Executa os cenários e mostra o resumo"""
+    parser = argparse.ArgumentParser(description="Ciclos de extração contra o SSW simulado")
+    parser.add_argument('--relatorios', type=int, nargs='+', default=[1, 4],
+                        help="Quantidade de extrações por ciclo, um cenário por valor")
+    parser.add_argument('--repeticoes', type=int, default=5, help="Ciclos por cenário")
+    parser.add_argument('--motor', default='http', help="Motor de extração (http ou navegador)")
+    parser.add_argument('--perfis', nargs='+', default=[None],
+                        help="Perfis do Edge comparados no motor navegador (ex.: padrao enxuto)")
+    parser.add_argument('--linhas', type=int, default=5000, help="Quantidade de CTRCs no relatório")
+    parser.add_argument('--latencia', type=float, default=0.0, help="Atraso (segundos) de cada resposta")
+    parser.add_argument('--geracao', type=float, default=0.0, help="Tempo (segundos) para gerar o relatório")
+    parser.add_argument('--vazao', type=int, default=None, help="Velocidade do download (bytes/s)")
+    parser.add_argument('--taxa-erro', type=float, default=0.0,
+                        help="Fração dos relatórios respondidos com erro 500")
+    parser.add_argument('--semente', type=int, default=19, help="Semente do sorteio dos erros")
+    parser.add_argument('--json', type=Path, help="Grava os resultados neste arquivo")
+    parser.add_argument('--comparar', type=Path, help="Resultado anterior (JSON) usado como referência")
+    parser.add_argument('--tolerancia', type=float, default=0.25,
+                        help="Aumento relativo tolerado na comparação")
+    args = parser.parse_args()
+
+    servidor = ssw_simulado.iniciar_em_segundo_plano(
+        linhas=args.linhas, latencia=args.latencia, geracao=args.geracao,
+        vazao=args.vazao, taxa_erro=args.taxa_erro, semente=args.semente
+    )
+    try:
+        resultados = {}
+        for perfil in args.perfis:
+            for relatorios in args.relatorios:
+                cenario = f"relatorios_{relatorios}" + (f"_{perfil}" if perfil else "")
+                print(f"Medindo {cenario} ({args.repeticoes}x)...", file=sys.stderr)
+                resultados[cenario] = medir(relatorios, args.repeticoes, args.motor, servidor.url_base, perfil)
+        erros = servidor.estado.erros
+    finally:
+        servidor.shutdown()
+        servidor.server_close()
+
+    print(f"{'cenário':<24}{'ciclo p50':>10}{'ciclo p95':>10}{'processo':>10}{'rel./min':>10}{'memória':>10}  (s, MB)")
+    for cenario, resultado in resultados.items():
+        if resultado is None:
+            print(f"{cenario:<24}{'-':>10}")
+            continue
+        memoria = f"{resultado['memoria_mb']:.1f}" if resultado['memoria_mb'] is not None else "-"
+        print(f"{cenario:<24}{resultado['ciclo_s']['mediana']:>10.2f}{resultado['ciclo_s']['p95']:>10.2f}"
+              f"{resultado['processo_s']['mediana']:>10.2f}{resultado['relatorios_por_minuto']:>10.1f}{memoria:>10}")
+        fases = ", ".join(f"{fase} {valores['p50']:.2f}" for fase, valores in resultado['fases_s'].items()
+                          if fase != 'extracao')
+        print(f"{'':<24}fases (p50): {fases}")
+    if erros:
+        print(f"Erros simulados respondidos pelo servidor: {erros}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as arquivo:
+            json.dump({
+                'python': sys.version.split()[0],
+                'configuracao': {chave: valor for chave, valor in vars(args).items()
+                                 if chave not in ('json', 'comparar', 'tolerancia')},
+                'cenarios': resultados
+            }, arquivo, ensure_ascii=False, indent=1, default=str)
+
+    if args.comparar:
+        regressoes = ssw_simulado.comparar_benchmark(
+            resultados, args.comparar, 'cenarios', medidas_comparadas, args.tolerancia
+        )
+        for regressao in regressoes:
+            print(f"REGRESSÃO: {regressao}")
+        return 1 if regressoes else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,439 @@
+"""
+Servidor HTTP local que simula as telas do SSW usadas pelo extrator
+
+Reproduz o login do ssw0422 (campos f1–f4 e botão id "5"), o menu com os
+campos f2/f3, o formulário do relatório (data_prev_man, hora_prev_man,
+relatorio_excel e botão btn_envia) e o download do arquivo .sswweb, para
+testar os motores de extração sem acessar o SSW de produção.
+
+A latência das páginas, o tempo de geração do relatório, a velocidade do
+download e uma taxa de erros podem ser configurados para simular um SSW
+lento ou instável (ver benchmark_ssw.py). O módulo também reúne o que os
+benchmarks têm em comum: a pasta temporária com a cópia do auto_19.py, as
+extrações medidas e a comparação com uma medição anterior.
+
+Uso:
+    python ssw_simulado.py --porta 8422 --linhas 5000
+    python ssw_simulado.py --latencia 0.2 --geracao 3 --taxa-erro 0.1
+
+    Depois, aponte o motor para o servidor local:
+    MotorHTTP(url_base="http://127.0.0.1:8422").extrair(job, pasta_download)
+"""
+import argparse
+import json
+import os
+import random
+import secrets
+import shutil
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from http.cookies import SimpleCookie
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Lock, Thread
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+CAMINHO_LOGIN = "/bin/ssw0422"
+CAMINHO_RELATORIO = "/bin/ssw0036"
+COOKIE_SESSAO = "ssw_sessao"
+CODIFICACAO = "latin-1"
+TAMANHO_BLOCO_ENVIO = 64 * 1024
+
+PAGINA_LOGIN = """<html><head><title>SSW - Login</title></head><body>
+<form name="login" method="post" action="{caminho}">
+<input type="hidden" name="act" value="L">
+<input type="text" name="f1" value="">
+<input type="text" name="f2" value="">
+<input type="text" name="f3" value="">
+<input type="password" name="f4" value="">
+<a id="5" href="#" onclick="document.forms[0].submit(); return false;">Entrar</a>
+</form></body></html>"""
+
+PAGINA_MENU = """<html><head><title>SSW - Menu</title></head><body>
+<form name="menu" method="get" action="#">
+<input type="text" name="f2" value="{unidade}">
+<input type="text" name="f3" value="" oninput="abrirOpcao(this)">
+</form>
+<script>
+function abrirOpcao(campo) {{
+    var valor = campo.value;
+    if (valor.length > 1 && valor.charAt(valor.length - 1) === '+') {{
+        var unidade = document.getElementsByName('f2')[0].value;
+        window.open('{caminho}?f2=' + encodeURIComponent(unidade) +
+                    '&f3=' + encodeURIComponent(valor.slice(0, -1)), '_blank');
+    }}
+}}
+</script></body></html>"""
+
+PAGINA_RELATORIO = """<html><head><title>SSW - Relatorio {opcao}</title></head><body>
+<form name="relatorio" method="post" action="{caminho}">
+<input type="hidden" name="seq" value="{sequencia}">
+<input type="hidden" name="f2" value="{unidade}">
+<input type="hidden" name="f3" value="{opcao}">
+<input type="text" name="data_prev_man" value="">
+<input type="text" name="hora_prev_man" value="">
+<input type="text" name="relatorio_excel" value="N">
+<a id="btn_envia" href="#" onclick="document.forms[0].submit(); return false;">Enviar</a>
+</form></body></html>"""
+
+CIDADES = [
+    ("Curitiba", "PR"), ("Joinville", "SC"), ("Porto Alegre", "RS"),
+    ("Sao Paulo", "SP"), ("Campinas", "SP"), ("Londrina", "PR"),
+    ("Blumenau", "SC"), ("Caxias do Sul", "RS")
+]
+
+
+def gerar_relatorio(unidade, linhas, semente):
+    """
+    Gera o conteúdo CSV do relatório no formato usado pelo SSW
+
+    O conteúdo depende apenas da semente, então downloads feitos com a
+    mesma semente são idênticos byte a byte.
+
+    Returns:
+        bytes: Relatório codificado em Latin-1 com cabeçalho e rodapé
+    """
+    aleatorio = random.Random(semente)
+    base = datetime(2025, 1, 1) + timedelta(days=aleatorio.randint(0, 300))
+    partes = [
+        "Relatório 019 - CTRCs Disponíveis para Transferência;;;;;;;;;;",
+        f"Unidade: {unidade};Emissão: {base.strftime('%d/%m/%y %H:%M')};;;;;;;;;",
+        "CTRC;Série;Emissão;Remetente;Destinatário;Cidade Destino;UF;Volumes;Peso (kg);Valor Mercadoria;Previsão Entrega",
+    ]
+    for indice in range(linhas):
+        cidade, uf = aleatorio.choice(CIDADES)
+        emissao = base - timedelta(days=aleatorio.randint(0, 5))
+        previsao = base + timedelta(days=aleatorio.randint(1, 7))
+        peso = f"{aleatorio.uniform(1, 3000):.2f}".replace('.', ',')
+        valor = f"{aleatorio.uniform(50, 90000):,.2f}".replace(',', '_').replace('.', ',').replace('_', '.')
+        partes.append(
+            f"{unidade}{100000 + indice:06d}-{indice % 10};1;{emissao.strftime('%d/%m/%y')};"
+            f"Remetente {aleatorio.randint(1, 400)} Ltda;Destinatário {aleatorio.randint(1, 900)};"
+            f"{cidade};{uf};{aleatorio.randint(1, 40)};{peso};{valor};{previsao.strftime('%d/%m/%y')}"
+        )
+    partes.append(f"Total de CTRCs: {linhas};;;;;;;;;;")
+    return ("\r\n".join(partes) + "\r\n").encode(CODIFICACAO)
+
+
+class EstadoSimulado:
+    """
+    Configuração e estado compartilhados entre as requisições do servidor
+
+    Args:
+        linhas (int): Quantidade de CTRCs no relatório
+        expirar_sessao (float | None): Segundos até a sessão de login expirar
+        latencia (float): Atraso (segundos) antes de responder qualquer requisição
+        geracao (float): Atraso adicional (segundos) para gerar o relatório
+        vazao (int | None): Velocidade do download em bytes por segundo (None = sem limite)
+        taxa_erro (float): Fração dos relatórios respondidos com erro HTTP 500
+        semente (int | None): Semente do sorteio dos erros, para execuções reproduzíveis
+    """
+
+    def __init__(self, linhas=1000, expirar_sessao=None, latencia=0.0, geracao=0.0,
+                 vazao=None, taxa_erro=0.0, semente=None):
+        self.linhas = linhas
+        self.expirar_sessao = expirar_sessao
+        self.latencia = latencia
+        self.geracao = geracao
+        self.vazao = vazao
+        self.taxa_erro = taxa_erro
+        self.sorteio = random.Random(semente)
+        self.sessoes = {}
+        self.sequencias = set()
+        self.downloads = 0
+        self.erros = 0
+        self.trava = Lock()
+
+    def criar_sessao(self):
+        token = secrets.token_hex(16)
+        with self.trava:
+            self.sessoes[token] = time.monotonic()
+        return token
+
+    def sessao_valida(self, token):
+        with self.trava:
+            criada = self.sessoes.get(token)
+            if criada is None:
+                return False
+            if self.expirar_sessao is not None and time.monotonic() - criada > self.expirar_sessao:
+                del self.sessoes[token]
+                return False
+            return True
+
+    def sortear_erro(self):
+        with self.trava:
+            if self.taxa_erro and self.sorteio.random() < self.taxa_erro:
+                self.erros += 1
+                return True
+            return False
+
+
+class ManipuladorSSW(BaseHTTPRequestHandler):
+    """Atende as rotas simuladas do SSW"""
+
+    protocol_version = "HTTP/1.1"
+    estado = None  # Definido por criar_servidor
+
+    def log_message(self, formato, *args):
+        pass
+
+    def _token(self):
+        cookie = SimpleCookie(self.headers.get('Cookie', ''))
+        return cookie[COOKIE_SESSAO].value if COOKIE_SESSAO in cookie else None
+
+    def _ler_formulario(self):
+        tamanho = int(self.headers.get('Content-Length') or 0)
+        corpo = self.rfile.read(tamanho).decode(CODIFICACAO)
+        return {chave: valores[0] for chave, valores in parse_qs(corpo, keep_blank_values=True).items()}
+
+    def _responder_html(self, html, cabecalhos=None):
+        corpo = html.encode(CODIFICACAO)
+        self.send_response(200)
+        self.send_header('Content-Type', f'text/html; charset={CODIFICACAO}')
+        self.send_header('Content-Length', str(len(corpo)))
+        for nome, valor in (cabecalhos or {}).items():
+            self.send_header(nome, valor)
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def _pagina_login(self):
+        self._responder_html(PAGINA_LOGIN.format(caminho=CAMINHO_LOGIN))
+
+    def _enviar(self, conteudo):
+        # Envia em blocos, respeitando a vazão configurada
+        vazao = self.estado.vazao
+        for inicio in range(0, len(conteudo), TAMANHO_BLOCO_ENVIO):
+            bloco = conteudo[inicio:inicio + TAMANHO_BLOCO_ENVIO]
+            self.wfile.write(bloco)
+            if vazao:
+                time.sleep(len(bloco) / vazao)
+
+    def do_HEAD(self):
+        self.send_response(200)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def do_GET(self):
+        time.sleep(self.estado.latencia)
+        url = urlsplit(self.path)
+        if url.path == CAMINHO_LOGIN:
+            self._pagina_login()
+        elif url.path == CAMINHO_RELATORIO:
+            if not self.estado.sessao_valida(self._token()):
+                self._pagina_login()
+                return
+            parametros = {chave: valores[0] for chave, valores in parse_qs(url.query).items()}
+            sequencia = secrets.token_hex(8)
+            with self.estado.trava:
+                self.estado.sequencias.add(sequencia)
+            self._responder_html(PAGINA_RELATORIO.format(
+                caminho=CAMINHO_RELATORIO,
+                sequencia=sequencia,
+                unidade=parametros.get('f2', ''),
+                opcao=parametros.get('f3', '')
+            ))
+        else:
+            self.send_error(404)
+
+    def do_POST(self):
+        time.sleep(self.estado.latencia)
+        url = urlsplit(self.path)
+        formulario = self._ler_formulario()
+
+        if url.path == CAMINHO_LOGIN:
+            if not all(formulario.get(campo) for campo in ('f1', 'f2', 'f3', 'f4')):
+                self._pagina_login()
+                return
+            token = self.estado.criar_sessao()
+            self._responder_html(
+                PAGINA_MENU.format(caminho=CAMINHO_RELATORIO, unidade=formulario['f1']),
+                {'Set-Cookie': f"{COOKIE_SESSAO}={token}; Path=/"}
+            )
+
+        elif url.path == CAMINHO_RELATORIO:
+            if not self.estado.sessao_valida(self._token()):
+                self._pagina_login()
+                return
+            with self.estado.trava:
+                sequencia_valida = formulario.get('seq') in self.estado.sequencias
+                self.estado.sequencias.discard(formulario.get('seq'))
+            if not sequencia_valida or formulario.get('relatorio_excel') != 'S':
+                self.send_error(400, "Formulario do relatorio invalido")
+                return
+
+            time.sleep(self.estado.geracao)
+            if self.estado.sortear_erro():
+                self.send_error(500, "Erro simulado ao gerar o relatorio")
+                return
+
+            # O conteúdo muda apenas a cada hora, como o relatório real
+            semente = (formulario.get('f2'), formulario.get('f3'), datetime.now().strftime('%Y%m%d%H'))
+            conteudo = gerar_relatorio(formulario.get('f2') or 'CTA', self.estado.linhas, str(semente))
+            nome = f"CSVssw0036aLDI[1]{datetime.now().strftime('%H%M%S')}.sswweb"
+            with self.estado.trava:
+                self.estado.downloads += 1
+
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/octet-stream')
+            self.send_header('Content-Disposition', f'attachment; filename="{nome}"')
+            self.send_header('Content-Length', str(len(conteudo)))
+            self.end_headers()
+            self._enviar(conteudo)
+
+        else:
+            self.send_error(404)
+
+
+def criar_servidor(host="127.0.0.1", porta=0, **configuracao):
+    """
+    Cria o servidor simulado sem iniciá-lo
+
+    Args:
+        host (str): Endereço de escuta
+        porta (int): Porta de escuta (0 escolhe uma porta livre)
+        **configuracao: Argumentos de EstadoSimulado (linhas, expirar_sessao, latencia, ...)
+
+    Returns:
+        ThreadingHTTPServer: Servidor configurado; a URL base fica em servidor.url_base
+    """
+    manipulador = type('ManipuladorConfigurado', (ManipuladorSSW,), {'estado': EstadoSimulado(**configuracao)})
+    servidor = ThreadingHTTPServer((host, porta), manipulador)
+    servidor.daemon_threads = True
+    servidor.estado = manipulador.estado
+    servidor.url_base = f"http://{host}:{servidor.server_address[1]}"
+    return servidor
+
+
+def iniciar_em_segundo_plano(**configuracao):
+    """Inicia o servidor simulado em uma thread e retorna o servidor"""
+    servidor = criar_servidor(**configuracao)
+    Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor
+
+
+@contextmanager
+def pasta_benchmark(script, prefixo):
+    """
+    Pasta temporária com uma cópia do script, para que cada medição tenha estado e logs próprios
+
+    Yields:
+        Path: Pasta temporária (removida ao sair do bloco)
+    """
+    with tempfile.TemporaryDirectory(prefix=prefixo) as temporaria:
+        pasta = Path(temporaria)
+        shutil.copy2(script, pasta / Path(script).name)
+        yield pasta
+
+
+def ambiente_benchmark(pasta):
+    """Variáveis de ambiente que fazem o interpretador importar a cópia do script na pasta"""
+    return dict(os.environ, PYTHONPATH=str(pasta), PYTHONDONTWRITEBYTECODE="1")
+
+
+def criar_jobs_benchmark(pasta, quantidade=1, **extras):
+    """
+    Grava a configuração com 'quantidade' extrações, cada uma com sua pasta de destino
+
+    O horário comercial vai de 0 a 24 h, então o --once sempre executa as
+    extrações, qualquer que seja a hora da medição.
+
+    Args:
+        **extras: Chaves acrescentadas a cada extração (ex.: 'retentativa')
+
+    Returns:
+        Path: Arquivo de configuração das extrações
+    """
+    jobs = []
+    for indice in range(1, quantidade + 1):
+        destino = pasta / f"destino_{indice}"
+        destino.mkdir()
+        jobs.append({
+            'nome': f"Benchmark {indice}",
+            'unidade': "CTA",
+            'opcao': "19",
+            'pasta_destino': str(destino),
+            'hora_inicio': 0,
+            'hora_fim': 24,
+            **extras
+        })
+    arquivo_jobs = pasta / "jobs_extracao.json"
+    arquivo_jobs.write_text(json.dumps(jobs), encoding='utf-8')
+    return arquivo_jobs
+
+
+def extracoes_sem_arquivo(arquivo_jobs):
+    """
+    Extrações cuja pasta de destino ficou vazia, para não tomar um ciclo sem download como sucesso
+
+    Returns:
+        list: Nomes das extrações sem arquivo publicado
+    """
+    with open(arquivo_jobs, encoding='utf-8') as arquivo:
+        jobs = json.load(arquivo)
+    return [job['nome'] for job in jobs if not any(Path(job['pasta_destino']).iterdir())]
+
+
+def comparar_benchmark(resultados, caminho_base, secao, medidas, tolerancia):
+    """
+    Compara os resultados de um benchmark com uma medição anterior
+
+    Args:
+        resultados (dict): Cenário -> resultado (None se não foi executado)
+        caminho_base (Path): Resultado anterior (JSON)
+        secao (str): Chave do JSON com os resultados por cenário
+        medidas (callable): Recebe um resultado e retorna a lista de (medida, valor) comparados
+        tolerancia (float): Aumento relativo tolerado
+
+    Returns:
+        list: Descrição das regressões acima da tolerância
+    """
+    with open(caminho_base, encoding='utf-8') as arquivo:
+        base = json.load(arquivo)[secao]
+
+    regressoes = []
+    for cenario, resultado in resultados.items():
+        anterior = base.get(cenario)
+        if resultado is None or anterior is None:
+            continue
+        referencias = dict(medidas(anterior))
+        for medida, atual in medidas(resultado):
+            referencia = referencias.get(medida)
+            if atual is not None and referencia and atual > referencia * (1 + tolerancia):
+                regressoes.append(f"{cenario} {medida}: {referencia} -> {atual} (+{atual / referencia - 1:.0%})")
+    return regressoes
+
+
+def main():
+    """Executa o servidor simulado até ser interrompido"""
+    parser = argparse.ArgumentParser(description="Servidor local que simula as telas do SSW")
+    parser.add_argument('--host', default="127.0.0.1", help="Endereço de escuta")
+    parser.add_argument('--porta', type=int, default=8422, help="Porta de escuta")
+    parser.add_argument('--linhas', type=int, default=1000, help="Quantidade de CTRCs no relatório")
+    parser.add_argument('--expirar-sessao', type=float, default=None,
+                        help="Segundos até a sessão de login expirar")
+    parser.add_argument('--latencia', type=float, default=0.0, help="Atraso (segundos) de cada resposta")
+    parser.add_argument('--geracao', type=float, default=0.0, help="Tempo (segundos) para gerar o relatório")
+    parser.add_argument('--vazao', type=int, default=None, help="Velocidade do download (bytes/s)")
+    parser.add_argument('--taxa-erro', type=float, default=0.0,
+                        help="Fração dos relatórios respondidos com erro 500")
+    parser.add_argument('--semente', type=int, default=None, help="Semente do sorteio dos erros")
+    args = parser.parse_args()
+
+    servidor = criar_servidor(
+        args.host, args.porta, linhas=args.linhas, expirar_sessao=args.expirar_sessao,
+        latencia=args.latencia, geracao=args.geracao, vazao=args.vazao,
+        taxa_erro=args.taxa_erro, semente=args.semente
+    )
+    print(f"SSW simulado em {servidor.url_base}{CAMINHO_LOGIN}")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+
+
+if __name__ == "__main__":
+    main()